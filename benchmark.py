@@ -0,0 +1,978 @@
+"""Benchmark the installer against scripted stand-ins for its external tools.
+
+Fake ollama, docker, pip, uv, winget, npm and curl commands are put first on PATH;
+they replay realistic output at a configurable speed and volume without
+installing anything. Every scenario runs in a fresh interpreter so its peak
+memory is its own, and the results are written as JSON for comparing versions:
+
+    python benchmark.py --lines 20000 --output bench_results.json
+    python benchmark.py --compare bench_results.json
+"""
+import argparse
+import http.server
+import io
+import json
+import os
+import platform
+import re
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SHIM_TOOLS = ("ollama", "docker", "pip", "uv", "winget", "npm", "curl")
+SCENARIOS = ("detect", "install", "parse-pip", "parse-uv", "parse-docker", "parse-ollama", "parse-winget", "main", "main-rerun",
+             "tune-ollama", "parse-winget-cr", "stall", "docker-api", "registry", "warm-up")
+
+# Checklist entries the fake tools report as already installed
+INSTALLED_MODELS = ("phi4", "llama3.2-vision", "nomic-embed-text", "mistral")
+RUNNING_CONTAINERS = ("open-webui",)
+
+# Host ports the containers publish; stand-in services answer the installer's
+# readiness checks there, with 503 for their first BENCH_READY_DELAY seconds
+SERVICE_PORTS = (3000, 5678, 7860)
+
+# --------------------------------------------------------------------------
+# Fake tools: run as `benchmark.py --shim <tool> args...` from the PATH shims
+
+def _emit(lines, end="\n"):
+    """Write lines at the configured pace (BENCH_DELAY seconds per line)"""
+    delay = float(os.environ.get("BENCH_DELAY", "0"))
+    out = sys.stdout
+    for line in lines:
+        out.write(line + end)
+        if delay:
+            out.flush()
+            time.sleep(delay)
+    out.flush()
+
+def _volume():
+    return int(os.environ.get("BENCH_LINES", "1000"))
+
+def _progress_steps(total_mb):
+    """Yield (percent, done_mb) for the configured number of progress lines"""
+    steps = max(1, _volume())
+    for i in range(1, steps + 1):
+        yield 100 * i // steps, total_mb * i / steps
+
+def _fake_troubled_pull(model):
+    """The pulls the stall scenario supervises: bench-stall goes silent,
+    bench-slow crawls below the rate floor, bench-pause is silent for
+    BENCH_PAUSE_SECONDS and then finishes"""
+    pid_file = os.environ.get("BENCH_PID_FILE")
+    if pid_file:
+        with open(pid_file, "a", encoding="utf-8") as f:
+            f.write(f"{os.getpid()}\n")
+    _emit(["pulling manifest", "pulling 6a0746a1ec1a:   1% ▕               ▏ 47 MB/4.7 GB"])
+    if model == "bench-stall":
+        time.sleep(float(os.environ.get("BENCH_STALL_SECONDS", "30")))
+    elif model == "bench-slow":
+        for i in range(1, 1000):
+            _emit([f"pulling 6a0746a1ec1a:   1% ▕               ▏ {47 * 1024 + i} KB/4.7 GB"])
+            time.sleep(0.2)  # 5 KB/s
+    else:
+        time.sleep(float(os.environ.get("BENCH_PAUSE_SECONDS", "2")))
+        _emit(["pulling 6a0746a1ec1a: 100% ▕███████████████▏ 4.7 GB/4.7 GB", "verifying sha256 digest",
+               "writing manifest", "success"])
+    return 0
+
+def fake_ollama(args):
+    if args[:1] in (["pull"], ["run"]) and args[-1] in ("bench-stall", "bench-slow", "bench-pause"):
+        return _fake_troubled_pull(args[-1])
+    if args[:1] == ["--version"]:
+        _emit(["ollama version is 0.6.2"])
+    elif args[:1] == ["list"]:
+        count = int(os.environ.get("BENCH_MODELS", "50"))
+        models = list(INSTALLED_MODELS) + [f"bench-model-{i}" for i in range(count)]
+        _emit(["NAME                        ID              SIZE      MODIFIED"] +
+              [f"{m + ':latest':<27} {i:012x}    4.7 GB    2 days ago" for i, m in enumerate(models)])
+    elif args[:1] in (["pull"], ["run"]):
+        _emit(["pulling manifest"])
+        _emit(f"pulling 6a0746a1ec1a: {p:3d}% ▕{'█' * (p // 7):<15}▏ {mb / 1024:.1f} GB/4.7 GB  42 MB/s"
+              for p, mb in _progress_steps(4812))
+        _emit(["verifying sha256 digest", "writing manifest", "success"])
+    return 0
+
+def fake_docker(args):
+    if args[:1] == ["--version"]:
+        _emit(["Docker version 27.3.1, build ce12230"])
+    elif args[:1] == ["ps"]:
+        count = int(os.environ.get("BENCH_CONTAINERS", "50"))
+        rows = [{"Names": n, "Image": f"ghcr.io/open-webui/{n}:main", "State": "running"} for n in RUNNING_CONTAINERS]
+        rows += [{"Names": f"bench-{i}", "Image": f"bench/image-{i}:latest", "State": "exited"} for i in range(count)]
+        _emit(json.dumps(r) for r in rows)
+    elif args[:1] == ["images"]:
+        count = int(os.environ.get("BENCH_CONTAINERS", "50"))
+        _emit(f"bench/image-{i}:latest" for i in range(count))
+    elif args[:1] in (["run"], ["pull"]):
+        image = args[-1]
+        layers = [f"{i:012x}" for i in range(0xa1b2c3d4e5f0, 0xa1b2c3d4e5f0 + 12)]
+        _emit([f"Unable to find image '{image}' locally", f"main: Pulling from {image.split(':')[0]}"])
+        _emit(f"{layer}: Pulling fs layer" for layer in layers)
+        per_layer = max(1, _volume() // len(layers))
+        for layer in layers:
+            _emit(f"{layer}: Downloading [{'=' * (i * 50 // per_layer):<50}] {i * 1.5:.1f}MB/{per_layer * 1.5:.1f}MB"
+                  for i in range(1, per_layer + 1))
+            _emit([f"{layer}: Verifying Checksum", f"{layer}: Download complete", f"{layer}: Pull complete"])
+        _emit([f"Digest: sha256:{'ab' * 32}", f"Status: Downloaded newer image for {image}", "f" * 64])
+    elif args[:1] == ["start"]:
+        _emit(args[1:])
+    return 0
+
+def fake_pip(args):
+    if args[:1] not in (["install"], ["wheel"]):
+        return 0
+    packages = [a.strip('"') for a in args[1:] if not a.startswith("-")] or ["requirements"]
+    lines = []
+    for package in packages:
+        lines += [f"Collecting {package}", f"  Downloading {package}-1.0.0-py3-none-any.whl (12.3 MB)"]
+    lines += [f"Requirement already satisfied: dependency-{i} in ./site-packages (from {packages[i % len(packages)]}) (1.{i})"
+              for i in range(_volume())]
+    if args[0] == "wheel":
+        lines += [f"Saved ./wheelhouse/{p}-1.0.0-py3-none-any.whl" for p in packages]
+    else:
+        lines += [f"Installing collected packages: {', '.join(packages)}",
+                  f"Successfully installed {' '.join(p + '-1.0.0' for p in packages)}"]
+    _emit(lines)
+    return 0
+
+def fake_uv(args):
+    if args[:2] != ["pip", "install"]:
+        return 0
+    options_with_values = ("--python", "--find-links", "-r")
+    packages = [a.strip('"') for i, a in enumerate(args[2:], 2)
+                if not a.startswith("-") and args[i - 1] not in options_with_values] or ["requirements"]
+    lines = [f"Resolved {len(packages) + _volume()} packages in 340ms"]
+    for package in packages:
+        lines.append(f"Downloading {package} (12.3MiB)")
+    lines += [f"Downloading dependency-{i} (1.2MiB)" for i in range(_volume())]
+    lines += [f" Downloaded {package}" for package in packages]
+    lines += [f" Downloaded dependency-{i}" for i in range(_volume())]
+    lines += [f"Prepared {len(packages) + _volume()} packages in 2.31s",
+              f"Installed {len(packages)} packages in 45ms"]
+    lines += [f" + {package}==1.0.0" for package in packages]
+    _emit(lines)
+    return 0
+
+def fake_winget(args):
+    if args[:1] == ["list"]:
+        _emit(["Name                 Id                       Version", "-" * 60] +
+              [f"Bench App {i:<10} Bench.App{i:<16} 1.{i}" for i in range(int(os.environ.get("BENCH_CONTAINERS", "50")))])
+    elif args[:1] == ["install"]:
+        _emit([f"Found {args[-1]} [{args[-1]}] Version 1.0", f"Downloading https://example.invalid/{args[-1]}.exe"])
+        # Like winget, redraw the bar in place: carriage returns only, no newlines
+        _emit((f"\r  {'█' * (p // 4):<25}  {mb:.1f} MB /  200 MB" for p, mb in _progress_steps(200)), end="")
+        _emit([""])
+        _emit(["Successfully verified installer hash", "Starting package install...", "Successfully installed"])
+    return 0
+
+def fake_npm(args):
+    if args[:1] == ["ls"]:
+        _emit([json.dumps({"dependencies": {"npm": {"version": "10.8.2"}, "corepack": {"version": "0.29.3"}}})])
+    elif args[:1] == ["install"]:
+        _emit(f"npm http fetch GET 200 https://registry.npmjs.org/dep-{i} 12ms (cache miss)" for i in range(_volume()))
+        _emit(["", "added 1432 packages in 2m"])
+    return 0
+
+def fake_curl(args):
+    if "-o" in args:
+        with open(args[args.index("-o") + 1], "wb") as f:
+            f.write(b"\0" * 1024 * 1024)
+    return 0
+
+FAKE_TOOLS = {"ollama": fake_ollama, "docker": fake_docker, "pip": fake_pip, "uv": fake_uv,
+              "winget": fake_winget, "npm": fake_npm, "curl": fake_curl}
+
+def run_shim(tool, args):
+    """Entry point of a fake tool; every invocation is logged for the call counts"""
+    calls_log = os.environ.get("BENCH_CALLS_LOG")
+    if calls_log:
+        with open(calls_log, "a", encoding="utf-8") as f:
+            f.write(json.dumps([tool] + args) + "\n")
+    return FAKE_TOOLS[tool](args)
+
+def install_shims(shim_dir):
+    """Write a launcher per fake tool into shim_dir"""
+    for tool in SHIM_TOOLS:
+        if os.name == "nt":
+            with open(os.path.join(shim_dir, f"{tool}.cmd"), "w", encoding="utf-8") as f:
+                f.write(f'@"{sys.executable}" "{os.path.abspath(__file__)}" --shim {tool} %*\n')
+        else:
+            path = os.path.join(shim_dir, tool)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" --shim {tool} "$@"\n')
+            os.chmod(path, 0o755)
+
+# --------------------------------------------------------------------------
+# Scenarios: run inside a fresh interpreter by `benchmark.py --scenario NAME`
+
+class SubprocessCounter:
+    """Count every process the installer starts (subprocess.run goes through Popen too)"""
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        counter = self
+
+        class CountingPopen(subprocess.Popen):
+            def __init__(self, *args, **kwargs):
+                with counter._lock:
+                    counter.count += 1
+                super().__init__(*args, **kwargs)
+
+        subprocess.Popen = CountingPopen
+
+def peak_rss_kb():
+    """Peak resident memory of this process in KB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def _log_volume(log_path):
+    """Return (lines, bytes) a progress helper read, from its full on-disk log"""
+    if not log_path or not os.path.exists(log_path):
+        return 0, 0
+    with open(log_path, "rb") as f:
+        data = f.read()
+    return data.count(b"\n"), len(data)
+
+def _parse_scenario(helper, command):
+    def scenario(ti):
+        start = time.perf_counter()
+        success, _, log_path = helper(command)
+        elapsed = time.perf_counter() - start
+        lines, size = _log_volume(log_path)
+        return {"success": success, "lines": lines, "bytes": size,
+                "lines_per_sec": round(lines / elapsed) if elapsed else None,
+                "mb_per_sec": round(size / elapsed / 1e6, 2) if elapsed else None}
+    return scenario
+
+def scenario_detect(ti):
+    tools = ti.load_manifest()
+    inventory = ti.Inventory(p for p in (ti.resolve_package_name(t['name']) for t in tools
+                                         if t['type'] in ti.PYTHON_PACKAGE_TYPES) if p)
+    inventory.refresh()
+    installed = sum(1 for t in tools if ti.check_installed(t['name'], t['type'], inventory))
+    return {"tools": len(tools), "installed": installed}
+
+def scenario_install(ti):
+    inventory = ti.get_inventory()
+    steps = {}
+    for name, tool_type in (("llama3.3", "LLM"), ("UI - Open WebUI", "Framework"),
+                            ("AnythingLLM", "Framework"), ("n8n", "Framework"), ("tiktoken", "חבילת פייתון")):
+        start = time.perf_counter()
+        success = ti.install_tool(name, tool_type, inventory)
+        steps[name] = {"success": success, "seconds": round(time.perf_counter() - start, 3)}
+    return {"steps": steps}
+
+class _FakeService(http.server.BaseHTTPRequestHandler):
+    started = time.time()
+
+    def do_GET(self):
+        starting = time.time() - self.started < float(os.environ.get("BENCH_READY_DELAY", "1"))
+        self.send_response(503 if starting else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def start_fake_services():
+    """Serve the containers' health endpoints for the rest of this process"""
+    _FakeService.started = time.time()
+    for port in SERVICE_PORTS:
+        try:
+            server = http.server.ThreadingHTTPServer(("127.0.0.1", port), _FakeService)
+        except OSError:
+            continue  # Something real already answers there
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def _expires_at(keep_alive):
+    """An /api/ps expiry keep_alive seconds from now, with Ollama's nanoseconds"""
+    if keep_alive < 0:
+        return "2318-02-23T19:22:54.123456789Z"  # How Ollama shows "never"
+    return time.strftime("%Y-%m-%dT%H:%M:%S.123456789Z", time.gmtime(time.time() + keep_alive))
+
+class _FakeOllama(http.server.BaseHTTPRequestHandler):
+    """Ollama API of a CPU-only server: a completion takes BENCH_GENERATE_SECONDS
+    and at most OLLAMA_NUM_PARALLEL of them run at once. Completions and
+    embeddings load their model for keep_alive seconds (default 300)"""
+    slots = threading.BoundedSemaphore(1)
+    pulls = 0
+    models = {"llama3.2:3b": 2_000_000_000, "qwen2.5:7b": 4_700_000_000, "nomic-embed-text:latest": 274_000_000}
+    loaded = {}  # name -> expires_at
+    requests = []
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._reply({"version": "0.6.2"})
+        elif self.path == "/api/tags":
+            self._reply({"models": [{"name": n, "size": s} for n, s in self.models.items()]})
+        elif self.path == "/api/ps":
+            self._reply({"models": [{"name": n, "expires_at": e} for n, e in self.loaded.items()]})
+        else:
+            self._reply({"models": []})
+
+    def _stream_pull(self, model):
+        """Stream /api/pull: bench-stall goes silent, bench-verify is silent while
+        it verifies, bench-pause is silent mid-download; all for BENCH_PAUSE_SECONDS"""
+        _FakeOllama.pulls += 1
+        pause = float(os.environ.get("BENCH_PAUSE_SECONDS", "2"))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        def send(status, completed=None):
+            event = {"status": status}
+            if completed is not None:
+                event.update(digest="sha256:6a07", total=1000, completed=completed)
+            self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            send("pulling manifest")
+            send("pulling 6a07", 100)
+            if model == "bench-stall":
+                time.sleep(30)
+                return
+            if model == "bench-pause":
+                time.sleep(pause)
+            send("pulling 6a07", 1000)
+            send("verifying sha256 digest")
+            if model == "bench-verify":
+                time.sleep(pause)
+            send("writing manifest")
+            send("success")
+        except OSError:
+            pass  # The client cut the stream off
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path == "/api/pull":
+            return self._stream_pull(request.get("model"))
+        _FakeOllama.requests.append(dict(request, path=self.path))
+        model, keep_alive = request.get("model"), request.get("keep_alive", 300)
+        load_ns = 0 if model in self.loaded else int(1.5e9)
+        if keep_alive == 0:
+            self.loaded.pop(model, None)
+        else:
+            self.loaded[model] = _expires_at(keep_alive)
+        if self.path == "/api/embed":
+            inputs = request.get("input", [])
+            return self._reply({"embeddings": [[0.1] * 8 for _ in inputs], "prompt_eval_count": 12 * len(inputs),
+                                "load_duration": load_ns, "total_duration": load_ns + int(0.05e9)})
+        tokens = request.get("options", {}).get("num_predict", 32)
+        seconds = float(os.environ.get("BENCH_GENERATE_SECONDS", "0.2"))
+        with self.slots:
+            time.sleep(seconds)
+        self._reply({"response": "ok", "eval_count": tokens, "eval_duration": int(seconds * 1e9),
+                     "prompt_eval_count": 14, "prompt_eval_duration": int(0.02e9), "load_duration": load_ns})
+
+    def log_message(self, *args):
+        pass
+
+def _run_main(ti, answers):
+    stdin = sys.stdin
+    sys.stdin = io.StringIO(answers)
+    try:
+        ti.main([])
+    finally:
+        sys.stdin = stdin
+
+def scenario_main(ti):
+    start_fake_services()
+    _run_main(ti, "all\n")
+    return {}
+
+def scenario_main_rerun(ti):
+    """Second run of an unchanged machine: manifest and detection come from the caches"""
+    _run_main(ti, "n\n" * 200)
+    start = time.perf_counter()
+    _run_main(ti, "n\n" * 200)
+    return {"rerun_seconds": round(time.perf_counter() - start, 3)}
+
+def scenario_tune_ollama(ti):
+    """Derive and apply the runtime settings against a stand-in Ollama server,
+    as if on a BENCH_CORES-core machine"""
+    ti.physical_cores = lambda: int(os.environ.get("BENCH_CORES", "16"))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OLLAMA_HOST"] = f"127.0.0.1:{server.server_port}"
+
+    def apply(settings):
+        _FakeOllama.slots = threading.BoundedSemaphore(int(settings["OLLAMA_NUM_PARALLEL"]))
+        return True
+
+    report = ti.tune_ollama({"llama3.2", "qwen2.5", "nomic-embed-text"}, 16e9, apply=apply)
+    return {"settings": report["settings"], "before_tokens_per_sec": report["before"]["tokens_per_sec"],
+            "after_tokens_per_sec": report["after"]["tokens_per_sec"]}
+
+def scenario_parse_winget_cr(ti):
+    """Check that a bar redrawn with bare carriage returns reaches the parser as it is drawn"""
+    if float(os.environ.get("BENCH_DELAY", "0")) <= 0:
+        os.environ["BENCH_DELAY"] = "0.005"  # Output all at once cannot show whether it is read live
+    os.environ["BENCH_LINES"] = str(min(_volume(), 200))
+    seen = []
+    feed = ti.WingetProgressParser.feed
+
+    def timed_feed(self, line):
+        if "MB /" in line:
+            seen.append(time.perf_counter())
+        return feed(self, line)
+
+    ti.WingetProgressParser.feed = timed_feed
+    result = _parse_scenario(ti.run_winget_with_progress, "winget install Bench.CarriageReturns")(ti)
+    expected = float(os.environ["BENCH_DELAY"]) * (_volume() - 1)
+    spread = seen[-1] - seen[0] if seen else 0.0
+    result.update({"bar_updates": len(seen), "bar_spread_seconds": round(spread, 3),
+                   "expected_spread_seconds": round(expected, 3)})
+    return result
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"  # A zombie has been killed
+    except OSError:
+        return True
+
+def _all_gone(pids, wait=2.0):
+    """Whether the processes have exited (a killed process takes a moment to go)"""
+    until = time.monotonic() + wait
+    while any(_alive(pid) for pid in pids):
+        if time.monotonic() >= until:
+            return False
+        time.sleep(0.05)
+    return True
+
+def scenario_stall(ti):
+    """Check the download supervision against stalling fake commands and a stub
+    Ollama API: stall and rate detection, retry counts, killing the whole
+    process tree, the deadline and --stall-window 0"""
+    ti.RETRY_BACKOFF = 0.2
+    ti.STALL_CHECK_INTERVAL = 0.1
+    pid_file = os.path.join(os.environ["TOOLINSTALLER_HOME"], "bench-pids")
+    os.environ["BENCH_PID_FILE"] = pid_file
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ti.OllamaClient(f"http://127.0.0.1:{server.server_port}")
+    checks, timings = {}, {}
+
+    def read_pids():
+        """Processes the fake pulls ran as, one per attempt"""
+        if not os.path.exists(pid_file):
+            return []
+        with open(pid_file, encoding="utf-8") as f:
+            return [int(line) for line in f if line.strip()]
+
+    def case(name, run, window=1, retries=2, deadline=None):
+        """Run one supervised pull; returns (success, attempts, retry reasons, new pids)"""
+        ti._deadline = None
+        ti.use_supervision(stall_window=window, retries=retries, deadline=deadline)
+        ti._task_context.retries = []
+        known, pulls = len(read_pids()), _FakeOllama.pulls
+        start = time.perf_counter()
+        success = run()
+        timings[name] = round(time.perf_counter() - start, 2)
+        pids = read_pids()[known:]
+        return success, len(pids) + _FakeOllama.pulls - pulls, ti._task_context.retries, pids
+
+    def command(model):
+        return lambda: ti.run_ollama_with_progress(f"ollama pull {model}")[0]
+
+    def api(model):
+        return lambda: ti.run_ollama_pull_with_progress(model, client)[0]
+
+    success, attempts, retries, pids = case("silent command", command("bench-stall"))
+    checks["silent command is retried, then given up"] = not success and attempts == 3 and len(retries) == 2
+    checks["silence is the reason"] = all("no progress" in r for r in retries)
+    checks["stalled commands are killed with their children"] = len(pids) == 3 and _all_gone(pids)
+
+    success, attempts, retries, _ = case("slow command", command("bench-slow"), retries=1)
+    checks["slow command is stopped below the rate floor"] = not success and attempts == 2 and "below" in retries[0]
+
+    ti.RETRY_BACKOFF = 5
+    success, attempts, retries, _ = case("deadline during backoff", command("bench-stall"), retries=3, deadline=2)
+    ti.RETRY_BACKOFF = 0.2
+    checks["no retry that would end past the deadline"] = not success and attempts == 1 and not retries
+
+    success, attempts, _, _ = case("deadline passed", command("bench-pause"), deadline=0)
+    checks["nothing starts past the deadline"] = not success and attempts == 0
+
+    success, attempts, retries, _ = case("stall window 0, command", command("bench-pause"), window=0)
+    checks["--stall-window 0 lets a command pause"] = success and attempts == 1 and not retries
+
+    success, attempts, retries, _ = case("silent API stream", api("bench-stall"))
+    checks["silent API stream is cut off and retried"] = not success and attempts == 3 and len(retries) == 2
+
+    success, attempts, retries, _ = case("API verifying", api("bench-verify"))
+    checks["API pull may be silent while it verifies"] = success and attempts == 1 and not retries
+
+    success, attempts, retries, _ = case("stall window 0, API", api("bench-pause"), window=0)
+    checks["--stall-window 0 lets an API stream pause"] = success and attempts == 1 and not retries
+
+    ti._deadline = None
+    failed = [name for name, passed in checks.items() if not passed]
+    if failed:
+        raise AssertionError("stall checks failed: " + "; ".join(failed))
+    return {"checks_passed": len(checks), "case_seconds": timings}
+
+class _FakeDocker(http.server.BaseHTTPRequestHandler):
+    """Docker Engine API of a daemon with no images: pulls stream the progress of
+    two layers (bench/missing fails mid-stream) and containers are kept in memory"""
+    layers = {"a1f0": 30_000_000, "b2e1": 2_000_000}
+    created = {}
+    started = []
+    paths = []
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)  # A 204 is not read, and the client may be gone
+
+    def do_GET(self):
+        _FakeDocker.paths.append(self.path)
+        path = urllib.parse.urlparse(self.path).path
+        if path.endswith("/_ping"):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            try:
+                self.wfile.write(b"OK")
+            except OSError:
+                pass  # is_running() hangs up without reading the answer
+        elif path.endswith("/version"):
+            self._reply(200, {"Version": "27.1.1", "ApiVersion": "1.46"})
+        elif path.endswith("/containers/json"):
+            self._reply(200, [{"Names": [f"/{name}"], "Image": spec["Image"], "State": "running"}
+                              for name, spec in self.created.items()])
+        elif path.endswith("/images/json"):
+            self._reply(200, [])
+        else:
+            self._reply(404, {"message": "page not found"})
+
+    def _stream_pull(self, image):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        events = [{"status": "Pulling fs layer", "id": layer} for layer in self.layers]
+        for layer, size in self.layers.items():
+            events += [{"status": "Downloading", "id": layer, "progressDetail": {"current": size * part // 4, "total": size}}
+                       for part in range(1, 5)]
+            events.append({"status": "Download complete", "id": layer})
+            if image == "bench/missing":
+                events.append({"errorDetail": {"message": "manifest unknown"}, "error": "manifest unknown"})
+                break
+            events += [{"status": "Extracting", "id": layer}, {"status": "Pull complete", "id": layer}]
+        events.append({"status": f"Status: Downloaded newer image for {image}"})
+        for event in events:
+            self.wfile.write((json.dumps(event) + "\r\n").encode("utf-8"))
+
+    def do_POST(self):
+        _FakeDocker.paths.append(self.path)
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length)) if length else None
+        started = re.search(r"/containers/([^/]+)/start$", url.path)
+        if url.path.endswith("/images/create"):
+            self._stream_pull(query["fromImage"])
+        elif url.path.endswith("/containers/create"):
+            name = query["name"]
+            if name in self.created:
+                return self._reply(409, {"message": f'Conflict. The container name "/{name}" is already in use'})
+            self.created[name] = payload
+            self._reply(201, {"Id": f"{len(self.created):064x}", "Warnings": []})
+        elif started:
+            name = urllib.parse.unquote(started.group(1))
+            if name not in self.created:
+                return self._reply(404, {"message": f"No such container: {name}"})
+            self.started.append(name)
+            self._reply(204)
+        else:
+            self._reply(404, {"message": "page not found"})
+
+    def log_message(self, *args):
+        pass
+
+if hasattr(socket, "AF_UNIX"):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+def scenario_docker_api(ti):
+    """Check the Engine API client against a stub daemon on a Unix socket (TCP
+    where there are none): ping, version, streamed and failing pulls, and
+    creating and starting a container through install_container"""
+    ti.RETRY_BACKOFF = 0.2
+    ti.use_supervision(retries=1)
+    ti.use_ready_timeout(0)
+    if hasattr(socket, "AF_UNIX"):
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-docker-"), "docker.sock")  # Short: paths are capped
+        server, host = _UnixHTTPServer(path, _FakeDocker), f"unix://{path}"
+    else:
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FakeDocker)
+        host = f"tcp://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ti.DockerClient(host)
+    checks = {}
+
+    checks["the daemon answers /_ping"] = client.is_running()
+    checks["the version is read"] = client.version() == "27.1.1"
+
+    success, progress = ti.run_docker_pull_with_progress("ghcr.io/open-webui/open-webui:main", client)
+    total = sum(_FakeDocker.layers.values())
+    checks["a pull counts the bytes of every layer"] = success and progress.total == progress.completed == total
+
+    success, _ = ti.run_docker_pull_with_progress("bench/missing", client)
+    checks["an error in the pull stream fails the pull"] = not success
+
+    spec = ti.CONTAINERS["open webui"]
+    success, _, _ = ti.install_container(spec, client=client)
+    created = _FakeDocker.created.get(spec["name"], {})
+    checks["install_container creates and starts the container"] = success and _FakeDocker.started == [spec["name"]]
+    checks["image, ports, volumes and restart policy are sent"] = (
+        created.get("Image") == spec["image"]
+        and created.get("HostConfig", {}).get("PortBindings") == {"8080/tcp": [{"HostPort": "3000"}]}
+        and created["HostConfig"].get("Binds") == spec["volumes"]
+        and created["HostConfig"].get("RestartPolicy") == {"Name": "always"})
+    checks["the new container is listed"] = [c["Names"] for c in client.containers()] == [[f"/{spec['name']}"]]
+
+    success, output, _ = ti.install_container(spec, client=client)
+    checks["a name conflict is reported, not raised"] = not success and "already in use" in output
+    checks["every request carries the API version"] = all(p.startswith(f"/{ti.DOCKER_API_VERSION}/")
+                                                          for p in _FakeDocker.paths)
+
+    failed = [name for name, passed in checks.items() if not passed]
+    if failed:
+        raise AssertionError("Docker API checks failed: " + "; ".join(failed))
+    return {"checks_passed": len(checks)}
+
+class _FakeRegistry(http.server.BaseHTTPRequestHandler):
+    """v2 registry with an Ollama model, a multi-platform image index and an
+    image behind an anonymous bearer token, like Docker Hub"""
+    token = "bench-token"
+    protected = ("langflowai/langflow",)
+    manifests = {
+        ("library/llama3.2", "3b"): {"config": {"size": 561}, "layers": [{"size": 2_019_377_376}, {"size": 7_711}]},
+        ("library/phi4", "latest"): {"config": {"size": 487}, "layers": [{"size": 9_053_114_464}]},
+        ("open-webui/open-webui", "main"): {"manifests": [
+            {"digest": "sha256:arm64", "platform": {"os": "linux", "architecture": "arm64"}},
+            {"digest": "sha256:amd64", "platform": {"os": "linux", "architecture": "amd64"}}]},
+        ("open-webui/open-webui", "sha256:arm64"): {"config": {"size": 1}, "layers": [{"size": 1}]},
+        ("open-webui/open-webui", "sha256:amd64"): {"config": {"size": 14_336},
+                                                    "layers": [{"size": 29_126_484}, {"size": 1_633_210_000}]},
+        ("langflowai/langflow", "latest"): {"config": {"size": 9_216}, "layers": [{"size": 754_000_000}]},
+    }
+    tokens_issued = 0
+
+    def _reply(self, status, payload, headers=()):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path == "/token":
+            _FakeRegistry.tokens_issued += 1
+            return self._reply(200, {"token": self.token})
+        match = re.match(r"/v2/(.+)/manifests/([^/]+)$", url.path)
+        key = (match.group(1), match.group(2)) if match else None
+        if key and key[0] in self.protected and self.headers.get("Authorization") != f"Bearer {self.token}":
+            realm = f"http://127.0.0.1:{self.server.server_port}/token"
+            challenge = f'Bearer realm="{realm}",service="registry.bench",scope="repository:{key[0]}:pull"'
+            return self._reply(401, {"errors": [{"code": "UNAUTHORIZED"}]}, [("WWW-Authenticate", challenge)])
+        if key not in self.manifests:
+            return self._reply(404, {"errors": [{"code": "MANIFEST_UNKNOWN"}]})
+        self._reply(200, self.manifests[key])
+
+    def log_message(self, *args):
+        pass
+
+def scenario_registry(ti):
+    """Check download sizes from manifests served by a stub registry: Ollama
+    models, the linux/amd64 image of an index, a token-protected image, and
+    the download plan, where a missing manifest leaves the size unknown"""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FakeRegistry)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ti.REGISTRY_OVERRIDE = f"http://127.0.0.1:{server.server_port}"
+    manifests = _FakeRegistry.manifests
+    expected = {name: ti.manifest_size(manifests[key]) for name, key in (
+        ("llama3.2:3b", ("library/llama3.2", "3b")), ("phi4", ("library/phi4", "latest")),
+        ("open webui", ("open-webui/open-webui", "sha256:amd64")), ("langflow", ("langflowai/langflow", "latest")))}
+    checks = {}
+
+    checks["a tagged model is sized from its manifest"] = ti.ollama_model_size("llama3.2:3b") == expected["llama3.2:3b"]
+    checks["an untagged model is sized as latest"] = ti.ollama_model_size("phi4") == expected["phi4"]
+    checks["an image index is sized for linux/amd64"] = (
+        ti.docker_image_size("ghcr.io/open-webui/open-webui:main") == expected["open webui"])
+    checks["a protected image is sized with an anonymous token"] = (
+        ti.docker_image_size("langflowai/langflow:latest") == expected["langflow"] and _FakeRegistry.tokens_issued == 1)
+
+    tools = [{'name': "meta-llama/Llama-3.2-3B-Instruct", 'type': "LLM"}, {'name': "phi4", 'type': "LLM"},
+             {'name': "bench-missing", 'type': "LLM"}, {'name': "Open WebUI", 'type': "Framework"},
+             {'name': "Langflow", 'type': "Framework"}]
+    plan = ti.DownloadPlan(tools).estimate()
+    sizes = plan.sizes()
+    checks["the plan sizes every download it can look up"] = sizes == {
+        "meta-llama/Llama-3.2-3B-Instruct": expected["llama3.2:3b"], "phi4": expected["phi4"], "bench-missing": 0,
+        "Open WebUI": expected["open webui"], "Langflow": expected["langflow"]}
+    checks["a missing manifest is recorded as an error"] = "404" in plan.entry("bench-missing").get("error", "")
+    plan.print_plan(3)
+
+    failed = [name for name, passed in checks.items() if not passed]
+    if failed:
+        raise AssertionError("registry checks failed: " + "; ".join(failed))
+    return {"checks_passed": len(checks), "planned_bytes": sum(sizes.values())}
+
+def scenario_warm_up(ti):
+    """Check the model warm-up against the stub Ollama API: models kept with
+    --keep-loaded stay, models it loaded are unloaded, models loaded before
+    keep their expiry, and the report and task context are right"""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FakeOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ti.OllamaClient(f"http://127.0.0.1:{server.server_port}")
+    _FakeOllama.loaded.update({"qwen2.5:7b": _expires_at(120), "phi4:latest": _expires_at(-1)})
+    report_dir = os.path.join(os.environ["TOOLINSTALLER_HOME"], "reports")
+    ti._task_context.phase, ti._task_context.tool = "install", "bench"
+
+    models = ["llama3.2:3b", "qwen2.5:7b", "phi4:latest", "nomic-embed-text:latest"]
+    results = ti.run_model_warm_up(models, keep_loaded=("llama3.2",), client=client, report_dir=report_dir)
+    keep_alive = {r["model"]: r.get("keep_alive") for r in _FakeOllama.requests}
+    checks = {}
+
+    checks["every model is measured"] = (sorted(results) == sorted(models)
+                                         and not any("error" in r for r in results.values()))
+    checks["a --keep-loaded model stays loaded"] = keep_alive["llama3.2:3b"] == -1
+    checks["a model the warm-up loaded is unloaded"] = (keep_alive["nomic-embed-text:latest"] == 0
+                                                       and "nomic-embed-text:latest" not in _FakeOllama.loaded)
+    checks["a model loaded before keeps its expiry"] = (100 <= (keep_alive["qwen2.5:7b"] or 0) <= 120
+                                                       and "qwen2.5:7b" in _FakeOllama.loaded)
+    checks["a model loaded for good stays loaded"] = keep_alive["phi4:latest"] == -1
+    checks["residency before the warm-up is reported"] = [m for m in models if results[m]["resident_before"]] == [
+        "qwen2.5:7b", "phi4:latest"]
+    checks["embeddings are measured as embeddings"] = (_FakeOllama.requests[-1]["path"] == "/api/embed"
+                                                       and results["nomic-embed-text:latest"]["embeddings_per_sec"])
+    checks["load times come from load_duration"] = (results["llama3.2:3b"]["load_seconds"] == 1.5
+                                                    and results["qwen2.5:7b"]["load_seconds"] == 0)
+    checks["the caller's task context is restored"] = (ti._task_context.phase, ti._task_context.tool) == ("install", "bench")
+    report = {}
+    for name in os.listdir(report_dir) if os.path.isdir(report_dir) else []:
+        with open(os.path.join(report_dir, name), encoding="utf-8") as f:
+            report = json.load(f)
+    checks["the report has the machine and every model"] = (
+        "machine" in report and sorted(report.get("models", {})) == sorted(models))
+
+    failed = [name for name, passed in checks.items() if not passed]
+    if failed:
+        raise AssertionError("warm-up checks failed: " + "; ".join(failed))
+    return {"checks_passed": len(checks)}
+
+SCENARIO_FUNCTIONS = {
+    "detect": scenario_detect,
+    "install": scenario_install,
+    "parse-pip": lambda ti: _parse_scenario(ti.run_pip_with_progress, "pip install torch transformers")(ti),
+    "parse-uv": lambda ti: _parse_scenario(ti.run_pip_with_progress, 'uv pip install --python python torch transformers')(ti),
+    "parse-docker": lambda ti: _parse_scenario(ti.run_docker_with_progress, "docker run -d --name bench ghcr.io/open-webui/open-webui:main")(ti),
+    "parse-ollama": lambda ti: _parse_scenario(ti.run_ollama_with_progress, "ollama pull llama3.3")(ti),
+    "parse-winget": lambda ti: _parse_scenario(ti.run_winget_with_progress, "winget install Mintplex-Labs.AnythingLLM")(ti),
+    "main": scenario_main,
+    "main-rerun": scenario_main_rerun,
+    "tune-ollama": scenario_tune_ollama,
+    "parse-winget-cr": scenario_parse_winget_cr,
+    "stall": scenario_stall,
+    "docker-api": scenario_docker_api,
+    "registry": scenario_registry,
+    "warm-up": scenario_warm_up,
+}
+
+def run_scenario(name, result_file):
+    """Run one scenario in this process and write its measurements to result_file"""
+    counter = SubprocessCounter()
+    sys.path.insert(0, HERE)
+    os.chdir(HERE)  # The checklist is read from the working directory
+    import toolinstaller
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    details = SCENARIO_FUNCTIONS[name](toolinstaller)
+    wall = time.perf_counter() - start
+    result = {
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(time.process_time() - cpu_start, 3),
+        "subprocesses": counter.count,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+    result.update(details)
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+# --------------------------------------------------------------------------
+# Driver
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def run_benchmarks(scenarios, config, console):
+    """Run each scenario in its own interpreter behind the fake tools"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="toolinstaller-bench-") as work_dir:
+        shim_dir = os.path.join(work_dir, "bin")
+        os.makedirs(shim_dir)
+        install_shims(shim_dir)
+
+        for name in scenarios:
+            scenario_dir = os.path.join(work_dir, name)
+            os.makedirs(scenario_dir)
+            calls_log = os.path.join(scenario_dir, "calls.jsonl")
+            result_file = os.path.join(scenario_dir, "result.json")
+            env = dict(os.environ,
+                       PATH=shim_dir + os.pathsep + os.environ.get("PATH", ""),
+                       TOOLINSTALLER_HOME=os.path.join(scenario_dir, "home"),
+                       TOOLINSTALLER_CACHE=os.path.join(scenario_dir, "artifacts"),
+                       OLLAMA_HOST="127.0.0.1:9",  # Nothing listens: use the CLI
+                       TOOLINSTALLER_REGISTRY="http://127.0.0.1:9",  # Sizes unknown, no network
+                       OLLAMA_MODELS=os.path.join(scenario_dir, "models"),
+                       BENCH_CALLS_LOG=calls_log,
+                       BENCH_LINES=str(config["lines"]),
+                       BENCH_DELAY=str(config["line_delay"]),
+                       BENCH_MODELS=str(config["models"]),
+                       BENCH_CONTAINERS=str(config["containers"]),
+                       PYTHONIOENCODING="utf-8")
+
+            print(f"⏱️  {name}...", end=" ", flush=True)
+            console.write(f"\n===== {name} =====\n")
+            console.flush()
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), "--scenario", name,
+                                      "--result-file", result_file],
+                                     env=env, stdin=subprocess.DEVNULL, stdout=console, stderr=subprocess.STDOUT)
+            if process.returncode != 0 or not os.path.exists(result_file):
+                print("❌ failed (see the console log)")
+                results[name] = {"error": f"exit code {process.returncode}"}
+                continue
+
+            with open(result_file, encoding="utf-8") as f:
+                result = json.load(f)
+            calls = {}
+            if os.path.exists(calls_log):
+                with open(calls_log, encoding="utf-8") as f:
+                    for line in f:
+                        tool = json.loads(line)[0]
+                        calls[tool] = calls.get(tool, 0) + 1
+            result["tool_calls"] = calls
+            results[name] = result
+            print(f"{result['wall_seconds']:.2f}s")
+    return results
+
+def print_results(results, baseline=None):
+    """Print a summary table, with the change against a baseline run if given"""
+    print(f"\n{'scenario':<16} {'wall s':>8} {'cpu s':>7} {'procs':>6} {'peak RSS':>10}  parse rate")
+    print("-" * 66)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<16} {result['error']}")
+            continue
+        rss = f"{result['peak_rss_kb'] / 1024:.1f} MB" if result.get("peak_rss_kb") else "n/a"
+        rate = f"{result['lines_per_sec']:,} lines/s" if result.get("lines_per_sec") else ""
+        line = f"{name:<16} {result['wall_seconds']:>8.2f} {result['cpu_seconds']:>7.2f} {result['subprocesses']:>6} {rss:>10}  {rate}"
+        before = (baseline or {}).get(name, {})
+        if before.get("wall_seconds"):
+            line += f"  ({(result['wall_seconds'] / before['wall_seconds'] - 1) * 100:+.0f}% wall)"
+        print(line)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark toolinstaller.py against fake external tools")
+    parser.add_argument("scenarios", nargs="*", metavar="SCENARIO",
+                        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--lines", type=int, default=20000,
+                        help="progress lines each fake download or install prints (default: %(default)s)")
+    parser.add_argument("--line-delay", type=float, default=0.0,
+                        help="seconds the fake tools wait after each line (default: %(default)s)")
+    parser.add_argument("--models", type=int, default=50,
+                        help="extra models the fake ollama lists (default: %(default)s)")
+    parser.add_argument("--containers", type=int, default=50,
+                        help="extra containers, images and winget packages the fakes list (default: %(default)s)")
+    parser.add_argument("--output", default="bench_results.json",
+                        help="where to write the JSON results (default: %(default)s)")
+    parser.add_argument("--console", default="bench_output.txt",
+                        help="where to write the installer's own output (default: %(default)s)")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="earlier results file to compare against")
+    parser.add_argument("--shim", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    return parser.parse_known_args(argv)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--shim"]:
+        return run_shim(argv[1], argv[2:])
+
+    args, extra = parse_args(argv)
+    unknown = extra + [s for s in args.scenarios if s not in SCENARIOS]
+    if unknown:
+        print(f"❌ Unknown arguments: {' '.join(unknown)}")
+        return 2
+    if args.scenario:
+        run_scenario(args.scenario, args.result_file)
+        return 0
+
+    config = {"lines": args.lines, "line_delay": args.line_delay,
+              "models": args.models, "containers": args.containers}
+    print("🚀 toolinstaller benchmark")
+    print("=" * 50)
+    with open(args.console, "w", encoding="utf-8") as console:
+        results = run_benchmarks(args.scenarios or SCENARIOS, config, console)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("results")
+    print_results(results, baseline)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,82 +1,433 @@
 import subprocess
+import argparse
+import codecs
+import collections
+import contextlib
+import datetime
+import functools
+import hashlib
+import heapq
+import http.client
+import io
+import itertools
+import json
 import os
+import platform
 import sys
 import re
+import shutil
+import signal
+import socket
 import threading
 import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+# Per-user state shared between runs (detection cache, downloads, logs)
+STATE_DIR = os.environ.get("TOOLINSTALLER_HOME") or os.path.join(os.path.expanduser("~"), ".toolinstaller")
+
+# How often the dashboard redraws in a terminal, and how often it logs its
+# tasks' state when the output is not a terminal (CI, captured logs)
+DASHBOARD_REFRESH_RATE = 10
+DASHBOARD_LOG_INTERVAL = 10.0
+
+class _DashboardOutput:
+    """Stands in for sys.stdout while the dashboard is drawn, printing above it"""
+    def __init__(self, dashboard, stream):
+        self.dashboard = dashboard
+        self.stream = stream
+
+    def write(self, text):
+        self.dashboard.write_above(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+class Dashboard:
+    """One status line per running task, drawn by a single render loop.
+
+    Tasks only change the state of their line, from any thread, which
+    costs next to nothing; the loop renders every line at most
+    DASHBOARD_REFRESH_RATE times a second however often they change. In a
+    terminal the lines stay at the bottom and other output is printed
+    above them. Otherwise every line that changed is logged as plain text
+    each DASHBOARD_LOG_INTERVAL seconds, with no control sequences.
+    """
+    def __init__(self):
+        self.lines = []  # Views with a render(width) method, in the order they started
+        self.stream = None
+        self.interactive = False
+        self._lock = threading.RLock()
+        self._thread = None
+        self._drawn = 0  # Lines on screen under the other output
+        self._shown = None  # Texts last drawn or logged
+        self._partial = ""  # Other output not yet ended by a newline
+
+    def add(self, view):
+        with self._lock:
+            if view in self.lines:
+                return
+            self.lines.append(view)
+            if self._thread is None:
+                self.stream = sys.stdout
+                self.interactive = hasattr(self.stream, "isatty") and self.stream.isatty()
+                if self.interactive:
+                    sys.stdout = _DashboardOutput(self, self.stream)
+                self._shown = {} if not self.interactive else None
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def remove(self, view, final_text=None):
+        """Take a line off the dashboard, printing final_text in its place"""
+        with self._lock:
+            if view in self.lines:
+                self.lines.remove(view)
+            if final_text is not None:
+                self._print(final_text + "\n")
+            if not self.lines and self._thread is not None:
+                # The loop ends on its next tick; output goes straight out from now on
+                self._thread = None
+                self._erase()
+                if self._partial:
+                    self.stream.write(self._partial)
+                    self._partial = ""
+                if isinstance(sys.stdout, _DashboardOutput):
+                    sys.stdout = self.stream
+                self.stream.flush()
+
+    def write_above(self, text):
+        """Print other output above the lines (only whole lines, so they can be redrawn)"""
+        with self._lock:
+            text = self._partial + text
+            if "\n" in text:
+                complete, _, self._partial = text.rpartition("\n")
+                self._print(complete + "\n")
+            else:
+                self._partial = text
+
+    def _print(self, text):
+        if self._thread is None:
+            sys.stdout.write(text)
+            return
+        self._erase()
+        self.stream.write(text)
+        self.stream.flush()
+
+    def _erase(self):
+        if self._drawn:
+            self.stream.write(f"\033[{self._drawn}A\r\033[J")
+            self._drawn = 0
+            self._shown = None
+
+    def _run(self):
+        interval = 1.0 / DASHBOARD_REFRESH_RATE if self.interactive else DASHBOARD_LOG_INTERVAL
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if self._thread is not threading.current_thread():
+                    return
+                try:
+                    self._draw() if self.interactive else self._log()
+                except Exception:
+                    pass  # A view that cannot render now is drawn on the next tick
+
+    def _draw(self):
+        width = max(20, shutil.get_terminal_size().columns - 1)
+        texts = [view.render(width)[:width] for view in self.lines]
+        if texts == self._shown:
+            return
+        self._erase()
+        self.stream.write("".join(text + "\n" for text in texts))
+        self.stream.flush()
+        self._drawn, self._shown = len(texts), texts
+
+    def _log(self):
+        for view in self.lines:
+            text = view.render(None)
+            if self._shown.get(id(view)) != text:
+                self._shown[id(view)] = text
+                self.stream.write(f"[{time.strftime('%H:%M:%S')}] {text}\n")
+        self.stream.flush()
+
+DASHBOARD = Dashboard()
 
 class ProgressBar:
-    """Simple progress bar implementation with true single-line animation"""
+    """Progress of one task, shown as its line on the dashboard.
+
+    Given the bytes transferred so far, it also shows the transfer rate and
+    an ETA, both over the last RATE_WINDOW seconds. update() only records
+    the state; the dashboard renders it.
+    """
+    RATE_WINDOW = 10.0
+
     def __init__(self, total=100, length=40, prefix="Progress"):
         self.total = total
         self.length = length
-        self.prefix = prefix
+        tool = getattr(_task_context, "tool", None)
+        # Several tasks may show the same kind of bar at once
+        self.prefix = f"{tool}: {prefix}" if tool and tool not in prefix else prefix
         self.current = 0
-        self.running = False
-        self.first_update = True
-        
-    def update(self, current, message=None):
-        """Update progress bar with current value - true single line animation"""
+        self.message = None
+        self.done = None
+        self._samples = collections.deque()  # (time, current, bytes done)
+        self._first = None  # The first sample with bytes, where the transfer started
+        self._added = False
+
+    def _sample(self, done):
+        now = time.monotonic()
+        if self._first is None:
+            self._first = (now, self.current, done)
+        self._samples.append((now, self.current, done))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.RATE_WINDOW:
+            self._samples.popleft()
+
+    def rate(self):
+        """Bytes per second over the recent window, or None before two samples"""
+        if len(self._samples) < 2 or self._samples[-1][0] <= self._samples[0][0]:
+            return None
+        (start, _, start_bytes), (end, _, end_bytes) = self._samples[0], self._samples[-1]
+        return max(end_bytes - start_bytes, 0) / (end - start)
+
+    def eta(self):
+        """Seconds left at the recent pace, or None while there is no pace yet"""
+        if len(self._samples) < 2:
+            return None
+        (start, start_current, _), (end, end_current, _) = self._samples[0], self._samples[-1]
+        if end_current <= start_current or end <= start:
+            return None
+        return (self.total - self.current) * (end - start) / (end_current - start_current)
+
+    def transferred(self):
+        """Return (bytes, seconds) moved since the first update with bytes"""
+        if self._first is None or not self._samples:
+            return 0, 0.0
+        end, _, end_bytes = self._samples[-1]
+        return max(end_bytes - self._first[2], 0), end - self._first[0]
+
+    def update(self, current, message=None, done=None):
+        """Record the current value, message and bytes transferred so far (if known)"""
         if current is not None:
             self.current = min(current, self.total)
+        self.message = message
+        self.done = done
+        if done is not None:
+            self._sample(done)
+        if not self._added:
+            self._added = True
+            DASHBOARD.add(self)
+
+    def render(self, width=None):
+        """The task's line; plain text without a width, for logs"""
         percent = (self.current / self.total) * 100
-        filled_length = int(self.length * self.current // self.total)
-        bar = '█' * filled_length + '-' * (self.length - filled_length)
-        
-        # Build display string
-        if message:
-            message = message[:30] if len(message) > 30 else message
-            display = f'{self.prefix}: |{bar}| {percent:5.1f}% - {message}'
+        if width is None:
+            display = f'{self.prefix}: {percent:5.1f}%'
         else:
+            length = min(self.length, max(10, width // 4))
+            filled_length = int(length * self.current // self.total)
+            bar = '█' * filled_length + '-' * (length - filled_length)
             display = f'{self.prefix}: |{bar}| {percent:5.1f}%'
-        
-        # Use ANSI escape codes for better compatibility
-        if not self.first_update:
-            # Move cursor to beginning of line and clear it
-            sys.stdout.write('\033[2K\033[1G')
-        else:
-            self.first_update = False
-            
-        sys.stdout.write(display)
-        sys.stdout.flush()
-        
+        rate = self.rate() if self.done is not None else None
+        if rate is not None:
+            display += f' {format_bytes(rate)}/s'
+            eta = self.eta() if self.current < self.total else None
+            if eta is not None:
+                display += f' ETA {format_duration(eta)}'
+        if self.message:
+            message = self.message[:30] if len(self.message) > 30 else self.message
+            display += f' - {message}'
+        return display
+
     def finish(self):
-        """Complete the progress bar"""
-        self.update(self.total)
-        print()  # Add newline when finished
+        """Complete the progress bar, leaving its final line in the output"""
+        self.update(self.total, done=self.done)
+        width = shutil.get_terminal_size().columns - 1 if DASHBOARD.interactive else None
+        DASHBOARD.remove(self, self.render(width))
+
+    def close(self):
+        """Take the bar off the dashboard without completing it, e.g. after a failure"""
+        DASHBOARD.remove(self)
 
 class Spinner:
-    """Simple spinner for indeterminate progress"""
+    """Indeterminate progress of one task, shown as its line on the dashboard"""
     def __init__(self, message="Installing"):
         self.message = message
-        self.running = False
-        self.thread = None
         self.chars = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
-        self.index = 0
-        
-    def _spin(self):
-        """Internal spinning method"""
-        while self.running:
-            print(f'\r{self.message} {self.chars[self.index]}', end='', flush=True)
-            self.index = (self.index + 1) % len(self.chars)
-            time.sleep(0.1)
+        self.started = None
+
+    def render(self, width=None):
+        elapsed = time.monotonic() - self.started
+        if width is None:
+            return f'{self.message}: running for {format_duration(elapsed)}'
+        return f'{self.message} {self.chars[int(elapsed * 10) % len(self.chars)]}'
             
     def start(self):
         """Start the spinner"""
-        self.running = True
-        self.thread = threading.Thread(target=self._spin)
-        self.thread.daemon = True
-        self.thread.start()
+        self.started = time.monotonic()
+        DASHBOARD.add(self)
         
     def stop(self, final_message=None):
         """Stop the spinner"""
-        self.running = False
-        if self.thread:
-            self.thread.join()
-        if final_message:
-            print(f'\r{final_message}' + ' ' * 20)
-        else:
-            print('\r' + ' ' * 50 + '\r', end='')
+        DASHBOARD.remove(self, final_message)
+
+LOG_DIR = os.path.join(STATE_DIR, "logs")
+OUTPUT_TAIL_LINES = 200
+
+# The tool being installed on this thread, used to name its log file
+_task_context = threading.local()
+
+class OutputLog:
+    """Bounded record of a command's output.
+
+    Only the last max_lines lines stay in memory (for error reports); every
+    line is appended to a per-tool log file on disk as it arrives.
+    """
+    def __init__(self, command, max_lines=OUTPUT_TAIL_LINES, log_dir=None):
+        self.tail = collections.deque(maxlen=max_lines)
+        name = getattr(_task_context, "tool", None) or command.split()[0]
+        self.path = os.path.join(log_dir or LOG_DIR, re.sub(r'[^\w.-]+', '_', name).strip('_') + ".log")
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(f"\n=== {time.strftime('%Y-%m-%d %H:%M:%S')} $ {command}\n")
+        except OSError:
+            self._file = None
+            self.path = ""
+
+    def write(self, line):
+        """Record one line of output"""
+        self.tail.append(line)
+        if self._file:
+            self._file.write(line if line.endswith("\n") else line + "\n")
+
+    def text(self):
+        """Return the retained tail as one string"""
+        return ''.join(line if line.endswith("\n") else line + "\n" for line in self.tail)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+def print_output_tail(output, log_path, lines=10):
+    """Show the end of a failed command's output and where the full log is"""
+    for line in output.strip().splitlines()[-lines:]:
+        print(f"   {line}")
+    if log_path:
+        print(f"📄 Full log: {log_path}")
+
+TRACE_DIR = os.path.join(STATE_DIR, "traces")
+
+class StepTimeline:
+    """Timing of every external step of a run: commands, API pulls and downloads.
+
+    Steps are tagged with the tool and phase (detect, install or verify) of
+    the thread that ran them, taken from _task_context.
+    """
+    def __init__(self):
+        self.steps = []
+        self.origin = time.time()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def step(self, command):
+        """Time the enclosed block; the yielded step takes 'exit_code' and 'bytes'"""
+        step = {
+            'command': command,
+            'tool': getattr(_task_context, "tool", None) or "",
+            'phase': getattr(_task_context, "phase", None) or "detect",
+            'thread': threading.current_thread().name,
+            'start': time.time(),
+            'end': None,
+            'exit_code': None,
+            'bytes': None,
+            'retries': 0
+        }
+        outer, _task_context.step = getattr(_task_context, "step", None), step
+        try:
+            yield step
+        finally:
+            _task_context.step = outer
+            step['end'] = time.time()
+            with self._lock:
+                self.steps.append(step)
+
+    def slowest(self, count=10):
+        return sorted(self.steps, key=lambda s: s['end'] - s['start'], reverse=True)[:count]
+
+    def export_chrome_trace(self, path):
+        """Write the steps as a Chrome trace (open in chrome://tracing or Perfetto)"""
+        threads = {}
+        events = []
+        for step in sorted(self.steps, key=lambda s: s['start']):
+            tid = threads.setdefault(step['thread'], len(threads) + 1)
+            events.append({
+                "name": step['command'],
+                "cat": step['phase'],
+                "ph": "X",
+                "ts": int((step['start'] - self.origin) * 1e6),
+                "dur": int((step['end'] - step['start']) * 1e6),
+                "pid": 1,
+                "tid": tid,
+                "args": {k: step[k] for k in ('tool', 'phase', 'exit_code', 'bytes', 'retries')}
+            })
+        events += [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+                   for name, tid in threads.items()]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def print_summary(self, count=10):
+        """Print the time spent per phase and the slowest steps"""
+        phases = {}
+        for step in self.steps:
+            phases[step['phase']] = phases.get(step['phase'], 0) + step['end'] - step['start']
+        print(f"\n⏱️  Slowest steps ({len(self.steps)} in total; "
+              + ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in phases.items()) + ")")
+        print("=" * 50)
+        for step in self.slowest(count):
+            size = format_bytes(step['bytes']) if step['bytes'] else ""
+            status = "" if step['exit_code'] in (0, None) else f"exit {step['exit_code']}"
+            if step['retries']:
+                status += f" {step['retries']} retries"
+            print(f"{step['end'] - step['start']:8.1f}s  {step['phase']:<7} {step['tool'][:20]:<20} "
+                  f"{step['command'][:40]:<40} {size} {status}".rstrip())
+
+    def report(self, trace_path=None):
+        """Print the summary and export the trace at the end of a run"""
+        if not self.steps:
+            return
+        self.print_summary()
+        path = trace_path or os.path.join(TRACE_DIR, time.strftime("%Y%m%d-%H%M%S", time.localtime(self.origin)) + ".json")
+        try:
+            self.export_chrome_trace(path)
+            print(f"📄 Trace: {path}")
+        except OSError as e:
+            print(f"⚠️  Could not write the trace: {e}")
+
+TIMELINE = StepTimeline()
+
+def note_step(**details):
+    """Add details (exit_code, bytes) to the step running on this thread"""
+    step = getattr(_task_context, "step", None)
+    if step is not None:
+        step.update(details)
+
+def timed_step(function):
+    """Record each call of a command helper (command first, success first in the result)"""
+    @functools.wraps(function)
+    def wrapper(command, *args, **kwargs):
+        with TIMELINE.step(command) as step:
+            result = function(command, *args, **kwargs)
+            if step['exit_code'] is None and not result[0]:
+                step['exit_code'] = -1  # Failed before the command ran
+            return result
+    return wrapper
 
 def run_command_with_progress(command, message="Installing", capture_output=True, shell=True):
     """Run a command with progress indication"""
@@ -93,559 +444,3913 @@ def run_command_with_progress(command, message="Installing", capture_output=True
     else:
         return run_command_with_spinner(command, message)
 
-def run_pip_with_progress(command):
-    """Run pip command with progress tracking"""
+# Supervision of long downloads: a transfer that moves less than
+# STALL_MIN_RATE bytes/s, or prints nothing, for STALL_WINDOW seconds is
+# killed and retried up to RETRY_LIMIT times, after RETRY_BACKOFF seconds
+# doubled on every retry. Nothing is started or retried past the deadline.
+STALL_WINDOW = 120
+STALL_MIN_RATE = 10 * 1024
+RETRY_LIMIT = 3
+RETRY_BACKOFF = 10
+STALL_CHECK_INTERVAL = 1.0
+_deadline = None
+
+def use_supervision(stall_window=None, stall_rate=None, retries=None, deadline=None):
+    """Override the stall window (s), throughput floor (bytes/s), retries and run deadline (s from now)"""
+    global STALL_WINDOW, STALL_MIN_RATE, RETRY_LIMIT, _deadline
+    if stall_window is not None:
+        STALL_WINDOW = stall_window
+    if stall_rate is not None:
+        STALL_MIN_RATE = stall_rate
+    if retries is not None:
+        RETRY_LIMIT = retries
+    if deadline is not None:
+        _deadline = time.monotonic() + deadline
+
+def deadline_passed():
+    return _deadline is not None and time.monotonic() >= _deadline
+
+class StallError(RuntimeError):
+    """A transfer was stopped because it stalled or ran past the deadline"""
+
+class StallWatch:
+    """Decide when one attempt at a transfer has stalled.
+
+    record() is called as the transfer makes progress, with the bytes done
+    so far, or None while the tool reports no byte counts (only its output
+    shows it is alive); paused lifts the stall rules while the tool may be
+    silent. check() may be called from another thread; it sets and returns
+    the reason to stop the attempt, or returns None.
+    """
+    def __init__(self, window=None, min_rate=None):
+        self.window = STALL_WINDOW if window is None else window
+        self.min_rate = STALL_MIN_RATE if min_rate is None else min_rate
+        self.last_activity = time.monotonic()
+        self._samples = collections.deque()  # (time, bytes done) while bytes are known
+        self.paused = False
+        self.reason = None
+
+    def record(self, done=None, paused=False):
+        now = time.monotonic()
+        self.last_activity = now
+        self.paused = paused
+        if done is None or paused:
+            self._samples.clear()
+            return
+        self._samples.append((now, done))
+        # Keep one sample older than the window as its starting point
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+
+    def stop(self, reason):
+        self.reason = self.reason or reason
+        return self.reason
+
+    def check(self):
+        now = time.monotonic()
+        if deadline_passed():
+            return self.stop("ran past the deadline")
+        if not self.window or self.paused:
+            return None
+        if now - self.last_activity >= self.window:
+            return self.stop(f"stalled: no progress for {self.window:.0f}s")
+        samples = list(self._samples)
+        if len(samples) >= 2 and now - samples[0][0] >= self.window:
+            rate = (samples[-1][1] - samples[0][1]) / (now - samples[0][0])
+            if rate < self.min_rate:
+                return self.stop(f"stalled: {format_bytes(max(rate, 0))}/s over {self.window:.0f}s, "
+                                 f"below {format_bytes(self.min_rate)}/s")
+        return None
+
+def record_retry(reason):
+    """Note a retry on the running task and the current timeline step"""
+    retries = getattr(_task_context, "retries", None)
+    if retries is not None:
+        retries.append(reason)
+    step = getattr(_task_context, "step", None)
+    if step is not None:
+        step['retries'] += 1
+
+def supervised(label, attempt, resumes=True):
+    """Run attempt(watch) until it ends without stalling, and return its result.
+
+    A stalled attempt is retried after an exponential backoff, at most
+    RETRY_LIMIT times and never past the deadline; resumes says whether
+    the tool picks up where the stalled attempt stopped.
+    """
+    for retry in range(RETRY_LIMIT + 1):
+        watch = StallWatch()
+        result = attempt(watch)
+        if watch.reason is None:
+            return result
+        if deadline_passed():
+            print(f"❌ {label} {watch.reason}")
+            return result
+        if retry == RETRY_LIMIT:
+            print(f"❌ {label} {watch.reason}; giving up after {RETRY_LIMIT} retries")
+            return result
+        delay = RETRY_BACKOFF * 2 ** retry
+        if _deadline is not None and time.monotonic() + delay >= _deadline:
+            print(f"❌ {label} {watch.reason}; no time left to retry before the deadline")
+            return result
+        print(f"⏳ {label} {watch.reason}; {'resuming' if resumes else 'restarting'} in {delay}s "
+              f"(retry {retry + 1} of {RETRY_LIMIT})")
+        record_retry(watch.reason)
+        time.sleep(delay)
+    return result
+
+def kill_process_tree(process):
+    """Kill a shell command together with the tool it started"""
     try:
-        print(f"📦 {command}")
-        process = subprocess.Popen(
-            command, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            text=True, 
-            shell=True,
-            universal_newlines=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        progress = ProgressBar(prefix="Installing package")
-        output_lines = []
-        
-        for line in iter(process.stdout.readline, ''):
-            output_lines.append(line)
-            line_lower = line.lower()
-            
-            # Look for download progress
-            if "downloading" in line_lower and "%" in line:
-                try:
-                    # Extract percentage from pip output
-                    percent_match = re.search(r'(\d+)%', line)
-                    if percent_match:
-                        percent = int(percent_match.group(1))
-                        progress.update(percent)
-                except:
-                    pass
-            elif "installing" in line_lower:
-                progress.update(80)
-            elif "successfully installed" in line_lower:
-                progress.update(100)
-                
+        if os.name == "nt":
+            subprocess.run(f"taskkill /F /T /PID {process.pid}", capture_output=True, shell=True)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+# Bytes read from a command's output at a time, and how often its progress
+# bar may be updated: every line is parsed, but the bar only shows the
+# parser's state as of the last update (the dashboard draws it at its own rate)
+STREAM_CHUNK_SIZE = 64 * 1024
+PROGRESS_REFRESH_RATE = 10
+
+class OutputParser:
+    """Incremental parser of one tool's output.
+
+    feed() is called for every line and should only update the state
+    cheaply; progress() turns the state into (percent, message) for the bar
+    and is called once per bar update. None leaves that part of the bar as is.
+    """
+    def __init__(self):
+        self.percent = None
+        self.message = None
+
+    def feed(self, line):
+        pass
+
+    def progress(self):
+        return self.percent, self.message
+
+    def bytes_done(self):
+        """Bytes transferred so far, or None while the output shows no byte counts"""
+        return None
+
+    def bytes_downloaded(self):
+        """Bytes downloaded so far, for the rate shown and the throughput history"""
+        return self.bytes_done()
+
+    def quiet_allowed(self):
+        """Whether the tool may now print nothing for long, e.g. while an installer runs"""
+        return False
+
+# A line ends at a newline (with any carriage returns around it) or at a
+# bare carriage return, which tools use to redraw a progress bar in place
+LINE_BREAK = re.compile(r'\r*\n\r*|\r+')
+
+class LineSplitter:
+    """Split a stream of text into lines as soon as each one ends.
+
+    A chunk may end in the middle of a line break (a carriage return whose
+    newline comes with the next chunk); the break is carried over so it
+    still counts once, and the line before it is not held back.
+    """
+    def __init__(self):
+        self.pending = ""  # The unfinished last line
+        self.carried = ""  # The break a chunk ended with
+
+    def feed(self, text):
+        """Return the lines that text completes"""
+        text = self.carried + self.pending + text
+        lines = LINE_BREAK.split(text)
+        if self.carried:
+            lines.pop(0)  # The line before the carried break was already returned
+        self.pending = lines.pop()
+        self.carried = ""
+        if not self.pending and text:
+            # Keep the last break, which the next chunk may continue
+            run = text[len(text.rstrip("\r\n")):]
+            self.carried = list(LINE_BREAK.finditer(run))[-1].group(0) if run else ""
+        return lines
+
+    def close(self):
+        """Return the unfinished last line, if any"""
+        pending, self.pending, self.carried = self.pending, "", ""
+        return [pending] if pending else []
+
+def stream_command(command, parser, prefix, watch=None, source=None):
+    """Run a command and feed its output to an incremental parser.
+
+    The output is read in large chunks as it arrives and split into lines
+    (a bare carriage return ends a line as soon as it arrives, as in
+    progress bars redrawn in place).
+    Every line goes to the log and to parser.feed(); the bar is updated
+    from parser.progress() at most PROGRESS_REFRESH_RATE times a second.
+    The command and everything it started are killed once the StallWatch
+    finds a reason to stop it (by default, only the run deadline).
+    A successful download is added to the throughput history of source.
+    Returns (success, output tail, log path).
+    """
+    watch = watch or StallWatch(window=0)
+    if deadline_passed():
+        watch.stop("ran past the deadline")
+        return False, "Not started: the run deadline has passed", ""
+    try:
+        # A session of its own, so a stalled tool can be killed with its children
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True,
+                                   start_new_session=True)
+    except Exception as e:
+        return False, str(e), ""
+
+    finished = threading.Event()
+
+    def supervise():
+        while not finished.wait(STALL_CHECK_INTERVAL):
+            if watch.check():
+                kill_process_tree(process)
+                return
+
+    threading.Thread(target=supervise, daemon=True).start()
+
+    bar = ProgressBar(prefix=prefix)
+    log = OutputLog(command)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    splitter = LineSplitter()
+    interval = 1.0 / PROGRESS_REFRESH_RATE
+    shown = None
+    last_draw = 0.0
+
+    def feed(line):
+        log.write(line)
+        try:
+            parser.feed(line)
+        except Exception:
+            pass  # A line the parser does not understand
+
+    try:
+        while True:
+            chunk = process.stdout.read1(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            for line in splitter.feed(decoder.decode(chunk)):
+                feed(line)
+            watch.record(parser.bytes_done(), paused=parser.quiet_allowed())
+            now = time.monotonic()
+            if now - last_draw >= interval:
+                state = (*parser.progress(), parser.bytes_downloaded())
+                if state != shown:
+                    bar.update(*state)
+                    shown = state
+                last_draw = now
+        for line in splitter.feed(decoder.decode(b"", final=True)) + splitter.close():
+            feed(line)
+        returncode = process.wait()
+    except KeyboardInterrupt:
+        kill_process_tree(process)
         process.wait()
-        progress.finish()
-        
-        return process.returncode == 0, ''.join(output_lines), ""
-        
+        bar.close()
+        log.close()
+        raise
     except Exception as e:
-        return False, "", str(e)
+        kill_process_tree(process)
+        process.wait()
+        log.write(str(e))
+        returncode = -1
+    finally:
+        finished.set()
+
+    if watch.reason:
+        log.write(f"Stopped: {watch.reason}")
+    downloaded = parser.bytes_downloaded()
+    note_step(exit_code=returncode, bytes=downloaded)
+    if returncode == 0 and not watch.reason:
+        bar.update(*parser.progress(), done=downloaded)
+        bar.finish()
+        THROUGHPUT.record(source, *bar.transferred())
+    else:
+        bar.close()  # A killed, stalled or failed attempt is not complete
+    log.close()
+    return returncode == 0, log.text(), log.path
+
+# Directory of prebuilt wheels that pip installs from instead of the index
+_wheelhouse = None
+
+def use_wheelhouse(path):
+    """Make every pip install use only the wheels in path (None for the index)"""
+    global _wheelhouse
+    _wheelhouse = path
+
+def wheelhouse_command(command):
+    """Point a pip or uv install at the wheelhouse, if one is in use"""
+    if _wheelhouse and re.match(r'(uv )?pip install', command):
+        # Offline mode: never contact the index, only the wheelhouse
+        return command.replace("pip install", f'pip install --no-index --find-links "{_wheelhouse}"', 1)
+    return command
 
+# The pip lines that move the bar; everything else fails the match at once.
+# A download is announced with its size, or shown with a percentage.
+PIP_PROGRESS_LINE = re.compile(
+    r'(?:(Collecting) (\S*)|\s*(Downloading) (?:\S+ \(([\d.]+ [kMG]?B)\)$|.*?(\d+)%)'
+    r'|(Installing collected packages)|(Successfully installed))')
+
+class PipProgressParser(OutputParser):
+    """Turn pip's output into progress.
+
+    With package_count, a batch install is shown as one combined view of how
+    many requested packages pip has collected so far.
+    """
+    def __init__(self, package_count=None):
+        super().__init__()
+        self.package_count = package_count
+        self.collected = 0
+        self.downloaded = None  # Bytes of the finished downloads, once there is one
+        self.announced = 0  # Size of the download in progress
+
+    def feed(self, line):
+        match = PIP_PROGRESS_LINE.match(line)
+        if not match:
+            return
+        collecting, package, downloading, size, percent, installing, _ = match.groups()
+        # pip downloads one file at a time: the next line it prints ends the last download
+        if self.downloaded is not None:
+            self.downloaded += self.announced
+            self.announced = 0
+        if size:
+            self.downloaded = self.downloaded or 0
+            self.announced = parse_size(size)
+            return
+        # Batch installs: resolution covers the first 70%, one step per
+        # collected package (dependencies included, so cap it)
+        if collecting:
+            if self.package_count:
+                self.collected += 1
+                self.percent = min(70, 70 * self.collected // self.package_count)
+                self.message = f"{self.collected} collected: {package}"
+        # Download progress of a single package
+        elif downloading:
+            if not self.package_count:
+                self.percent, self.message = int(percent), None
+        else:
+            self.percent, self.message = (80 if installing else 100), None
+
+    def bytes_downloaded(self):
+        return self.downloaded
+
+# uv prints one summary line per phase, e.g. "Resolved 12 packages in 340ms"
+UV_PHASE_LINE = re.compile(r'\s*(Resolved|Prepared|Installed|Audited) (\d+) packages? in ')
+# and names its large downloads with their size, e.g. "Downloading torch (745.4MiB)"
+UV_DOWNLOAD_LINE = re.compile(r'Downloading (\S+) \(([\d.]+)([KMG]i?B)\)')
+UV_PHASE_PERCENT = {"Resolved": 30, "Prepared": 70, "Installed": 100, "Audited": 100}
+
+class UvProgressParser(OutputParser):
+    """Turn uv's output into progress.
+
+    uv has no percentages when its output is not a terminal; it reports the
+    resolve, download and install phases, and names the large wheels it is
+    downloading, so the bar advances per phase and per finished download.
+    """
+    def __init__(self, package_count=None):
+        super().__init__()
+        self.downloading = 0
+        self.downloaded = 0
+        self.sizes = {}  # Package -> size of its download in progress
+        self.downloaded_bytes = None
+
+    def feed(self, line):
+        match = UV_PHASE_LINE.match(line)
+        if match:
+            phase, count = match.groups()
+            self.percent, self.message = UV_PHASE_PERCENT[phase], f"{phase.lower()} {count}"
+            return
+        line = line.strip()
+        if line.startswith("Downloading "):
+            self.downloading += 1
+            self.message = line
+            size = UV_DOWNLOAD_LINE.match(line)
+            if size:
+                self.sizes[size.group(1)] = parse_size(*size.group(2, 3))
+                self.downloaded_bytes = self.downloaded_bytes or 0
+        elif line.startswith("Downloaded "):
+            self.downloaded += 1
+            self.percent = 30 + 40 * self.downloaded // max(self.downloading, self.downloaded)
+            self.message = line
+            if self.downloaded_bytes is not None:
+                self.downloaded_bytes += self.sizes.pop(line[len("Downloaded "):], 0)
+        elif line.startswith("+ "):
+            self.message = f"installed {line[2:]}"
+
+    def bytes_downloaded(self):
+        return self.downloaded_bytes
+
+class PipBackend:
+    """Install Python packages with pip, which is always there"""
+    name = "pip"
+    parser = PipProgressParser
+
+    def available(self):
+        return True
+
+    def install_prefix(self):
+        return "pip install"
+
+    def install_command(self, packages=(), requirements_file=None, options=()):
+        """Build one install command for several requirement specs, or a requirements file"""
+        if requirements_file:
+            return f'{self.install_prefix()} -r "{requirements_file}"'
+        # Quote each spec so version markers like >= are not shell redirections
+        return f"{self.install_prefix()} " + " ".join(f'"{a}"' for a in list(options) + list(packages))
+
+class UvBackend(PipBackend):
+    """Install Python packages with uv: a faster resolver and parallel wheel installs"""
+    name = "uv"
+    parser = UvProgressParser
+
+    def available(self):
+        return shutil.which("uv") is not None
+
+    def install_prefix(self):
+        # uv only installs into a virtualenv unless told which interpreter
+        return f'uv pip install --python "{PYTHON_EXECUTABLE}"'
+
+PACKAGE_BACKENDS = {"pip": PipBackend(), "uv": UvBackend()}
+
+_package_backend = PACKAGE_BACKENDS["pip"]
+
+def use_package_backend(name="auto"):
+    """Select how Python packages are installed: "uv", "pip" or "auto" (uv if on PATH)"""
+    global _package_backend
+    if name == "auto":
+        name = "uv" if PACKAGE_BACKENDS["uv"].available() else "pip"
+    elif not PACKAGE_BACKENDS[name].available():
+        print(f"⚠️  {name} is not on PATH; installing Python packages with pip")
+        name = "pip"
+    _package_backend = PACKAGE_BACKENDS[name]
+    return _package_backend
+
+def package_backend():
+    """Return the backend Python packages are installed with"""
+    return _package_backend
+
+@timed_step
+def run_pip_with_progress(command, package_count=None):
+    """Run a pip or uv command with progress tracking.
+
+    The output is read with the parser of the backend that runs the command;
+    package_count shows a batch install as one combined view.
+    """
+    command = wheelhouse_command(command)
+    backend = PACKAGE_BACKENDS["uv" if command.startswith("uv ") else "pip"]
+    print(f"📦 {command}")
+    if command.startswith("pip wheel"):
+        prefix = "Building wheels"
+    else:
+        prefix = "Installing packages" if package_count else "Installing package"
+    # Installs from the wheelhouse download nothing
+    source = None if _wheelhouse else "pypi"
+    return stream_command(command, backend.parser(package_count), prefix, source=source)
+
+# winget's download bar ends in "12.0 MB /  200 MB"
+WINGET_DOWNLOAD_SIZE = re.compile(r'([\d.]+) ([KMG]?B) / +([\d.]+) ([KMG]?B)')
+
+class WingetProgressParser(OutputParser):
+    """Turn winget's output into progress: the download by size, then the install"""
+    def __init__(self):
+        super().__init__()
+        self.download_line = None
+        self.downloaded = None  # Size of the finished download
+
+    def feed(self, line):
+        line = line.strip()
+        if line.endswith("B") and self.download_line is not None:
+            self.download_line = line
+        elif line.startswith("Downloading "):
+            self.download_line = ""
+            self.percent, self.message = 10, "Downloading"
+        elif line.startswith("Starting package install") or line.startswith("Installing"):
+            self.downloaded = self.bytes_done() or self.downloaded
+            self.download_line = None
+            self.percent, self.message = 60, "Installing"
+        elif line.startswith("Successfully installed"):
+            self.percent, self.message = 100, None
+
+    def progress(self):
+        match = self.download_line and WINGET_DOWNLOAD_SIZE.search(self.download_line)
+        if match:
+            done, total = parse_size(*match.group(1, 2)), parse_size(*match.group(3, 4))
+            return 10 + 50 * done // max(total, 1), match.group(0)
+        return self.percent, self.message
+
+    def bytes_done(self):
+        match = self.download_line and WINGET_DOWNLOAD_SIZE.search(self.download_line)
+        return parse_size(*match.group(1, 2)) if match else None
+
+    def bytes_downloaded(self):
+        return self.bytes_done() or self.downloaded
+
+    def quiet_allowed(self):
+        # Installers run silently, often for minutes
+        return self.percent == 60
+
+@timed_step
 def run_winget_with_progress(command):
-    """Run winget command with progress tracking"""
+    """Run winget command with progress tracking, retrying a stalled download"""
+    print(f"📦 {command}")
+    # winget starts the download over on every attempt
+    return supervised(f"winget install of {command.split()[-1]}",
+                      lambda watch: stream_command(command, WingetProgressParser(), "Installing application", watch, "url"),
+                      resumes=False)
+
+# "<layer id>: <status>", e.g. "a1b2c3d4e5f6: Downloading [==>  ] 1.5MB/18MB"
+DOCKER_LAYER_LINE = re.compile(
+    r'([0-9a-f]{12}): (Pulling fs layer|Waiting|Downloading|Verifying Checksum|Download complete|Extracting|Pull complete|Already exists)')
+DOCKER_LAYER_BYTES = re.compile(r'([\d.]+)([kMG]?B)/([\d.]+)([kMG]?B)')
+
+class DockerProgressParser(OutputParser):
+    """Turn docker pull/run output into progress over all layers.
+
+    Each layer id counts once, however many lines mention it. A layer is
+    downloaded for the first 70% of its share and extracted for the rest,
+    following the byte counts docker prints for both.
+    """
+    LAYER_STAGES = {"Pulling fs layer": 0.0, "Waiting": 0.0, "Downloading": 0.0, "Verifying Checksum": 0.7,
+                    "Download complete": 0.7, "Extracting": 0.7, "Pull complete": 1.0, "Already exists": 1.0}
+
+    def __init__(self):
+        super().__init__()
+        self.latest = {}  # Layer id -> its last status line
+        self.stages = {}  # Layer id -> how far it has got, 0 to 1
+        self.transferred = {}  # (layer id, status) -> bytes
+
+    def feed(self, line):
+        match = DOCKER_LAYER_LINE.match(line)
+        if match:
+            layer, status = match.groups()
+            previous = self.latest.get(layer)
+            if previous and previous[0] != status and previous[0] in ("Downloading", "Extracting"):
+                self._record(layer, *previous)  # Keep the bytes of the stage it leaves
+            self.latest[layer] = (status, line)
+        elif line.startswith("Digest:") or line.startswith("Status:"):
+            self.percent = 100
+        elif "Pulling from" in line:
+            self.percent = 10
+
+    def _sizes(self, line):
+        """(done, total) bytes of a Downloading or Extracting line, or None"""
+        size = DOCKER_LAYER_BYTES.search(line, 14)
+        return (parse_size(*size.group(1, 2)), parse_size(*size.group(3, 4))) if size else None
+
+    def progress(self):
+        if not self.latest or self.percent == 100:
+            return self.percent, self.message
+        for layer, (status, line) in self.latest.items():
+            stage = self.LAYER_STAGES[status]
+            sizes = status in ("Downloading", "Extracting") and self._sizes(line)
+            if sizes:
+                stage += min(sizes[0] / max(sizes[1], 1), 1.0) * (0.7 if status == "Downloading" else 0.3)
+            # Layers only move forward
+            self.stages[layer] = max(self.stages.get(layer, 0.0), stage)
+        complete = sum(1 for stage in self.stages.values() if stage >= 1.0)
+        return 10 + 90 * sum(self.stages.values()) / len(self.stages), f"{complete}/{len(self.stages)} layers"
+
+    def bytes_done(self):
+        # Downloaded and extracted bytes of the layers still in progress,
+        # plus those of every layer seen earlier
+        transferring = False
+        for layer, (status, line) in self.latest.items():
+            if status in ("Downloading", "Extracting") and self._record(layer, status, line):
+                transferring = True
+        return sum(self.transferred.values()) if transferring else None
+
+    def _record(self, layer, status, line):
+        """Note the bytes a Downloading or Extracting line shows; whether it shows any"""
+        sizes = self._sizes(line)
+        if sizes:
+            key = (layer, status)
+            self.transferred[key] = max(self.transferred.get(key, 0), sizes[0])
+        return bool(sizes)
+
+    def bytes_downloaded(self):
+        # Only the downloads; extracting rewrites the same bytes locally
+        self.bytes_done()
+        downloads = [done for (_, status), done in self.transferred.items() if status == "Downloading"]
+        return sum(downloads) if downloads else None
+
+    def quiet_allowed(self):
+        # Piped, docker prints no byte counts: a layer downloads or extracts without a word
+        unfinished = any(self.LAYER_STAGES[status] < 1.0 for status, _ in self.latest.values())
+        return unfinished and self.bytes_done() is None
+
+@timed_step
+def run_docker_with_progress(command):
+    """Run docker command with progress tracking, retrying a stalled pull"""
+    print(f"🐳 {command}")
+    # A new attempt skips the layers that were already pulled
+    return supervised(f"docker {command.split()[1]}",
+                      lambda watch: stream_command(command, DockerProgressParser(), "Docker operation", watch, "docker"))
+
+# Control sequences the ollama CLI redraws its progress with
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+# "pulling 6a0746a1ec1a:  42% ▕███      ▏ 2.0 GB/4.7 GB  42 MB/s"
+OLLAMA_PULL_LINE = re.compile(r'pulling ([0-9a-f]+):\s+(\d+)%(?:.*?([\d.]+ [KMGT]?B)(?:/([\d.]+ [KMGT]?B))?)?')
+
+class OllamaProgressParser(OutputParser):
+    """Turn ollama pull/run output into progress of the blob being pulled"""
+    def __init__(self):
+        super().__init__()
+        self.status = None
+        self.error = None
+        self.blobs = {}  # Digest -> bytes pulled
+
+    def feed(self, line):
+        if "\x1b" in line:
+            line = ANSI_ESCAPE.sub("", line)
+        line = line.strip()
+        if line.startswith("pulling") or line.startswith("verifying") or line.startswith("writing"):
+            if self.status and not line.startswith(self.status[:20]):
+                self.bytes_done()  # Keep the size of the blob it moves on from
+            self.status = line
+        elif line == "success":
+            self.bytes_done()
+            self.status = None
+            self.percent, self.message = 100, "Download complete!"
+        elif line.lower().startswith("error"):
+            self.error = line
+
+    def progress(self):
+        match = self.status and OLLAMA_PULL_LINE.match(self.status)
+        if match:
+            _, percent, done, total = match.groups()
+            self.percent, self.message = int(percent), f"{done}/{total}" if total else done
+        elif self.status:
+            self.message = self.status
+        return self.percent, self.message
+
+    def bytes_done(self):
+        match = self.status and OLLAMA_PULL_LINE.match(self.status)
+        if not match or not match.group(3):
+            return None
+        self.blobs[match.group(1)] = parse_size(match.group(3))
+        return sum(self.blobs.values())
+
+    def bytes_downloaded(self):
+        # The blobs pulled so far, also once ollama moved on to verifying them
+        return self.bytes_done() or sum(self.blobs.values()) or None
+
+    def quiet_allowed(self):
+        # Checking the digest of a large model takes a while
+        return bool(self.status) and not self.status.startswith("pulling")
+
+@timed_step
+def run_ollama_with_progress(command):
+    """Run ollama command with progress tracking, resuming a stalled pull"""
+    print(f"🤖 {command}")
+    print("📥 Starting Ollama model download...")
+    parser = None
+
+    def attempt(watch):
+        nonlocal parser
+        parser = OllamaProgressParser()
+        return stream_command(command, parser, "Downloading model", watch, "ollama")
+
+    try:
+        # Ollama keeps partly downloaded blobs and continues them
+        success, output, log_path = supervised(f"ollama {command.split()[1]}", attempt)
+    except KeyboardInterrupt:
+        print(f"⚠️ Download interrupted by user; run the installer again to resume it")
+        return False, "", ""
+
+    if parser.error:
+        print(f"❌ {parser.error}")
+    elif success:
+        print("✅ Ollama model download completed successfully!")
+    else:
+        print(f"❌ Ollama command failed: {output.strip().splitlines()[-1] if output.strip() else 'no output'}")
+    return success and not parser.error, output, log_path
+
+def format_bytes(num_bytes):
+    """Format a byte count as a short human-readable string"""
+    if abs(num_bytes) < 1024:
+        return f"{int(num_bytes)} B"
+    for unit in ("KB", "MB"):
+        num_bytes /= 1024
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+    return f"{num_bytes / 1024:.1f} GB"
+
+def format_duration(seconds):
+    """Format a duration as a short human-readable string, e.g. 3m 05s"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+SIZE_UNITS = {"B": 1, "KB": 1000, "MB": 1000 ** 2, "GB": 1000 ** 3, "TB": 1000 ** 4,
+              "KIB": 1024, "MIB": 1024 ** 2, "GIB": 1024 ** 3}
+
+def parse_size(value, unit=None):
+    """Return the bytes in a size printed by a tool, as value and unit or one string"""
+    if unit is None:
+        value, unit = value.split()
+    return int(float(value) * SIZE_UNITS[unit.upper()])
+
+# Measured download rates, kept between runs to estimate how long installs take
+THROUGHPUT_FILE = os.path.join(STATE_DIR, "throughput.json")
+THROUGHPUT_SAMPLES = 20  # Latest transfers kept per source
+THROUGHPUT_MIN_BYTES = 1024 * 1024  # Smaller transfers measure latency more than bandwidth
+
+# Where downloads come from; each is measured separately
+DOWNLOAD_SOURCES = {"ollama": "Ollama registry", "pypi": "PyPI", "docker": "Docker registry", "url": "direct downloads"}
+
+class ThroughputHistory:
+    """Transfer rates measured on this machine, per download source.
+
+    A transfer is timed from the first byte count its tool reports to its
+    end, so whatever the tool does in between (verifying, unpacking) is part
+    of the rate, as it is part of the wait. The latest THROUGHPUT_SAMPLES
+    transfers of a source are weighted by their size.
+    """
+    def __init__(self, path=THROUGHPUT_FILE):
+        self.path = path
+        self.sources = None  # Read on first use
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.sources is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.sources = json.load(f).get("sources", {})
+            except (OSError, ValueError):
+                self.sources = {}
+        return self.sources
+
+    def record(self, source, num_bytes, seconds):
+        """Add a finished transfer and save the history atomically"""
+        if not source or num_bytes < THROUGHPUT_MIN_BYTES or seconds <= 0:
+            return
+        with self._lock:
+            samples = self._load().setdefault(source, [])
+            samples.append({'bytes': int(num_bytes), 'seconds': round(seconds, 3), 'timestamp': time.time()})
+            del samples[:-THROUGHPUT_SAMPLES]
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                temp_path = self.path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"sources": self.sources}, f, indent=2)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"⚠️  Could not save throughput history: {e}")
+
+    def rate(self, source):
+        """Return (bytes per second, measured source) or (None, None) before any download.
+
+        A source not measured yet borrows the rate of all the others together.
+        """
+        with self._lock:
+            sources = self._load()
+            samples = sources.get(source)
+            measured = source if samples else "other sources"
+            if not samples:
+                samples = [sample for group in sources.values() for sample in group]
+        seconds = sum(sample['seconds'] for sample in samples)
+        if not seconds:
+            return None, None
+        return sum(sample['bytes'] for sample in samples) / seconds, measured
+
+    def estimate(self, source, num_bytes):
+        """Seconds a download of num_bytes from source should take here, or None"""
+        rate, _ = self.rate(source)
+        return num_bytes / rate if rate and num_bytes else None
+
+THROUGHPUT = ThroughputHistory()
+
+def ollama_base_url():
+    """Return the local Ollama server URL, honouring OLLAMA_HOST"""
+    host = os.environ.get("OLLAMA_HOST", "").strip() or "127.0.0.1:11434"
+    if "://" not in host:
+        host = f"http://{host}"
+    # The server may listen on all interfaces; connect to it locally
+    return host.replace("0.0.0.0", "127.0.0.1").rstrip("/")
+
+class PullProgress:
+    """Byte-level progress of one model pull, tracked per layer digest"""
+    def __init__(self, model):
+        self.model = model
+        self.layers = {}  # digest -> [completed, total]
+        self.status = ""
+
+    @property
+    def completed(self):
+        return sum(layer[0] for layer in self.layers.values())
+
+    @property
+    def total(self):
+        return sum(layer[1] for layer in self.layers.values())
+
+    def update(self, event):
+        """Apply one status object from the /api/pull stream"""
+        self.status = event.get("status", self.status)
+        digest = event.get("digest")
+        if digest and event.get("total"):
+            self.layers[digest] = [event.get("completed", 0), event["total"]]
+
+    def describe(self):
+        """Short progress text for the progress bar"""
+        if not self.total:
+            return self.status
+        return f"{format_bytes(self.completed)}/{format_bytes(self.total)}"
+
+    def quiet_allowed(self):
+        """Whether the server may now send nothing for long"""
+        # Checking the digest of a large model and writing it out take a while
+        return bool(self.status) and not self.status.startswith("pulling")
+
+# Pass as a client's timeout to wait on the server for as long as it takes
+NO_TIMEOUT = object()
+
+def socket_timeout(timeout, default):
+    """The socket timeout for a client's timeout argument: None means the
+    client's default, NO_TIMEOUT no timeout at all"""
+    return None if timeout is NO_TIMEOUT else timeout or default
+
+def abort_stream(response):
+    """Cut off an HTTP response another thread is reading from"""
+    try:
+        response.socket.shutdown(socket.SHUT_RDWR)
+    except Exception:
+        pass  # Already closed
+
+# Loading a large model from disk can take minutes on slow machines
+WARM_UP_TIMEOUT = 900
+
+class OllamaClient:
+    """Minimal client for the local Ollama server's REST API"""
+    def __init__(self, base_url=None, timeout=60):
+        self.base_url = (base_url or ollama_base_url()).rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={"Content-Type": "application/json"},
+            method="POST" if data is not None else "GET"
+        )
+        return urllib.request.urlopen(request, timeout=socket_timeout(timeout, self.timeout))
+
+    def _stream(self, path, payload, timeout=None):
+        """POST payload and return (connection, response) to read a streamed answer from.
+
+        The caller closes the connection; unlike urllib's, the response can
+        be cut off from another thread with abort_stream().
+        """
+        url = urllib.parse.urlparse(self.base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        connection = connection_class(url.hostname, url.port, timeout=socket_timeout(timeout, self.timeout))
+        try:
+            connection.request("POST", url.path + path, body=json.dumps(payload).encode("utf-8"),
+                               headers={"Content-Type": "application/json"})
+            sock = connection.sock
+            response = connection.getresponse()
+            response.socket = sock  # For abort_stream(); the connection lets go of it if the server will close
+        except Exception:
+            connection.close()
+            raise
+        if response.status >= 400:
+            # The server explains failures in the body
+            body = response.read()
+            connection.close()
+            try:
+                message = json.loads(body).get("error")
+            except ValueError:
+                message = None
+            raise RuntimeError(message or f"POST {path} failed ({response.status})")
+        return connection, response
+
+    def is_running(self):
+        """Whether the server answers"""
+        try:
+            with self._request("/api/version", timeout=2) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def _json(self, path, payload=None, timeout=None):
+        try:
+            with self._request(path, payload, timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            # The server explains failures (e.g. not enough memory) in the body
+            try:
+                message = json.loads(e.read()).get("error")
+            except ValueError:
+                message = None
+            raise RuntimeError(message or str(e)) from e
+
+    def version(self):
+        try:
+            return self._json("/api/version", timeout=2).get("version", "")
+        except Exception:
+            return ""
+
+    def loaded_models(self):
+        """Names of the models currently loaded in memory"""
+        try:
+            return [m.get("name", "") for m in self._json("/api/ps").get("models", [])]
+        except Exception:
+            return []
+
+    def loaded_expiries(self):
+        """{name: seconds until it unloads (-1: never, None: unknown)} of the loaded models"""
+        try:
+            models = self._json("/api/ps").get("models", [])
+        except Exception:
+            return {}
+        return {m.get("name", ""): _keep_alive_left(m.get("expires_at")) for m in models}
+
+    def model_sizes(self):
+        """{name: bytes} of every pulled model"""
+        try:
+            return {m.get("name", ""): m.get("size", 0) for m in self._json("/api/tags").get("models", [])}
+        except Exception:
+            return {}
+
+    def generate(self, model, prompt, options=None, keep_alive=None):
+        """Run one non-streaming completion and return the response with its timings"""
+        payload = {"model": model, "prompt": prompt, "stream": False, "options": options or {}}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return self._json("/api/generate", payload, timeout=WARM_UP_TIMEOUT)
+
+    def embed(self, model, inputs, keep_alive=None):
+        """Embed a list of texts and return the response with its timings"""
+        payload = {"model": model, "input": inputs}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return self._json("/api/embed", payload, timeout=WARM_UP_TIMEOUT)
+
+    def pull(self, model, on_progress=None, timeout=None, on_open=None):
+        """Pull a model, calling on_progress(PullProgress) for every streamed status.
+
+        Returns the final PullProgress; raises RuntimeError if the server
+        reports an error or the stream ends without success, and
+        TimeoutError if it sends nothing for timeout seconds (NO_TIMEOUT
+        waits indefinitely). on_open(response) is called once the stream
+        is open, e.g. to cut it off with abort_stream() later.
+        """
+        progress = PullProgress(model)
+        connection, response = self._stream("/api/pull", {"model": model, "name": model, "stream": True}, timeout)
+        try:
+            if on_open:
+                on_open(response)
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                progress.update(event)
+                if on_progress:
+                    on_progress(progress)
+        finally:
+            connection.close()
+        if progress.status != "success":
+            raise RuntimeError(f"pull of {model} ended with status '{progress.status}'")
+        return progress
+
+def supervised_api_pull(pull, prefix, watch, source=None):
+    """One attempt at an API pull: pull(on_progress, on_open) under a StallWatch.
+
+    The stream is read without a socket timeout; once the watch finds a
+    reason to stop, the response pull passed to on_open() is cut off.
+    The status the server streams says when it may be silent, e.g. while
+    it verifies a download. Returns the final progress, or None if the
+    pull failed or was stopped (the watch then says why). A finished pull
+    is added to the throughput history of source.
+    """
+    bar = ProgressBar(prefix=prefix)
+    opened = []
+    finished = threading.Event()
+    last_draw = [0.0, None]
+
+    def supervise():
+        while not finished.wait(STALL_CHECK_INTERVAL):
+            if watch.check():
+                for response in opened:
+                    abort_stream(response)
+
+    def show(progress):
+        # Status objects arrive many times a second; look at a few of them a second
+        now = time.time()
+        if now - last_draw[0] >= 0.25 or progress.status != last_draw[1]:
+            last_draw[:] = now, progress.status
+            percent = 100 * progress.completed / progress.total if progress.total else None
+            done = progress.completed if progress.total else None
+            bar.update(percent, progress.describe(), done)
+            watch.record(done, paused=progress.quiet_allowed())
+            if watch.reason:
+                raise StallError(watch.reason)
+
+    threading.Thread(target=supervise, daemon=True).start()
+    try:
+        progress = pull(show, opened.append)
+        if watch.reason is None:
+            bar.finish()
+            THROUGHPUT.record(source, *bar.transferred())
+            return progress
+    except StallError:
+        pass
+    except Exception as e:
+        if watch.reason is None:
+            print(f"❌ Error: {e}")
+    finally:
+        finished.set()
+    bar.close()
+    return None
+
+def run_ollama_pull_with_progress(model, client=None):
+    """Pull a model through the Ollama REST API with byte-level progress.
+
+    A stalled pull is stopped and retried; the server continues the blobs
+    it had partly downloaded.
+    """
+    client = client or OllamaClient()
+    print(f"🤖 Pulling {model} from {client.base_url}")
+    progress = supervised(f"Pull of {model}", lambda watch: supervised_api_pull(
+        lambda show, on_open: client.pull(model, show, NO_TIMEOUT, on_open), f"Downloading {model}", watch, "ollama"))
+    if progress is None:
+        print(f"❌ Error pulling {model}")
+        return False, None
+    print(f"✅ Pulled {model} ({format_bytes(progress.total)})")
+    return True, progress
+
+# Performance reports of the model warm-up, one file per machine
+PERF_REPORT_DIR = os.path.join(STATE_DIR, "reports")
+WARM_UP_PROMPT = "Explain in two sentences why the sky is blue."
+WARM_UP_TOKENS = 64
+EMBEDDING_SAMPLE = [
+    "Ollama runs large language models on local hardware.",
+    "Embeddings map text to vectors for retrieval.",
+    "The quick brown fox jumps over the lazy dog.",
+    "Docker containers package an application with its dependencies.",
+] * 8
+
+def is_embedding_model(model_name):
+    """Whether a model only produces embeddings (it cannot generate text)"""
+    return "embed" in model_name.lower()
+
+def _per_second(count, duration_ns):
+    """Rate from an Ollama count and nanosecond duration, or None"""
+    return round(count / (duration_ns / 1e9), 1) if count and duration_ns else None
+
+def _keep_alive_left(expires_at):
+    """Seconds until an Ollama expires_at time, -1 if it never comes, None if unreadable"""
+    # Ollama writes nanoseconds, which fromisoformat does not take
+    match = re.match(r'(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.\d+)?(Z|[+-]\d\d:\d\d)$', expires_at or "")
+    if not match:
+        return None
+    expiry = datetime.datetime.fromisoformat(match.group(1) + match.group(2).replace("Z", "+00:00"))
+    left = (expiry - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    # keep_alive=-1 shows up as an expiry centuries away
+    return -1 if left > 365 * 86400 else max(int(left), 1)
+
+def warm_up_model(model, client=None, keep_alive=0):
+    """Load a model with one small request and measure it.
+
+    Returns load time, prompt-eval and generation tokens/s (or embedding
+    throughput) from the timing fields Ollama reports. keep_alive controls
+    how long the model stays loaded afterwards (-1: until the server stops);
+    a model that was loaded before keeps its own expiry instead of being
+    unloaded by keep_alive=0.
+    """
+    client = client or OllamaClient()
+    loaded = client.loaded_expiries()
+    resident = next((m for m in loaded if m == model or m.split(":")[0] == model), None)
+    result = {'model': model, 'resident_before': resident is not None}
+    if resident is not None and keep_alive == 0:
+        # None (unknown expiry) omits keep_alive, leaving the server default
+        keep_alive = loaded[resident]
+    start = time.time()
+    if is_embedding_model(model):
+        response = client.embed(model, EMBEDDING_SAMPLE, keep_alive)
+        embed_ns = response.get("total_duration", 0) - response.get("load_duration", 0)
+        result.update({
+            'kind': "embedding",
+            'inputs': len(EMBEDDING_SAMPLE),
+            'embeddings_per_sec': _per_second(len(response.get("embeddings", [])), embed_ns),
+            'tokens_per_sec': _per_second(response.get("prompt_eval_count"), embed_ns)
+        })
+    else:
+        response = client.generate(model, WARM_UP_PROMPT, {"num_predict": WARM_UP_TOKENS}, keep_alive)
+        result.update({
+            'kind': "generate",
+            'prompt_tokens_per_sec': _per_second(response.get("prompt_eval_count"), response.get("prompt_eval_duration")),
+            'tokens_per_sec': _per_second(response.get("eval_count"), response.get("eval_duration"))
+        })
+    result['load_seconds'] = round(response.get("load_duration", 0) / 1e9, 2)
+    result['wall_seconds'] = round(time.time() - start, 2)
+    return result
+
+def machine_info():
+    """Identify the machine a performance report was measured on"""
+    return {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'memory': total_memory()
+    }
+
+def run_model_warm_up(models, keep_loaded=(), client=None, report_dir=None):
+    """Warm up every model, print their performance and write the machine's report.
+
+    Models in keep_loaded, by name or name:tag (or all, if it contains
+    "all") stay resident; the others are unloaded after their measurement
+    unless they were loaded before it.
+    """
+    client = client or OllamaClient()
+    if not models:
+        return {}
+    if not client.is_running():
+        print("⚠️  Ollama is not running; skipping the model warm-up")
+        return {}
+
+    print(f"\n🔥 Warming up {len(models)} models...")
+    outer = getattr(_task_context, "phase", None), getattr(_task_context, "tool", None)
+    _task_context.phase = "verify"
+    results = {}
+    try:
+        for model in models:
+            _task_context.tool = model
+            # Entries may name a model with or without its tag
+            kept = model in keep_loaded or model.split(":")[0] in keep_loaded or "all" in keep_loaded
+            keep_alive = -1 if kept else 0
+            with TIMELINE.step(f"warm-up {model}") as step:
+                try:
+                    results[model] = warm_up_model(model, client, keep_alive)
+                    step['exit_code'] = 0
+                except Exception as e:
+                    results[model] = {'model': model, 'error': str(e)}
+                    step['exit_code'] = 1
+    finally:
+        _task_context.phase, _task_context.tool = outer
+
+    print(f"\n{'model':<28} {'load s':>7} {'prompt tok/s':>13} {'gen tok/s':>10}  note")
+    print("-" * 72)
+    for model, result in results.items():
+        if 'error' in result:
+            print(f"{model:<28} ❌ {result['error']}")
+        elif result['kind'] == "embedding":
+            print(f"{model:<28} {result['load_seconds']:>7.2f} {result['tokens_per_sec'] or '-':>13} {'-':>10}  "
+                  f"{result['embeddings_per_sec'] or '-'} embeddings/s")
+        else:
+            note = "was loaded already" if result['resident_before'] else ""
+            print(f"{model:<28} {result['load_seconds']:>7.2f} {result['prompt_tokens_per_sec'] or '-':>13} "
+                  f"{result['tokens_per_sec'] or '-':>10}  {note}")
+
+    report = {
+        'machine': machine_info(),
+        'ollama_version': client.version(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'models': results
+    }
+    report_dir = report_dir or PERF_REPORT_DIR
+    path = os.path.join(report_dir, re.sub(r'[^\w.-]+', '_', platform.node() or "machine") + "-models.json")
+    try:
+        os.makedirs(report_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Performance report: {path}")
+    except OSError as e:
+        print(f"⚠️  Could not write the performance report: {e}")
+    return results
+
+# Ollama runtime settings for CPU-only servers. Parallel requests to a model
+# share its threads, so a request slot is given per OLLAMA_CORES_PER_REQUEST
+# physical cores, up to OLLAMA_MAX_PARALLEL
+OLLAMA_CORES_PER_REQUEST = 4
+OLLAMA_MAX_PARALLEL = 4
+OLLAMA_TUNING_TOKENS = 32
+OLLAMA_RESTART_TIMEOUT = 60
+OLLAMA_SYSTEMD_OVERRIDE = "/etc/systemd/system/ollama.service.d/toolinstaller.conf"
+
+def physical_cores():
+    """Physical CPU cores (what Ollama uses as threads), or None if they cannot be counted"""
+    if os.name == "nt":
+        success, stdout, _ = run_command('powershell -NoProfile -Command "(Get-CimInstance Win32_Processor '
+                                         '| Measure-Object -Property NumberOfCores -Sum).Sum"')
+        return int(stdout.strip()) if success and stdout.strip().isdigit() else None
+    if sys.platform == "darwin":
+        success, stdout, _ = run_command("sysctl -n hw.physicalcpu")
+        return int(stdout.strip()) if success and stdout.strip().isdigit() else None
+    try:
+        cores = set()
+        physical = None
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() == "physical id":
+                    physical = value.strip()
+                elif key.strip() == "core id":
+                    cores.add((physical, value.strip()))
+        if cores:
+            return len(cores)
+    except OSError:
+        pass
+    return None
+
+def has_gpu():
+    """Whether an NVIDIA or AMD GPU driver tool is installed (Ollama then offloads to it)"""
+    return any(shutil.which(tool) for tool in ("nvidia-smi", "rocm-smi"))
+
+def ollama_tuning(model_sizes, memory_budget, cores):
+    """Derive Ollama's runtime settings from the hardware and the models it serves.
+
+    model_sizes maps each model to its size in bytes. Every request slot
+    gives each loaded model another context cache, so the slots are capped
+    by the cores and by what the largest model needs. As many models as fit
+    the budget together (smallest first) stay loaded, so switching between
+    them does not evict and reload one; if they all fit they are kept
+    loaded for good. Returns (environment settings, threads per request).
+    """
+    def needed(size, parallel):
+        return size * (1 + (MODEL_MEMORY_OVERHEAD - 1) * parallel)
+
+    largest = max(model_sizes.values(), default=0)
+    parallel = max(1, min(OLLAMA_MAX_PARALLEL, cores // OLLAMA_CORES_PER_REQUEST))
+    while parallel > 1 and needed(largest, parallel) > memory_budget:
+        parallel -= 1
+    loaded, used = 0, 0
+    for size in sorted(model_sizes.values()):
+        if used + needed(size, parallel) > memory_budget:
+            break
+        loaded += 1
+        used += needed(size, parallel)
+    settings = {
+        "OLLAMA_NUM_PARALLEL": str(parallel),
+        "OLLAMA_MAX_LOADED_MODELS": str(max(loaded, 1)),
+        "OLLAMA_KEEP_ALIVE": "-1" if model_sizes and loaded == len(model_sizes) else "30m",
+    }
+    return settings, cores
+
+def apply_ollama_settings(settings):
+    """Write settings to the Ollama service's environment and restart it.
+
+    On Windows they become user environment variables (setx) and the tray
+    app is restarted; with systemd they go into a drop-in for
+    ollama.service. Elsewhere they are printed to set by hand. Returns
+    whether the server was restarted with them.
+    """
+    if os.name == "nt":
+        for name, value in settings.items():
+            run_command(f'setx {name} "{value}"')
+        run_command('taskkill /F /IM "ollama app.exe"')
+        run_command("taskkill /F /IM ollama.exe")
+        app = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Programs", "Ollama", "ollama app.exe")
+        # setx only reaches processes started from a new session; the restarted
+        # app inherits this process's environment, so hand the settings over directly
+        success, _, stderr = run_command(f'start "" "{app}"', env=dict(os.environ, **settings))
+        if not success:
+            print(f"⚠️  Could not restart Ollama: {stderr.strip()}")
+        return success
+    success, _, _ = run_command("systemctl cat ollama.service")
+    if success:
+        override = "[Service]\n" + "".join(f'Environment="{name}={value}"\n' for name, value in settings.items())
+        try:
+            os.makedirs(os.path.dirname(OLLAMA_SYSTEMD_OVERRIDE), exist_ok=True)
+            with open(OLLAMA_SYSTEMD_OVERRIDE, "w", encoding="utf-8") as f:
+                f.write(override)
+        except OSError as e:
+            print(f"⚠️  Could not write {OLLAMA_SYSTEMD_OVERRIDE} ({e}); as root, write:\n{override}"
+                  "and run: systemctl daemon-reload && systemctl restart ollama")
+            return False
+        success, _, stderr = run_command("systemctl daemon-reload && systemctl restart ollama")
+        if not success:
+            print(f"⚠️  Could not restart ollama.service: {stderr.strip()}")
+        return success
+    print("⚠️  No Ollama service found; set these before starting `ollama serve`:")
+    for name, value in settings.items():
+        print(f"   {name}={value}")
+    return False
+
+def concurrent_generate(client, model, requests, options=None):
+    """Send requests completions at once and measure their aggregate throughput"""
+    options = dict(options or {}, num_predict=OLLAMA_TUNING_TOKENS)
+    responses, errors = [], []
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=requests) as executor:
+        futures = [executor.submit(client.generate, model, WARM_UP_PROMPT, options) for _ in range(requests)]
+        for future in futures:
+            try:
+                responses.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+    wall = time.time() - start
+    tokens = sum(response.get("eval_count", 0) for response in responses)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'wall_seconds': round(wall, 2),
+        'tokens': tokens,
+        'tokens_per_sec': round(tokens / wall, 1) if wall else None
+    }
+
+def tune_ollama(models, memory_budget, client=None, apply=apply_ollama_settings, report_dir=None):
+    """Tune the running Ollama server for the checklist models and measure the effect.
+
+    The settings come from ollama_tuning(); the same burst of concurrent
+    completions is sent to the smallest model before and after apply()
+    restarts the server with them. The result is written to the machine's
+    report directory.
+    """
+    client = client or OllamaClient()
+    if not client.is_running():
+        print("⚠️  Ollama is not running; skipping the runtime tuning")
+        return None
+    sizes = {name: size for name, size in client.model_sizes().items()
+             if name.split(":")[0] in models or name in models}
+    if not sizes:
+        print("⚠️  None of the checklist models is pulled; leaving Ollama's defaults")
+        return None
+
+    outer = getattr(_task_context, "phase", None), getattr(_task_context, "tool", None)
+    _task_context.phase, _task_context.tool = "verify", "ollama"
+    try:
+        cores = physical_cores()
+        counted = "physical" if cores else "logical"
+        settings, threads = ollama_tuning(sizes, memory_budget, cores or os.cpu_count() or 1)
+        print(f"\n⚙️  Tuning Ollama for {len(sizes)} models, {threads} {counted} cores "
+              f"and a {format_bytes(memory_budget)} budget:")
+        for name, value in settings.items():
+            print(f"   {name}={value}")
+        print(f"   num_thread={threads} (a request option; set it in clients or Modelfiles)")
+
+        generative = sorted((size, name) for name, size in sizes.items() if not is_embedding_model(name))
+        model = generative[0][1] if generative else None
+        requests = max(2, int(settings["OLLAMA_NUM_PARALLEL"]))
+
+        def measure(label, options=None):
+            with TIMELINE.step(f"{requests} concurrent completions ({label})") as step:
+                try:
+                    client.generate(model, "Hi", dict(options or {}, num_predict=1))  # Load it first
+                    result = concurrent_generate(client, model, requests, options)
+                except Exception as e:
+                    result = {'requests': requests, 'errors': [str(e)], 'tokens_per_sec': None}
+                step['exit_code'] = 1 if result['errors'] else 0
+            return result
+
+        report = {'machine': machine_info(), 'settings': settings, 'num_thread': threads, 'cores_counted': counted,
+                  'model': model}
+        if model:
+            report['before'] = measure("defaults")
+        with TIMELINE.step("apply Ollama settings") as step:
+            applied = apply(settings)
+            deadline = time.time() + OLLAMA_RESTART_TIMEOUT
+            while applied and not client.is_running() and time.time() < deadline:
+                time.sleep(1)
+            step['exit_code'] = 0 if applied else 1
+        report['applied'] = applied
+        if not applied:
+            print("⚠️  The settings were not applied; Ollama keeps its defaults until they are")
+        elif not client.is_running():
+            print(f"❌ Ollama did not come back within {OLLAMA_RESTART_TIMEOUT}s of the restart")
+        elif model:
+            report['after'] = measure("tuned", {"num_thread": threads})
+            before, after = report['before'], report['after']
+            print(f"\n{'':<10} {'requests':>9} {'wall s':>7} {'tok/s':>7}  errors")
+            for label, result in (("defaults", before), ("tuned", after)):
+                print(f"{label:<10} {result['requests']:>9} {result.get('wall_seconds', '-'):>7} "
+                      f"{result['tokens_per_sec'] or '-':>7}  {len(result['errors'])}")
+            if before['tokens_per_sec'] and after['tokens_per_sec']:
+                change = 100 * (after['tokens_per_sec'] / before['tokens_per_sec'] - 1)
+                print(f"{'✅' if change >= 0 else '⚠️ '} {requests} concurrent requests to {model}: "
+                      f"{change:+.0f}% aggregate tokens/s")
+    finally:
+        _task_context.phase, _task_context.tool = outer
+
+    report_dir = report_dir or PERF_REPORT_DIR
+    path = os.path.join(report_dir, re.sub(r'[^\w.-]+', '_', platform.node() or "machine") + "-ollama-tuning.json")
+    try:
+        os.makedirs(report_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Tuning report: {path}")
+    except OSError as e:
+        print(f"⚠️  Could not write the tuning report: {e}")
+    return report
+
+# Containers the framework installs run (n8n only falls back to Docker)
+CONTAINERS = {
+    "open webui": {
+        "name": "open-webui",
+        "image": "ghcr.io/open-webui/open-webui:main",
+        "ports": {"8080": "3000"},
+        "volumes": ["open-webui:/app/backend/data"],
+        "extra_hosts": ["host.docker.internal:host-gateway"],
+        "restart": "always",
+        "health": "/health",
+    },
+    "n8n": {
+        "name": "n8n",
+        "image": "n8nio/n8n",
+        "ports": {"5678": "5678"},
+        "health": "/healthz",
+    },
+    "langflow": {
+        "name": "langflow",
+        "image": "langflowai/langflow:latest",
+        "ports": {"7860": "7860"},
+        "restart": "unless-stopped",
+        "health": "/health",
+    },
+}
+
+# Oldest Engine API the client speaks (Docker 20.10); newer engines accept it
+DOCKER_API_VERSION = "v1.41"
+
+def container_spec(tool_name):
+    """Return the container a framework install runs, or None"""
+    name = tool_name.lower()
+    for key, spec in CONTAINERS.items():
+        if key in name:
+            return spec
+    return None
+
+def split_image_reference(image):
+    """Split an image reference into (repository, tag)"""
+    repository, _, tag = image.rpartition(":") if ":" in image.split("/")[-1] else (image, "", "latest")
+    return repository, tag
+
+def docker_run_command(spec):
+    """Return the `docker run` command line for a container spec"""
+    options = [f"-p {host}:{container}" for container, host in spec.get("ports", {}).items()]
+    options += [f"--add-host={host}" for host in spec.get("extra_hosts", [])]
+    options += [f"-v {volume}" for volume in spec.get("volumes", [])]
+    options.append(f"--name {spec['name']}")
+    if spec.get("restart"):
+        options.append(f"--restart {spec['restart']}")
+    return f"docker run -d {' '.join(options)} {spec['image']}"
+
+def docker_host():
+    """Return the Docker daemon address (DOCKER_HOST or the platform default)"""
+    return os.environ.get("DOCKER_HOST") or (
+        "npipe:////./pipe/docker_engine" if os.name == "nt" else "unix:///var/run/docker.sock")
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Unix domain socket"""
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class _PipeSocket:
+    """Just enough of a socket around a Windows named pipe for http.client"""
+    def __init__(self, path):
+        self._pipe = open(path, "r+b", buffering=0)
+
+    def sendall(self, data):
+        self._pipe.write(data)
+
+    def makefile(self, mode, *args, **kwargs):
+        return io.BufferedReader(self._pipe)
+
+    def shutdown(self, how):
+        self._pipe.close()
+
+    def close(self):
+        self._pipe.close()
+
+class _PipeHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a Windows named pipe"""
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.pipe_path = path
+
+    def connect(self):
+        self.sock = _PipeSocket(self.pipe_path)
+
+class ImagePullProgress(PullProgress):
+    """Byte-level progress of one image pull, tracked per layer"""
+    def update(self, event):
+        """Apply one status object from the /images/create stream"""
+        self.status = event.get("status", self.status)
+        layer, detail = event.get("id"), event.get("progressDetail") or {}
+        if layer and self.status == "Downloading" and detail.get("total"):
+            self.layers[layer] = [detail.get("current", 0), detail["total"]]
+        elif layer in self.layers and self.status in ("Download complete", "Pull complete"):
+            self.layers[layer][0] = self.layers[layer][1]
+
+    def quiet_allowed(self):
+        # Extracting a large layer, and checking it before, take a while
+        return self.status not in ("", "Downloading")
+
+class DockerClient:
+    """Minimal client for the Docker Engine API on the local socket or pipe"""
+    def __init__(self, host=None, timeout=60):
+        self.host = host or docker_host()
+        self.timeout = timeout
+
+    def _connection(self, timeout):
+        url = urllib.parse.urlparse(self.host)
+        if url.scheme == "unix":
+            return _UnixHTTPConnection(url.path, timeout)
+        elif url.scheme == "npipe":
+            return _PipeHTTPConnection(url.path.replace("/", "\\"), timeout)
+        elif url.scheme in ("tcp", "http"):
+            return http.client.HTTPConnection(url.hostname, url.port or 2375, timeout=timeout)
+        raise ValueError(f"Unsupported DOCKER_HOST: {self.host}")
+
+    def _request(self, method, path, payload=None, timeout=None):
+        """Send a request and return (connection, response); the caller closes the connection"""
+        connection = self._connection(socket_timeout(timeout, self.timeout))
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            connection.request(method, f"/{DOCKER_API_VERSION}{path}", body=body, headers=headers)
+            sock = connection.sock
+            response = connection.getresponse()
+            response.socket = sock  # For abort_stream(); the connection lets go of it if the server will close
+        except Exception:
+            connection.close()
+            raise
+        if response.status >= 400:
+            message = response.read().decode("utf-8", "ignore")
+            connection.close()
+            try:
+                message = json.loads(message).get("message", message)
+            except ValueError:
+                pass
+            raise RuntimeError(f"{method} {path} failed ({response.status}): {message.strip()}")
+        return connection, response
+
+    def _json(self, method, path, payload=None, timeout=None):
+        connection, response = self._request(method, path, payload, timeout)
+        try:
+            data = response.read()
+            return json.loads(data) if data else None
+        finally:
+            connection.close()
+
+    def is_running(self):
+        """Whether the daemon answers"""
+        if os.environ.get("DOCKER_TLS_VERIFY"):
+            return False  # TLS client certificates are left to the CLI
+        try:
+            connection, response = self._request("GET", "/_ping", timeout=2)
+            connection.close()
+            return True
+        except Exception:
+            return False
+
+    def version(self):
+        return self._json("GET", "/version")["Version"]
+
+    def containers(self):
+        """All containers, running or not"""
+        return self._json("GET", "/containers/json?all=1")
+
+    def images(self):
+        return self._json("GET", "/images/json")
+
+    def pull(self, image, on_progress=None, timeout=NO_TIMEOUT, on_open=None):
+        """Pull an image, calling on_progress(ImagePullProgress) for every streamed status.
+
+        By default the stream may be silent indefinitely, as it is while
+        large layers are extracted; with a timeout, a silence that long
+        raises TimeoutError. on_open(response) is
+        called once the stream is open, e.g. to cut it off with
+        abort_stream() later.
+        """
+        repository, tag = split_image_reference(image)
+        query = urllib.parse.urlencode({"fromImage": repository, "tag": tag})
+        progress = ImagePullProgress(image)
+        connection, response = self._request("POST", f"/images/create?{query}", timeout=timeout)
+        try:
+            if on_open:
+                on_open(response)
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                progress.update(event)
+                if on_progress:
+                    on_progress(progress)
+        finally:
+            connection.close()
+        return progress
+
+    def create_container(self, spec):
+        """Create a container from a CONTAINERS spec"""
+        host_config = {
+            "PortBindings": {f"{c}/tcp": [{"HostPort": h}] for c, h in spec.get("ports", {}).items()},
+            "Binds": spec.get("volumes", []),
+            "ExtraHosts": spec.get("extra_hosts", []),
+        }
+        if spec.get("restart"):
+            host_config["RestartPolicy"] = {"Name": spec["restart"]}
+        return self._json("POST", f"/containers/create?name={urllib.parse.quote(spec['name'])}", {
+            "Image": spec["image"],
+            "ExposedPorts": {f"{c}/tcp": {} for c in spec.get("ports", {})},
+            "HostConfig": host_config,
+        })
+
+    def start(self, name):
+        self._json("POST", f"/containers/{urllib.parse.quote(name)}/start")
+
+def run_docker_pull_with_progress(image, client=None):
+    """Pull an image through the Engine API with byte-level progress.
+
+    A stalled pull is stopped and retried; layers already pulled are kept.
+    """
+    client = client or DockerClient()
+    print(f"🐳 Pulling {image}")
+    progress = supervised(f"Pull of {image}", lambda watch: supervised_api_pull(
+        lambda show, on_open: client.pull(image, show, NO_TIMEOUT, on_open), "Pulling image", watch, "docker"))
+    if progress is None:
+        print(f"❌ Error pulling {image}")
+        return False, None
+    print(f"✅ Pulled {image} ({format_bytes(progress.total)} downloaded)")
+    return True, progress
+
+def install_container(spec, inventory=None, client=None):
+    """Create and start a container, through the Engine API when the daemon answers.
+
+    The image is pulled first unless it is already present. Without the API
+    this is the equivalent `docker run`. Returns (success, output, log_path).
+    """
+    client = client or DockerClient()
+    if not client.is_running():
+        success, output, log_path = run_docker_with_progress(docker_run_command(spec))
+        if success:
+            note_service_start(spec["name"])
+        return success, output, log_path
+
+    repository, tag = split_image_reference(spec["image"])
+    if not inventory or f"{repository}:{tag}" not in inventory.get("images"):
+        with TIMELINE.step(f"POST /images/create {spec['image']}") as step:
+            success, progress = run_docker_pull_with_progress(spec["image"], client)
+            step['exit_code'] = 0 if success else 1
+            step['bytes'] = progress.completed if progress else None
+        if not success:
+            return False, "", ""
+
+    with TIMELINE.step(f"POST /containers/create {spec['name']}") as step:
+        try:
+            client.create_container(spec)
+            client.start(spec["name"])
+            step['exit_code'] = 0
+        except Exception as e:
+            step['exit_code'] = 1
+            return False, str(e), ""
+    note_service_start(spec["name"])
+    print(f"🐳 Started container {spec['name']}")
+    return True, "", ""
+
+def start_container(name, client=None):
+    """Start an existing container. Returns (success, output, log_path)"""
+    client = client or DockerClient()
+    if not client.is_running():
+        success, output, log_path = run_command_with_spinner(f"docker start {name}", f"Starting {name}")
+        if success:
+            note_service_start(name)
+        return success, output, log_path
+    try:
+        client.start(name)
+        note_service_start(name)
+        print(f"🐳 Started container {name}")
+        return True, "", ""
+    except Exception as e:
+        return False, str(e), ""
+
+# A started container's service can take minutes before its port answers.
+# Its health endpoint is polled after READY_POLL_START seconds, then at
+# doubling intervals up to READY_POLL_MAX, for at most READY_TIMEOUT
+# (0: started services are not waited for).
+READY_TIMEOUT = 600
+READY_POLL_START = 0.5
+READY_POLL_MAX = 2.0
+
+# Containers started during this run: name -> time of the start, and the
+# readiness wait that began with it
+_service_starts = {}
+_service_waits = {}
+
+def use_ready_timeout(seconds):
+    """Override how long a started service is waited for (0 to not wait)"""
+    global READY_TIMEOUT
+    READY_TIMEOUT = seconds
+
+def note_service_start(name):
+    """Remember when a container was started and start waiting for it to become ready.
+
+    The wait runs in the background while the rest of the run goes on;
+    wait_for_services() collects the results.
+    """
+    _service_starts[name] = time.time()
+    spec = next((s for s in CONTAINERS.values() if s["name"] == name), None)
+    if spec and READY_TIMEOUT:
+        _service_waits[name] = _start_ready_wait(spec, _service_starts[name])
+
+def _start_ready_wait(spec, started):
+    """Poll a service from a thread of its own; returns a Future of wait_until_ready()"""
+    future = Future()
+
+    def wait():
+        try:
+            latency = wait_until_ready(spec, started)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        if latency is not None:
+            url = readiness_url(spec).rsplit("/", 1)[0]
+            print(f"✅ {spec['name']} ready {latency:.1f}s after its start ({url})")
+        future.set_result(latency)
+
+    # A daemon thread: a run that stops early does not wait for the polling
+    threading.Thread(target=wait, daemon=True).start()
+    return future
+
+def readiness_url(spec):
+    """The URL that answers once a container's service is up"""
+    host_port = next(iter(spec["ports"].values()))
+    return f"http://127.0.0.1:{host_port}{spec.get('health', '/')}"
+
+def service_answers(url):
+    """Whether an HTTP server answers on url (a 5xx answer means still starting)"""
+    try:
+        with urllib.request.urlopen(url, timeout=2):
+            return True
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+    except (urllib.error.URLError, OSError, http.client.HTTPException):
+        return False
+
+def wait_until_ready(spec, started=None, timeout=None):
+    """Poll a service's health endpoint with backoff until it answers.
+
+    Returns the seconds from the container start to the first answer, or
+    None if it did not answer within timeout (READY_TIMEOUT, or less when
+    the run deadline comes first).
+    """
+    started = started or time.time()
+    timeout = READY_TIMEOUT if timeout is None else timeout
+    if _deadline is not None:
+        timeout = min(timeout, max(0, _deadline - time.monotonic()))
+    url = readiness_url(spec)
+    give_up = time.time() + timeout
+    delay = READY_POLL_START
+    _task_context.tool, _task_context.phase = spec["name"], "verify"
+    with TIMELINE.step(f"GET {url}") as step:
+        while True:
+            if service_answers(url):
+                step['exit_code'] = 0
+                return time.time() - started
+            if time.time() + delay > give_up:
+                step['exit_code'] = 1
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, READY_POLL_MAX)
+
+def wait_for_services(names=None):
+    """Join the readiness waits of the containers started in this run.
+
+    Each wait began when its container started. Returns {container name:
+    start-to-ready seconds, or None if it did not answer within
+    READY_TIMEOUT}.
+    """
+    futures = {_service_waits[n]: n for n in (names or _service_waits) if n in _service_waits}
+    pending = [name for future, name in futures.items() if not future.done()]
+    if pending:
+        print(f"\n⏳ Waiting for {', '.join(pending)} to answer...")
+    specs = {spec["name"]: spec for spec in CONTAINERS.values()}
+    ready = {}
+    for future in as_completed(futures):
+        name = futures[future]
+        ready[name] = future.result()
+        if ready[name] is None:
+            url = readiness_url(specs[name]).rsplit("/", 1)[0]
+            print(f"⚠️  {name} is not answering on {url} yet")
+    return ready
+
+@timed_step
+def run_command_with_spinner(command, message="Processing"):
+    """Run command with spinner for indeterminate progress"""
+    spinner = Spinner(message)
+    spinner.start()
+    
     try:
-        print(f"📦 {command}")
         process = subprocess.Popen(
-            command, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            text=True, 
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
             shell=True,
             encoding='utf-8',
             errors='ignore'
         )
-        
-        progress = ProgressBar(prefix="Installing application")
-        output_lines = []
-        
+        log = OutputLog(command)
         for line in iter(process.stdout.readline, ''):
-            output_lines.append(line)
-            line_lower = line.lower()
-            
-            if "downloading" in line_lower:
-                progress.update(25)
-            elif "installing" in line_lower:
-                progress.update(60)
-            elif "successfully installed" in line_lower:
-                progress.update(100)
-                
-        process.wait()
-        progress.finish()
-        
-        return process.returncode == 0, ''.join(output_lines), ""
-        
+            log.write(line)
+        success = process.wait() == 0
+        note_step(exit_code=process.returncode)
+        log.close()
+        spinner.stop(f"✅ {message} completed!" if success else f"❌ {message} failed!")
+        return success, log.text(), log.path
+    except Exception as e:
+        spinner.stop(f"❌ {message} failed!")
+        return False, str(e), ""
+
+@timed_step
+def run_command(command, capture_output=True, shell=True, env=None):
+    """Run a command and return result"""
+    try:
+        result = subprocess.run(command, capture_output=capture_output, text=True, shell=shell, encoding='utf-8',
+                                errors='ignore', env=env)
+        note_step(exit_code=result.returncode)
+        return result.returncode == 0, result.stdout, result.stderr
     except Exception as e:
         return False, "", str(e)
 
-def run_docker_with_progress(command):
-    """Run docker command with progress tracking"""
+# Checklist types that are installed with pip
+PYTHON_PACKAGE_TYPES = ("ספריית פייתון", "חבילת פייתון")
+
+# Interpreter whose environment is checked and installed into
+PYTHON_EXECUTABLE = "python"
+
+# Checklist names that are not the pip distribution name
+PACKAGE_NAME_ALIASES = {
+    "smolagent": "smolagents",
+    "automodelforquestionanswering": "transformers",  # This is part of transformers
+}
+
+BUILTIN_MODULES = ("os", "traceback")
+
+# Runs inside the target interpreter: reads package names as JSON from stdin and
+# prints {name: version or None} plus the interpreter and site-packages paths.
+# Versions come from distribution metadata, with an import-spec lookup as
+# fallback, so no package is actually imported.
+PACKAGE_PROBE_SCRIPT = r'''
+import importlib.metadata, importlib.util, json, os, re, site, sys
+def normalize(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+versions = {}
+for dist in importlib.metadata.distributions():
+    name = dist.metadata["Name"]
+    if name:
+        versions.setdefault(normalize(name), dist.version)
+result = {}
+for name in json.loads(sys.stdin.read()):
+    version = versions.get(normalize(name))
+    if version is None:
+        try:
+            spec = importlib.util.find_spec(name.replace("-", "_"))
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None:
+            version = "unknown"
+    result[name] = version
+paths = [sys.executable] + site.getsitepackages() + [site.getusersitepackages()]
+print(json.dumps({"versions": result, "paths": [p for p in paths if os.path.exists(p)]}))
+'''
+
+def resolve_package_name(tool_name):
+    """Map a checklist entry to its pip package name (None for built-in modules)"""
+    package_name = tool_name.lower()
+    if package_name in BUILTIN_MODULES:
+        return None
+    return PACKAGE_NAME_ALIASES.get(package_name, package_name)
+
+def probe_python_packages(package_names, python=PYTHON_EXECUTABLE):
+    """Look up installed versions of many packages with a single interpreter launch.
+
+    Returns ({name: version or None}, [interpreter and site-packages paths]).
+    """
+    package_names = list(package_names)
+    try:
+        with TIMELINE.step(f"{python} -c <package probe: {len(package_names)} packages>") as step:
+            result = subprocess.run(
+                [python, "-c", PACKAGE_PROBE_SCRIPT],
+                input=json.dumps(package_names),
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='ignore'
+            )
+            step['exit_code'] = result.returncode
+        probe = json.loads(result.stdout) if result.returncode == 0 else {}
+    except Exception:
+        probe = {}
+
+    versions = probe.get("versions", {})
+    return {name: versions.get(name) for name in package_names}, probe.get("paths", [])
+
+# Checklist model names that differ from the Ollama model name. Names that
+# pin a model size map to that tag, which select_model_tags() leaves alone.
+OLLAMA_MODEL_NAMES = {
+    "gemma3": "gemma2",  # Ollama uses gemma2 not gemma3
+    "microsoft/phi-3-mini-4k-instruct": "phi3:3.8b",  # Phi-3 mini; phi3:14b is Phi-3 medium
+    "mistralai/mistral-7b-instruct-v0.2": "mistral:7b",
+    "meta-llama/llama-3.2-3b-instruct": "llama3.2:3b",
+    "qwen/qwen2.5-7b-instruct": "qwen2.5:7b",
+    "google/gemma-3-1b-it": "gemma2:2b",  # The smallest gemma2
+    "llama3.2 vision": "llama3.2-vision",
+    "llava llama3": "llava-llama3",
+    "mixtral 8×7b": "mixtral:8x7b",
+}
+
+def resolve_model_name(tool_name):
+    """Map a checklist LLM entry to the Ollama model to pull"""
+    model_name = tool_name.replace("‑", "-").replace("–", "-").lower()
+    return OLLAMA_MODEL_NAMES.get(model_name, model_name)
+
+# Tags of each model from largest to smallest, with their approximate
+# download size in GB (from the Ollama library). The untagged default is
+# used for models that are not listed.
+MODEL_VARIANTS = {
+    "llama3.3": [("70b-instruct-q8_0", 75), ("70b", 43), ("70b-instruct-q3_K_M", 34), ("70b-instruct-q2_K", 26)],
+    "phi4": [("14b-fp16", 29), ("14b-q8_0", 16), ("14b", 9.1)],
+    "llama3.2": [("3b-instruct-fp16", 6.4), ("3b-instruct-q8_0", 3.4), ("3b", 2.0), ("1b", 1.3)],
+    "qwen2.5": [("72b", 47), ("32b", 20), ("14b", 9.0), ("7b", 4.7), ("3b", 1.9), ("1.5b", 1.0), ("0.5b", 0.4)],
+    "llava": [("34b", 20), ("13b", 8.0), ("7b", 4.7)],
+    "gemma2": [("27b", 16), ("9b", 5.4), ("2b", 1.6)],
+    "llama3.2-vision": [("90b", 55), ("11b", 7.9)],
+    "mixtral": [("8x22b", 80), ("8x7b", 26)],
+    "mistral": [("7b-instruct-fp16", 14), ("7b-instruct-q8_0", 7.7), ("7b", 4.1)],
+    "phi3": [("14b", 7.9), ("3.8b", 2.2)],
+}
+
+# A loaded model needs its weights plus room for the context cache
+MODEL_MEMORY_OVERHEAD = 1.2
+
+# Share of the physical memory models may use by default
+DEFAULT_MEMORY_SHARE = 0.75
+
+# Model -> chosen tag, from select_model_tags()
+_model_tags = {}
+
+def total_memory():
+    """Physical memory in bytes, or None if it cannot be read"""
+    if os.name == "nt":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong)] + [
+                (name, ctypes.c_ulonglong) for name in ("ullTotalPhys", "ullAvailPhys", "ullTotalPageFile",
+                                                        "ullAvailPageFile", "ullTotalVirtual", "ullAvailVirtual",
+                                                        "ullAvailExtendedVirtual")]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(status)
+        return status.ullTotalPhys if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)) else None
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def hardware_profile():
+    """Return the CPU cores, physical memory and free space for models of this machine"""
+    return {
+        'cpu_count': os.cpu_count(),
+        'memory': total_memory(),
+        'free_disk': volume_of(ollama_models_dir())[1]
+    }
+
+def select_model_tags(models, memory_budget, free_disk=None):
+    """Choose for each model the largest tag that fits the memory budget and the disk.
+
+    Returns {model: (tag, memory needed, fits)}; a model for which nothing
+    fits gets its smallest tag with fits=False. Models given with an
+    explicit tag or without known variants are left alone.
+    """
+    selection = {}
+    for model in models:
+        if ":" in model or model not in MODEL_VARIANTS:
+            continue
+        variants = MODEL_VARIANTS[model]
+        for tag, size_gb in variants:
+            size = size_gb * 1e9
+            needed = size * MODEL_MEMORY_OVERHEAD
+            if needed <= memory_budget and (free_disk is None or size + DISK_HEADROOM <= free_disk):
+                selection[model] = (tag, needed, True)
+                break
+        else:
+            tag, size_gb = variants[-1]
+            selection[model] = (tag, size_gb * 1e9 * MODEL_MEMORY_OVERHEAD, False)
+    return selection
+
+def use_model_tags(selection):
+    """Pull the selected tags from now on ({model: (tag, ...)} or {} for the defaults)"""
+    global _model_tags
+    _model_tags = {model: choice[0] for model, choice in selection.items()}
+
+def tagged_model_name(model_name):
+    """Return the model with its selected tag, or unchanged if none was selected"""
+    tag = _model_tags.get(model_name)
+    return f"{model_name}:{tag}" if tag else model_name
+
+class Inventory:
+    """Snapshot of the environment that answers every installation check from memory.
+
+    Each section is gathered by one command; all stale sections are gathered in
+    parallel and kept until an installation invalidates them.
+    """
+    SECTIONS = ("ollama", "ollama_models", "docker", "containers", "images", "winget", "npm", "python")
+
+    def __init__(self, package_names=()):
+        self.package_names = set(package_names)
+        self.python_paths = []  # Interpreter and site-packages of the last probe
+        self._data = {}
+        self._lock = threading.RLock()
+
+    def refresh(self, sections=None):
+        """Gather the given (default: all stale) sections in parallel"""
+        with self._lock:
+            if sections is None:
+                sections = [s for s in self.SECTIONS if s not in self._data]
+            sections = list(sections)
+            if not sections:
+                return
+            # Re-gathering after an install is that install's verification
+            phase = "verify" if getattr(_task_context, "phase", None) in ("install", "verify") else "detect"
+            tool = getattr(_task_context, "tool", None)
+            with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+                results = executor.map(lambda s: self._collect(s, phase, tool), sections)
+                self._data.update(zip(sections, results))
+
+    def _collect(self, section, phase, tool):
+        """Run one collector on a worker thread, under the caller's tool and phase"""
+        _task_context.phase, _task_context.tool = phase, tool
+        return getattr(self, f"_collect_{section}")()
+
+    def invalidate(self, *sections):
+        """Drop sections that an installation may have changed"""
+        with self._lock:
+            for section in sections:
+                self._data.pop(section, None)
+
+    def get(self, section):
+        """Return a section, gathering it first if it is stale"""
+        with self._lock:
+            if section not in self._data:
+                self.refresh([section])
+            return self._data[section]
+
+    # Collectors, one command each
+
+    def _collect_ollama(self):
+        success, stdout, _ = run_command("ollama --version")
+        return (stdout.strip() or "installed") if success else ""
+
+    def _collect_ollama_models(self):
+        success, stdout, _ = run_command("ollama list")
+        if not success:
+            return {}
+        # Skip the NAME/ID/SIZE header; columns are "model:tag" and digest ID
+        models = {}
+        for line in stdout.splitlines()[1:]:
+            columns = line.split()
+            if columns:
+                models[columns[0].lower()] = columns[1] if len(columns) > 1 else ""
+        return models
+
+    # The Docker sections ask the Engine API when the daemon answers and
+    # fall back to the CLI otherwise
+
+    def _collect_docker(self):
+        client = DockerClient()
+        if client.is_running():
+            try:
+                with TIMELINE.step("GET /version"):
+                    return f"Docker version {client.version()}"
+            except Exception:
+                pass  # Fall back to the CLI
+        success, stdout, _ = run_command("docker --version")
+        return (stdout.strip() or "installed") if success else ""
+
+    def _collect_containers(self):
+        client = DockerClient()
+        if client.is_running():
+            try:
+                with TIMELINE.step("GET /containers/json"):
+                    return [{
+                        'name': ",".join(n.lstrip("/") for n in info.get('Names') or []),
+                        'image': info.get('Image', ''),
+                        'running': info.get('State', '').lower() == 'running'
+                    } for info in client.containers()]
+            except Exception:
+                pass  # Fall back to the CLI
+        success, stdout, _ = run_command('docker ps -a --format "{{json .}}"')
+        containers = []
+        if success:
+            for line in stdout.splitlines():
+                try:
+                    info = json.loads(line)
+                except ValueError:
+                    continue
+                containers.append({
+                    'name': info.get('Names', ''),
+                    'image': info.get('Image', ''),
+                    'running': info.get('State', '').lower() == 'running'
+                })
+        return containers
+
+    def _collect_images(self):
+        client = DockerClient()
+        if client.is_running():
+            try:
+                with TIMELINE.step("GET /images/json"):
+                    return {tag for info in client.images() for tag in info.get('RepoTags') or []}
+            except Exception:
+                pass  # Fall back to the CLI
+        success, stdout, _ = run_command('docker images --format "{{.Repository}}:{{.Tag}}"')
+        return set(stdout.split()) if success else set()
+
+    def _collect_winget(self):
+        success, stdout, _ = run_command("winget list")
+        return stdout if success else ""
+
+    def _collect_npm(self):
+        success, stdout, _ = run_command("npm ls -g --depth=0 --json")
+        try:
+            return set(json.loads(stdout).get('dependencies', {}))
+        except ValueError:
+            return set()
+
+    def _collect_python(self):
+        versions, self.python_paths = probe_python_packages(sorted(self.package_names))
+        return versions
+
+    # Queries
+
+    def model_digest(self, model_name):
+        """Digest ID of a pulled Ollama model (with or without a tag), or None"""
+        model_name = model_name.lower()
+        for model, digest in self.get("ollama_models").items():
+            if model == model_name or model.split(':')[0] == model_name:
+                return digest
+        return None
+
+    def has_model(self, model_name):
+        """Whether an Ollama model is pulled (with or without a tag)"""
+        return self.model_digest(model_name) is not None
+
+    def model_tags(self, model_name):
+        """All pulled tags of a model, as full names"""
+        model_name = model_name.lower()
+        return [m for m in self.get("ollama_models") if m == model_name or m.split(':')[0] == model_name]
+
+    def find_container(self, name=None, image=None, running_only=False):
+        """Return the first container matching a name or image substring"""
+        for container in self.get("containers"):
+            if running_only and not container['running']:
+                continue
+            if (name and name in container['name']) or (image and image in container['image']):
+                return container
+        return None
+
+    def package_version(self, package_name):
+        """Installed version of a Python package, or None if it is missing"""
+        with self._lock:
+            if package_name not in self.package_names:
+                # New names are probed together with the known ones
+                self.package_names.add(package_name)
+                self.invalidate("python")
+            return self.get("python").get(package_name)
+
+def sections_checked_by(tool_name, tool_type):
+    """Return the inventory sections check_installed reads for a tool"""
+    tool_name = tool_name.lower()
+    if tool_name in ("ollama", "docker"):
+        return (tool_name,)
+    elif "open webui" in tool_name:
+        return ("containers",)
+    elif tool_name == "langflow":
+        return ("docker", "containers")
+    elif tool_name == "anythingllm":
+        return ("winget",)
+    elif tool_name == "n8n":
+        return ("npm", "containers")
+    elif tool_type == "LLM":
+        return ("ollama_models",)
+    elif tool_type in PYTHON_PACKAGE_TYPES and resolve_package_name(tool_name):
+        return ("python",)
+    return ()
+
+def sections_changed_by(tool_name, tool_type):
+    """Return the inventory sections to invalidate after installing a tool"""
+    tool_name = tool_name.lower()
+    if tool_name == "ollama":
+        return ("ollama", "ollama_models")
+    elif tool_name == "docker":
+        return ("docker", "containers", "images")
+    elif "open webui" in tool_name or tool_name == "langflow":
+        return ("containers", "images")
+    elif tool_name == "anythingllm":
+        return ("winget",)
+    elif tool_name == "n8n":
+        return ("npm", "containers", "images")
+    elif tool_type == "LLM":
+        return ("ollama_models",)
+    elif tool_type in PYTHON_PACKAGE_TYPES:
+        # pip may have pulled in other checklist packages as dependencies
+        return ("python",)
+    return ()
+
+_inventory = None
+
+def get_inventory():
+    """Return the shared inventory, creating it on first use"""
+    global _inventory
+    if _inventory is None:
+        _inventory = Inventory()
+    return _inventory
+
+DETECTION_STATE_FILE = os.path.join(STATE_DIR, "detected.json")
+
+# Entries whose state has no cheap local fingerprint (containers, winget
+# installs) are trusted for this long before being probed again
+DETECTION_MAX_AGE = 24 * 3600
+
+def ollama_models_dir():
+    """Return the directory Ollama stores models in"""
+    return os.environ.get("OLLAMA_MODELS") or os.path.join(os.path.expanduser("~"), ".ollama", "models")
+
+def ollama_manifest_dir(model_name, models_dir=None):
+    """Return the directory holding a model's tag manifests"""
+    model_name = model_name.split(":")[0]
+    if "/" not in model_name:
+        model_name = f"library/{model_name}"
+    return os.path.join(models_dir or ollama_models_dir(), "manifests", "registry.ollama.ai", *model_name.split("/"))
+
+def _path_stamp(path):
+    """Return [path, mtime] for a file or directory, or None if it is missing"""
+    try:
+        return [path, os.stat(path).st_mtime_ns]
+    except (OSError, TypeError):
+        return None
+
+def detection_fingerprint(tool_name, tool_type, python_paths=()):
+    """Return (stamps, max_age) that change whenever a tool's install state may have.
+
+    stamps is a list of [path, mtime] pairs that must all match the cached
+    ones; max_age is None when the stamps cover the state completely.
+    """
+    name = tool_name.lower()
+    if tool_type == "LLM":
+        return [_path_stamp(ollama_manifest_dir(resolve_model_name(tool_name)))], None
+    elif tool_type in PYTHON_PACKAGE_TYPES:
+        return [_path_stamp(p) for p in python_paths] or [None], None
+    elif name in ("ollama", "docker"):
+        return [_path_stamp(shutil.which(name))], None
+    elif "open webui" in name or name == "langflow":
+        # Containers live inside Docker; only the CLI is visible locally
+        return [_path_stamp(shutil.which("docker"))], DETECTION_MAX_AGE
+    elif name == "n8n":
+        return [_path_stamp(shutil.which("n8n") or shutil.which("docker"))], DETECTION_MAX_AGE
+    return [], DETECTION_MAX_AGE
+
+def detected_version(tool_name, tool_type, inventory):
+    """Return the version (or model digest) the inventory reports for a tool"""
+    name = tool_name.lower()
+    if tool_type == "LLM":
+        return inventory.model_digest(resolve_model_name(tool_name)) or ""
+    elif tool_type in PYTHON_PACKAGE_TYPES:
+        package_name = resolve_package_name(tool_name)
+        return (package_name and inventory.package_version(package_name)) or ""
+    elif name in ("ollama", "docker"):
+        return inventory.get(name)
+    return ""
+
+class DetectionCache:
+    """On-disk record of detected tools, so re-runs only re-probe what changed"""
+    def __init__(self, path=DETECTION_STATE_FILE):
+        self.path = path
+        self.entries = {}
+        self.python_paths = []
+
+    def load(self):
+        """Read the state file; a missing or corrupt file means an empty cache"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.entries = state.get("entries", {})
+            self.python_paths = state.get("python_paths", [])
+        except (OSError, ValueError):
+            self.entries = {}
+        return self
+
+    def save(self):
+        """Write the state file atomically"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self.entries, "python_paths": self.python_paths}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not save detection state: {e}")
+
+    def lookup(self, tool_name, tool_type):
+        """Return the cached entry if the tool is still known to be installed"""
+        entry = self.entries.get(install_target(tool_name, tool_type))
+        if not entry:
+            return None
+        stamps, max_age = detection_fingerprint(tool_name, tool_type, self.python_paths)
+        if None in stamps or entry['fingerprint'] != stamps:
+            return None
+        if max_age is not None and time.time() - entry['timestamp'] > max_age:
+            return None
+        return entry
+
+    def record(self, tool_name, tool_type, version=""):
+        """Remember that a tool was detected as installed"""
+        stamps, _ = detection_fingerprint(tool_name, tool_type, self.python_paths)
+        if None in stamps:
+            return  # Nothing to validate it against next time
+        self.entries[install_target(tool_name, tool_type)] = {
+            'tool': tool_name,
+            'version': version,
+            'timestamp': time.time(),
+            'fingerprint': stamps
+        }
+
+    def forget(self, tool_name, tool_type):
+        """Drop a tool, e.g. because it was just found missing"""
+        self.entries.pop(install_target(tool_name, tool_type), None)
+
+# Downloaded installers, stored by content hash; point TOOLINSTALLER_CACHE at
+# a shared directory to let several machines reuse the same artifacts
+ARTIFACT_CACHE_DIR = os.environ.get("TOOLINSTALLER_CACHE") or os.path.join(STATE_DIR, "artifacts")
+DOWNLOAD_PART_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CONNECTIONS = 4
+
+OLLAMA_INSTALLER_URL = "https://ollama.com/download/OllamaSetup.exe"
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ArtifactCache:
+    """Content-addressed store of downloaded files: <dir>/sha256/<digest>/<filename>"""
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or ARTIFACT_CACHE_DIR
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.partial_dir = os.path.join(self.cache_dir, "partial")
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def path_for(self, sha256, filename):
+        return os.path.join(self.cache_dir, "sha256", sha256, filename)
+
+    def entry(self, url):
+        """Return the index entry of a URL ({} if it was never downloaded)"""
+        return self._read_index().get(url, {})
+
+    def find(self, url, sha256=None):
+        """Return the cached file for a URL (or digest), or None"""
+        if not sha256:
+            sha256 = self.entry(url).get("sha256")
+        if not sha256:
+            return None
+        blob_dir = os.path.join(self.cache_dir, "sha256", sha256)
+        if os.path.isdir(blob_dir):
+            for filename in os.listdir(blob_dir):
+                return os.path.join(blob_dir, filename)
+        return None
+
+    def store(self, url, path, sha256, filename, validators=None):
+        """Move a verified download into the store and index it by URL.
+
+        validators (ETag, Last-Modified) let a later run check that the URL
+        still serves the same file.
+        """
+        target = self.path_for(sha256, filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        # Re-read before writing, another machine may share the index
+        index = self._read_index()
+        index[url] = dict(validators or {}, sha256=sha256, size=os.path.getsize(target), filename=filename)
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(temp_path, self.index_path)
+        return target
+
+def _validators(headers):
+    """The ETag and Last-Modified of a response, as stored in the cache index"""
+    return {key: headers[name] for key, name in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+            if headers.get(name)}
+
+def _still_current(url, entry):
+    """Whether a file cached by URL is still the one the URL serves.
+
+    Asks with a conditional HEAD; without validators on both sides the
+    sizes are compared. If the server cannot tell (offline, HEAD refused),
+    the cached file is kept.
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers, method="HEAD"), timeout=30) as response:
+            current = _validators(response.headers)
+            length = response.headers.get("Content-Length")
+    except Exception:
+        return True  # 304 Not Modified (raised by urllib), or no answer to go by
+    for key in ("etag", "last_modified"):
+        if entry.get(key) and current.get(key):
+            return current[key] == entry[key]
+    return length is not None and int(length) == entry.get("size")
+
+def _probe_download(url):
+    """Return (final URL, size or None, whether byte ranges are supported, validators)"""
+    request = urllib.request.Request(url, headers={"Range": "bytes=0-0"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        final_url = response.geturl()
+        validators = _validators(response.headers)
+        if response.status == 206:
+            match = re.match(r"bytes 0-0/(\d+)", response.headers.get("Content-Range", ""))
+            if match:
+                return final_url, int(match.group(1)), True, validators
+        length = response.headers.get("Content-Length")
+        return final_url, int(length) if length else None, False, validators
+
+def _download_range(url, path, start, end, on_bytes):
+    """Download bytes start..end (inclusive) into the same offsets of path"""
+    request = urllib.request.Request(url, headers={"Range": f"bytes={start}-{end}"})
+    with urllib.request.urlopen(request, timeout=60) as response, open(path, "r+b") as f:
+        if response.status != 206:
+            raise RuntimeError("server ignored the range request")
+        f.seek(start)
+        received = 0
+        for block in iter(lambda: response.read(256 * 1024), b""):
+            f.write(block)
+            received += len(block)
+            on_bytes(len(block))
+    if received != end - start + 1:
+        raise RuntimeError(f"range {start}-{end} ended after {received} bytes")
+
+def download_artifact(url, sha256=None, filename=None, cache=None, connections=DOWNLOAD_CONNECTIONS):
+    """Download a file into the artifact cache and return its path.
+
+    A file cached under the expected digest is reused as is; one cached by
+    URL only while the server still serves the same file (e.g. a "latest"
+    installer that has not moved on). Servers that support byte ranges are fetched in parallel parts, and
+    parts finished before an interruption are kept for the next attempt.
+    Returns None if the download fails or its SHA-256 does not match.
+    """
+    cache = cache or ArtifactCache()
+    filename = filename or os.path.basename(urllib.parse.urlparse(url).path) or "download"
+    cached = cache.find(url, sha256)
+    if cached and not sha256 and not _still_current(url, cache.entry(url)):
+        print(f"🔄 {filename} has changed since it was cached, downloading it again")
+        cached = None
+    if cached:
+        print(f"📦 Using cached {filename}")
+        return cached
+
+    os.makedirs(cache.partial_dir, exist_ok=True)
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    part_path = os.path.join(cache.partial_dir, f"{key}.part")
+    state_path = os.path.join(cache.partial_dir, f"{key}.json")
+
+    progress = ProgressBar(prefix=f"Downloading {filename}")
     try:
-        print(f"🐳 {command}")
-        process = subprocess.Popen(
-            command, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            text=True, 
-            shell=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        progress = ProgressBar(prefix="Docker operation")
-        output_lines = []
-        layers_total = 0
-        layers_complete = 0
-        
-        for line in iter(process.stdout.readline, ''):
-            output_lines.append(line)
-            
-            # Track docker layer progress
-            if "Pull complete" in line:
-                layers_complete += 1
-                if layers_total > 0:
-                    percent = (layers_complete / layers_total) * 100
-                    progress.update(percent)
-            elif "Pulling from" in line:
-                progress.update(10)
-            elif re.search(r'[a-f0-9]{12}:', line):
-                layers_total += 1
-                
-        process.wait()
-        progress.finish()
-        
-        return process.returncode == 0, ''.join(output_lines), ""
-        
-    except Exception as e:
-        return False, "", str(e)
+        final_url, size, ranges, validators = _probe_download(url)
+        parts = []
+        if ranges and size:
+            parts = [(start, min(start + DOWNLOAD_PART_SIZE, size) - 1) for start in range(0, size, DOWNLOAD_PART_SIZE)]
 
-def run_ollama_with_progress(command):
-    """Run ollama command with progress tracking"""
-    try:
-        print(f"🤖 {command}")
-        print("📥 Starting Ollama model download (this may take several minutes for large models)...")
-        
-        process = subprocess.Popen(
-            command, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            text=True, 
-            shell=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        progress = ProgressBar(prefix="Downloading model")
-        output_lines = []
-        last_update_time = time.time()
-        download_started = False
-        
+        # Resume only if the partial file belongs to the same remote file:
+        # same size and, where the server sends them, same ETag/Last-Modified
+        state = {}
         try:
-            for line in iter(process.stdout.readline, ''):
-                if not line:  # Empty line means end of output
-                    break
-                    
-                line = line.strip()
-                if line:
-                    output_lines.append(line)
-                    line_lower = line.lower()
-                    current_time = time.time()
-                    
-                    # Check for download progress indicators
-                    if any(keyword in line_lower for keyword in ['pulling', 'downloading', 'digest:', 'status:']):
-                        download_started = True
-                        
-                        # Look for percentage information
-                        if '%' in line:
-                            try:
-                                import re
-                                percent_match = re.search(r'(\d+)%', line)
-                                if percent_match:
-                                    percent = int(percent_match.group(1))
-                                    progress.update(percent, f"Downloading: {percent}%")
-                                    last_update_time = current_time
-                                    continue
-                            except:
-                                pass
-                        
-                        # Look for size information (MB/GB)
-                        if any(unit in line_lower for unit in ['mb', 'gb', 'bytes']):
-                            size_info = line.split()[-2:] if len(line.split()) >= 2 else ['', '']
-                            progress.update(None, f"Downloading: {' '.join(size_info)}")
-                            last_update_time = current_time
-                            continue
-                    
-                    # Show periodic updates even without specific progress
-                    if download_started and current_time - last_update_time > 10:  # Update every 10 seconds
-                        progress.update(None, "Downloading... (large model, please wait)")
-                        last_update_time = current_time
-                    
-                    # Check for completion
-                    if any(keyword in line_lower for keyword in ['success', 'complete', 'finished']):
-                        progress.update(100, "Download complete!")
-                        break
-                        
-                    # Check for errors
-                    if any(keyword in line_lower for keyword in ['error', 'failed', 'not found']):
-                        progress.finish()
-                        print(f"❌ Error: {line}")
-                        return False, output_lines
-                        
-        except KeyboardInterrupt:
-            print(f"⚠️ Download interrupted by user")
-            process.terminate()
-            progress.finish()
-            return False, output_lines
-        
-        # Wait for process to complete
-        return_code = process.wait()
-        progress.finish()
-        
-        if return_code == 0:
-            print("✅ Ollama model download completed successfully!")
-            return True, output_lines
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            pass
+        changed = any(state.get("validators", {}).get(key) not in (None, value) for key, value in validators.items())
+        if changed and state.get("done"):
+            print(f"🔄 {filename} has changed since the interrupted download, starting it again")
+        if (changed or state.get("size") != size or state.get("part_size") != DOWNLOAD_PART_SIZE
+                or not os.path.exists(part_path)):
+            state = {"url": url, "size": size, "part_size": DOWNLOAD_PART_SIZE, "validators": validators, "done": []}
+            with open(part_path, "wb") as f:
+                if size:
+                    f.truncate(size)
+
+        lock = threading.Lock()
+        done_parts = set(state["done"])
+        received = [sum(end - start + 1 for i, (start, end) in enumerate(parts) if i in done_parts)]
+        if received[0]:
+            print(f"↩️  Resuming {filename} at {format_bytes(received[0])}")
+
+        def on_bytes(count):
+            with lock:
+                received[0] += count
+                percent = 100 * received[0] / size if size else None
+                progress.update(percent, format_bytes(received[0]), received[0])
+
+        def fetch_part(index):
+            start, end = parts[index]
+            _download_range(final_url, part_path, start, end, on_bytes)
+            with lock:
+                done_parts.add(index)
+                state["done"] = sorted(done_parts)
+                with open(state_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+
+        if parts:
+            pending = [i for i in range(len(parts)) if i not in done_parts]
+            with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+                for future in [executor.submit(fetch_part, i) for i in pending]:
+                    future.result()
         else:
-            print(f"❌ Ollama command failed with return code {return_code}")
-            return False, output_lines
-            
+            # No range support: one plain stream, restarted from scratch
+            with urllib.request.urlopen(final_url, timeout=60) as response, open(part_path, "wb") as f:
+                for block in iter(lambda: response.read(256 * 1024), b""):
+                    f.write(block)
+                    on_bytes(len(block))
+        progress.finish()
+        THROUGHPUT.record("url", *progress.transferred())
     except Exception as e:
-        print(f"❌ Error running Ollama command: {e}")
-        return False, []
+        progress.close()
+        print(f"❌ Download of {filename} failed: {e} (completed parts are kept for resuming)")
+        return None
 
-def run_command_with_spinner(command, message="Processing"):
-    """Run command with spinner for indeterminate progress"""
-    spinner = Spinner(message)
-    spinner.start()
-    
+    digest = file_sha256(part_path)
+    if sha256 and digest != sha256.lower():
+        print(f"❌ Checksum mismatch for {filename}: expected {sha256}, got {digest}")
+        os.remove(part_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return None
+
+    path = cache.store(url, part_path, digest, filename, validators)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    print(f"✅ Downloaded {filename} (sha256 {digest[:12]}…)")
+    return path
+
+# Shared directory of exported Ollama models (same layout as the models dir)
+_model_mirror = None
+
+def use_model_mirror(path):
+    """Seed LLM installs from the model mirror at path (None to always pull)"""
+    global _model_mirror
+    _model_mirror = path
+
+def ollama_manifest_path(model_name, models_dir=None):
+    """Return the manifest file of a model tag (default tag: latest)"""
+    tag = model_name.split(":")[1] if ":" in model_name else "latest"
+    return os.path.join(ollama_manifest_dir(model_name, models_dir), tag)
+
+def ollama_blob_path(digest, models_dir=None):
+    """Return the blob file for a digest like sha256:abc..."""
+    return os.path.join(models_dir or ollama_models_dir(), "blobs", digest.replace(":", "-"))
+
+def manifest_blobs(manifest_path):
+    """Return [(digest, size)] for the config and layers of a manifest"""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    entries = [manifest["config"]] + manifest.get("layers", [])
+    return [(entry["digest"], entry.get("size", 0)) for entry in entries]
+
+def _reflink(source, target):
+    """Clone a file with copy-on-write where the filesystem supports it (Linux)"""
+    import fcntl
+    FICLONE = 0x40049409
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+def link_or_copy(source, target):
+    """Place source at target as a hardlink, reflink or copy; return which one"""
     try:
-        result = subprocess.run(command, capture_output=True, text=True, shell=True, encoding='utf-8', errors='ignore')
-        success = result.returncode == 0
-        spinner.stop(f"✅ {message} completed!" if success else f"❌ {message} failed!")
-        return success, result.stdout, result.stderr
-    except Exception as e:
-        spinner.stop(f"❌ {message} failed!")
-        return False, "", str(e)
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        pass
+    try:
+        _reflink(source, target)
+        return "reflink"
+    except (ImportError, OSError):
+        if os.path.exists(target):
+            os.remove(target)
+    shutil.copyfile(source, target)
+    return "copy"
 
-def run_command(command, capture_output=True, shell=True):
-    """Run a command and return result"""
+def _local_models(models_dir):
+    """Return the model:tag names found in a models directory"""
+    root = os.path.join(models_dir, "manifests", "registry.ollama.ai")
+    models = []
+    for directory, _, files in os.walk(root):
+        name = os.path.relpath(directory, root).replace(os.sep, "/")
+        if name.startswith("library/"):
+            name = name[len("library/"):]
+        models.extend(f"{name}:{tag}" for tag in files)
+    return sorted(models)
+
+def export_models(mirror_dir, models=None, models_dir=None):
+    """Export pulled models (default: all) to a mirror directory.
+
+    Blobs shared between models are stored once; manifests are written last
+    so a partial export never exposes an incomplete model.
+    """
+    models_dir = models_dir or ollama_models_dir()
+    models = models or _local_models(models_dir)
+    os.makedirs(os.path.join(mirror_dir, "blobs"), exist_ok=True)
+    copied = skipped = copied_bytes = 0
+    for model in models:
+        manifest = ollama_manifest_path(model, models_dir)
+        if not os.path.exists(manifest):
+            print(f"⚠️  {model} is not pulled, skipping")
+            continue
+        print(f"📤 Exporting {model}...")
+        for digest, size in manifest_blobs(manifest):
+            target = ollama_blob_path(digest, mirror_dir)
+            if os.path.exists(target) and os.path.getsize(target) == size:
+                skipped += 1
+                continue
+            link_or_copy(ollama_blob_path(digest, models_dir), target + ".tmp")
+            os.replace(target + ".tmp", target)
+            copied += 1
+            copied_bytes += size
+        target_manifest = ollama_manifest_path(model, mirror_dir)
+        os.makedirs(os.path.dirname(target_manifest), exist_ok=True)
+        shutil.copyfile(manifest, target_manifest)
+    print(f"✅ Exported {len(models)} models to {mirror_dir}: {copied} blobs ({format_bytes(copied_bytes)}) copied, {skipped} already there")
+
+def import_model_from_mirror(model_name, mirror_dir=None, models_dir=None):
+    """Seed a model from the mirror instead of pulling it; return success.
+
+    Blobs already in the local store are reused, the rest are linked or
+    copied and must match their digest before the manifest is written.
+    """
+    mirror_dir = mirror_dir or _model_mirror
+    models_dir = models_dir or ollama_models_dir()
+    manifest = ollama_manifest_path(model_name, mirror_dir) if mirror_dir else None
+    if not manifest or not os.path.exists(manifest):
+        return False
+
+    print(f"📥 Importing {model_name} from mirror {mirror_dir}...")
     try:
-        result = subprocess.run(command, capture_output=capture_output, text=True, shell=shell, encoding='utf-8', errors='ignore')
-        return result.returncode == 0, result.stdout, result.stderr
-    except Exception as e:
-        return False, "", str(e)
+        os.makedirs(os.path.join(models_dir, "blobs"), exist_ok=True)
+        for digest, size in manifest_blobs(manifest):
+            target = ollama_blob_path(digest, models_dir)
+            if os.path.exists(target) and os.path.getsize(target) == size:
+                continue  # Shared with a model that is already installed
+            method = link_or_copy(ollama_blob_path(digest, mirror_dir), target + ".tmp")
+            if "sha256:" + file_sha256(target + ".tmp") != digest:
+                os.remove(target + ".tmp")
+                print(f"❌ Blob {digest[:19]} in the mirror is corrupt")
+                return False
+            os.replace(target + ".tmp", target)
+            print(f"   {digest[7:19]} {format_bytes(size)} ({method})")
+        target_manifest = ollama_manifest_path(model_name, models_dir)
+        os.makedirs(os.path.dirname(target_manifest), exist_ok=True)
+        shutil.copyfile(manifest, target_manifest)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ Could not import {model_name} from the mirror: {e}")
+        return False
+    print(f"✅ Imported {model_name} from the mirror")
+    return True
 
-def check_installed(tool_name, tool_type):
-    """Check if a tool is installed using various methods"""
+def check_installed(tool_name, tool_type, inventory=None):
+    """Check if a tool is installed, answering from the shared inventory"""
+    inventory = inventory or get_inventory()
     
     # Framework checking
     if tool_name.lower() == "ollama":
-        success, stdout, _ = run_command("ollama --version")
-        return success
+        return bool(inventory.get("ollama"))
     
     elif tool_name.lower() == "docker":
-        success, stdout, _ = run_command("docker --version")
-        return success
+        return bool(inventory.get("docker"))
         
     elif "open webui" in tool_name.lower():
-        success, stdout, _ = run_command("docker ps --filter name=open-webui")
-        return success and "open-webui" in stdout
+        return inventory.find_container(name="open-webui", running_only=True) is not None
         
     elif tool_name.lower() == "anythingllm":
-        # Check if AnythingLLM is installed via winget or in common locations
-        success, stdout, _ = run_command("winget list --name AnythingLLM")
-        return success and "AnythingLLM" in stdout
+        # Check if AnythingLLM is installed via winget
+        return "anythingllm" in inventory.get("winget").lower()
         
     elif tool_name.lower() == "n8n":
-        success, stdout, _ = run_command("n8n --version")
-        if not success:
-            success, stdout, _ = run_command("npm list -g n8n")
-            if not success:
-                # Check if running as docker container
-                success, stdout, _ = run_command("docker ps --filter name=n8n")
-                return success and "n8n" in stdout
-        return success
+        if shutil.which("n8n") or "n8n" in inventory.get("npm"):
+            return True
+        # Check if running as docker container
+        return inventory.find_container(name="n8n", running_only=True) is not None
         
     elif tool_name.lower() == "langflow":
-        # Check if Docker is available first
-        docker_available, _, _ = run_command("docker --version")
-        if not docker_available:
+        # Any Langflow container, running or stopped (might just need to be
+        # restarted), found by name or by image
+        if not inventory.get("docker"):
             return False
-            
-        # Check for running Langflow containers (by name first, then by image)
-        success, stdout, _ = run_command("docker ps --filter name=langflow")
-        if success and "langflow" in stdout:
-            return True
-            
-        # Check for running containers by image name
-        success, stdout, _ = run_command("docker ps")
-        if success and "langflowai/langflow" in stdout:
-            return True
-            
-        # Also check for stopped containers (might just need to be restarted)
-        success, stdout, _ = run_command("docker ps -a --filter name=langflow")
-        if success and "langflow" in stdout:
-            return True
-            
-        # Final check for any langflow containers by image
-        success, stdout, _ = run_command("docker ps -a")
-        return success and "langflowai/langflow" in stdout
+        return inventory.find_container(name="langflow", image="langflowai/langflow") is not None
     
     # LLM Model checking (Ollama models)
     elif tool_type == "LLM":
-        success, stdout, _ = run_command("ollama list")
-        if success:
-            # Clean up model name for checking
-            model_name = tool_name.replace("‑", "-").replace("–", "-").lower()
-            
-            # Handle special model name mappings
-            model_mappings = {
-                "llama3.3": "llama3.3",
-                "phi4": "phi4", 
-                "llama3.2": "llama3.2",
-                "qwen2.5": "qwen2.5",
-                "llava": "llava",
-                "gemma3": "gemma2",  # Ollama uses gemma2 not gemma3
-                "llama3.2-vision": "llama3.2-vision",
-                "mixtral": "mixtral",
-                "llava-llama3": "llava-llama3",
-                "mistral": "mistral",
-                "nomic-embed-text": "nomic-embed-text",
-                "microsoft/phi-3-mini-4k-instruct": "phi3",
-                "mistralai/mistral-7b-instruct-v0.2": "mistral",
-                "meta-llama/llama-3.2-3b-instruct": "llama3.2",
-                "qwen/qwen2.5-7b-instruct": "qwen2.5",
-                "google/gemma-3-1b-it": "gemma2",
-                "llama3.2 vision": "llama3.2-vision",
-                "llava llama3": "llava-llama3",
-                "mixtral 8×7b": "mixtral",
-                "nomic‑embed‑text": "nomic-embed-text"
-            }
-            
-            # Get the actual model name to check
-            check_name = model_mappings.get(model_name, model_name)
+        if inventory.get("ollama_models"):
+            check_name = resolve_model_name(tool_name)
             
-            # Check if model exists (with or without :latest suffix)
-            stdout_lower = stdout.lower()
-            return (check_name in stdout_lower or 
-                   f"{check_name}:latest" in stdout_lower or
-                   f"{check_name}:" in stdout_lower)
+            # Check if model exists (with or without a tag)
+            return inventory.has_model(check_name)
         return False
 
     # Python package checking
-    elif tool_type == "ספריית פייתון" or tool_type == "חבילת פייתון":
-        package_name = tool_name.lower()
-        # Handle special cases
-        if package_name == "smolagent":
-            package_name = "smolagents"
-        elif package_name in ["os", "traceback"]:  # Built-in modules
+    elif tool_type in PYTHON_PACKAGE_TYPES:
+        package_name = resolve_package_name(tool_name)
+        if package_name is None:  # Built-in modules
             return True
-        elif package_name == "automodelforquestionanswering":
-            package_name = "transformers"  # This is part of transformers
-            
-        success, stdout, _ = run_command(f"python -c \"import {package_name}; print('installed')\"")
-        return success
+        return inventory.package_version(package_name) is not None
     
     return False
 
-def install_tool(tool_name, tool_type):
+def install_tool(tool_name, tool_type, inventory=None):
     """Install a tool using the most efficient Windows method"""
+    inventory = inventory or get_inventory()
+    _task_context.tool = tool_name
+    _task_context.phase = "install"
+    output, log_path = "", ""
     
     print(f"\n🔧 Installing {tool_name}...")
     
     # Framework installations
     if tool_name.lower() == "ollama":
         print("Installing Ollama via winget...")
-        success, stdout, stderr = run_winget_with_progress("winget install Ollama.Ollama")
+        success, output, log_path = run_winget_with_progress("winget install Ollama.Ollama")
         if not success:
             print("Trying direct download...")
-            success, stdout, stderr = run_command_with_spinner("curl -L https://ollama.com/download/OllamaSetup.exe -o OllamaSetup.exe && start OllamaSetup.exe", "Downloading Ollama")
+            with TIMELINE.step(f"download {OLLAMA_INSTALLER_URL}") as step:
+                installer = download_artifact(OLLAMA_INSTALLER_URL)
+                step['exit_code'] = 0 if installer else 1
+                step['bytes'] = os.path.getsize(installer) if installer else None
+            if installer:
+                success, output, log_path = run_command_with_spinner(f'start "" "{installer}"', "Starting Ollama installer")
         
     elif tool_name.lower() == "docker":
         print("Installing Docker Desktop via winget...")
-        success, stdout, stderr = run_winget_with_progress("winget install Docker.DockerDesktop")
+        success, output, log_path = run_winget_with_progress("winget install Docker.DockerDesktop")
         
     elif "open webui" in tool_name.lower():
         print("Installing Open WebUI via Docker...")
-        success, stdout, stderr = run_docker_with_progress("docker run -d -p 3000:8080 --add-host=host.docker.internal:host-gateway -v open-webui:/app/backend/data --name open-webui --restart always ghcr.io/open-webui/open-webui:main")
+        success, output, log_path = install_container(CONTAINERS["open webui"], inventory)
         
     elif tool_name.lower() == "anythingllm":
         print("Installing AnythingLLM via winget...")
-        success, stdout, stderr = run_winget_with_progress("winget install Mintplex-Labs.AnythingLLM")
+        success, output, log_path = run_winget_with_progress("winget install Mintplex-Labs.AnythingLLM")
         if not success:
             print("Please download manually from: https://anythingllm.com/desktop")
             return True  # Manual installation
             
     elif tool_name.lower() == "n8n":
         print("Installing n8n via npm...")
-        success, stdout, stderr = run_command_with_spinner("npm install -g n8n", "Installing n8n")
+        success, output, log_path = run_command_with_spinner("npm install -g n8n", "Installing n8n")
         if not success:
             print("Installing n8n via Docker...")
-            success, stdout, stderr = run_docker_with_progress("docker run -d -p 5678:5678 --name n8n n8nio/n8n")
+            success, output, log_path = install_container(CONTAINERS["n8n"], inventory)
         
     elif tool_name.lower() == "langflow":
         print("Installing Langflow via Docker...")
         # First check if a langflow container already exists (stopped)
-        existing_check, stdout, _ = run_command("docker ps -a --filter name=langflow")
-        if "langflow" in stdout:
+        if inventory.find_container(name="langflow"):
             print("Existing Langflow container found. Starting it...")
-            success, stdout, stderr = run_command_with_spinner("docker start langflow", "Starting Langflow")
+            success, output, log_path = start_container("langflow")
         else:
-            success, stdout, stderr = run_docker_with_progress("docker run -d -p 7860:7860 --name langflow --restart unless-stopped langflowai/langflow:latest")
+            success, output, log_path = install_container(CONTAINERS["langflow"], inventory)
         
     # LLM Model installations
     elif tool_type == "LLM":
-        model_name = tool_name.replace("‑", "-").replace("–", "-").lower()
-        
-        # Handle special model name mappings for installation
-        model_mappings = {
-            "llama3.3": "llama3.3",
-            "phi4": "phi4", 
-            "llama3.2": "llama3.2",
-            "qwen2.5": "qwen2.5",
-            "llava": "llava",
-            "gemma3": "gemma2",  # Ollama uses gemma2 not gemma3
-            "llama3.2-vision": "llama3.2-vision",
-            "mixtral": "mixtral",
-            "llava-llama3": "llava-llama3",
-            "mistral": "mistral",
-            "nomic-embed-text": "nomic-embed-text",
-            "microsoft/phi-3-mini-4k-instruct": "phi3",
-            "mistralai/mistral-7b-instruct-v0.2": "mistral",
-            "meta-llama/llama-3.2-3b-instruct": "llama3.2",
-            "qwen/qwen2.5-7b-instruct": "qwen2.5",
-            "google/gemma-3-1b-it": "gemma2",
-            "llama3.2 vision": "llama3.2-vision",
-            "llava llama3": "llava-llama3",
-            "mixtral 8×7b": "mixtral",
-            "nomic‑embed‑text": "nomic-embed-text"
-        }
-        
-        actual_model = model_mappings.get(model_name, model_name)
+        actual_model = tagged_model_name(resolve_model_name(tool_name))
         print(f"Installing {actual_model} via Ollama...")
-        print(f"Note: Large models may take 10-30 minutes to download")
-        success, stdout = run_ollama_with_progress(f"ollama pull {actual_model}")
-        stderr = ""  # Ollama progress function doesn't return stderr separately
+        client = OllamaClient()
+        if import_model_from_mirror(actual_model):
+            success = True
+        elif client.is_running():
+            with TIMELINE.step(f"POST /api/pull {actual_model}") as step:
+                success, progress = run_ollama_pull_with_progress(actual_model, client)
+                step['exit_code'] = 0 if success else 1
+                step['bytes'] = progress.completed if progress else None
+        else:
+            # No server to stream from; let the CLI start/find one
+            success, output, log_path = run_ollama_with_progress(f"ollama pull {actual_model}")
         
     # Python package installations
-    elif tool_type == "ספריית פייתון" or tool_type == "חבילת פייתון":
-        package_name = tool_name.lower()
-        if package_name == "smolagent":
-            package_name = "smolagents"
-        elif package_name in ["os", "traceback"]:  # Built-in modules
+    elif tool_type in PYTHON_PACKAGE_TYPES:
+        package_name = resolve_package_name(tool_name)
+        if package_name is None:  # Built-in modules
             return True
-        elif package_name == "automodelforquestionanswering":
-            package_name = "transformers"
             
-        print(f"Installing {package_name} via pip...")
-        success, stdout, stderr = run_pip_with_progress(f"pip install {package_name}")
+        backend = package_backend()
+        print(f"Installing {package_name} via {backend.name}...")
+        success, output, log_path = run_pip_with_progress(backend.install_command([package_name]))
         
     else:
         print(f"⚠️  Unknown installation method for {tool_name}")
         return False
 
+    # Only the inventory pieces this installation touched are re-gathered
+    inventory.invalidate(*sections_changed_by(tool_name, tool_type))
+
     if success:
         print(f"✅ Successfully installed {tool_name}")
+        _task_context.phase = "verify"
+        if not check_installed(tool_name, tool_type, inventory):
+            print(f"⚠️  {tool_name} is not detected yet; it may need a restart or a new terminal")
     else:
         print(f"❌ Failed to install {tool_name}")
-        if stderr:
-            print(f"Error: {stderr}")
+        print_output_tail(output, log_path)
             
     return success
 
-def parse_markdown_requirements():
-    """Parse the markdown file to get tool requirements"""
-    tools = []
+# As pip reads them, a comment starts at a "#" that begins the line or follows
+# whitespace; "#sha256=" and "#egg=" in URLs are part of the requirement
+REQUIREMENT_COMMENT = re.compile(r'(^|\s+)#.*$')
+
+# Options of a requirements file whose value is another file, relative to it
+REQUIREMENT_FILE_OPTIONS = ("-r", "--requirement", "-c", "--constraint")
+
+def read_requirements(path):
+    """Return the requirement lines of a requirements file, without comments"""
+    requirements = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = REQUIREMENT_COMMENT.sub("", line).strip()
+            if line:
+                requirements.append(line)
+    return requirements
+
+def requirement_names(requirements):
+    """Return the bare package names of requirement lines, skipping pip options"""
+    return [re.split(r'[<>=!~;@\[ ]', r)[0] for r in requirements if not r.startswith("-")]
+
+def requirement_options(requirements, base_dir="."):
+    """Return the pip options among requirement lines as command arguments.
+
+    Files named by -r and -c are found relative to base_dir, the directory
+    of the requirements file, as pip does.
+    """
+    options = []
+    for line in requirements:
+        match = re.match(r'(-[^\s=]+)(?:[\s=]+(.+))?$', line)
+        if not match:
+            continue
+        option, value = match.groups()
+        if value and option in REQUIREMENT_FILE_OPTIONS:
+            value = os.path.join(base_dir, value)
+        options += [option, value] if value else [option]
+    return options
+
+def pip_install_command(packages, options=()):
+    """Build one install command for several requirement specs with the selected backend"""
+    return package_backend().install_command(packages, options=options)
+
+def checklist_python_packages(tools):
+    """Return the pip package names of the checklist's Python entries, without duplicates"""
+    packages = []
+    for tool in tools:
+        if tool['type'] in PYTHON_PACKAGE_TYPES:
+            package_name = resolve_package_name(tool['name'])
+            if package_name and package_name not in packages:
+                packages.append(package_name)
+    return packages
+
+def build_wheelhouse(wheelhouse, packages, requirements_file=None):
+    """Download or build wheels for packages and all their dependencies.
+
+    The result can be copied to other machines and installed with
+    --wheelhouse, without any access to the package index.
+    """
+    os.makedirs(wheelhouse, exist_ok=True)
+    if requirements_file:
+        packages = requirement_names(read_requirements(requirements_file))
+        command = f'pip wheel --wheel-dir "{wheelhouse}" -r "{requirements_file}"'
+    else:
+        command = f'pip wheel --wheel-dir "{wheelhouse}" ' + " ".join(f'"{p}"' for p in packages)
+
+    print(f"\n🔧 Building wheels for {len(packages)} Python packages into {wheelhouse}...")
+    _task_context.tool = "wheelhouse"
+    _task_context.phase = "install"
+    success, output, log_path = run_pip_with_progress(command, package_count=len(packages))
+
+    wheels = [f for f in os.listdir(wheelhouse) if f.endswith(".whl")]
+    size = sum(os.path.getsize(os.path.join(wheelhouse, f)) for f in wheels)
+    if success:
+        print(f"✅ Wheelhouse ready: {len(wheels)} wheels, {format_bytes(size)}")
+    else:
+        print(f"❌ Failed to build the wheelhouse ({len(wheels)} wheels so far)")
+        print_output_tail(output, log_path)
+    return success
+
+def find_conflicting_pair(left, right, options=()):
+    """Narrow two sets of packages that install on their own, but not
+    together, down to one package of each.
+
+    Only the resolver runs (--dry-run), nothing is installed. Returns []
+    if the two sets resolve together after all.
+    """
+    def resolves(specs):
+        success, _, _ = run_command(wheelhouse_command(pip_install_command(specs, list(options) + ["--dry-run"])))
+        return success
+
+    print(f"🔎 Checking whether {', '.join(left)} and {', '.join(right)} can be installed together")
+    if resolves(left + right):
+        return []
+    while len(left) > 1:
+        middle = len(left) // 2
+        left = left[middle:] if resolves(left[:middle] + right) else left[:middle]
+    while len(right) > 1:
+        middle = len(right) // 2
+        right = right[middle:] if resolves(left + right[:middle]) else right[:middle]
+    print(f"⚔️  {left[0]} and {right[0]} cannot be installed together")
+    return [left[0], right[0]]
+
+def bisect_failing_packages(packages, options=()):
+    """Split a failed batch and install the halves separately.
+
+    Returns the packages that still fail on their own, or, where both
+    halves install cleanly but not together, the pair that conflicts.
+    Every half that installs cleanly stays installed along the way; options
+    (e.g. --index-url) are passed to every install.
+    """
+    if len(packages) == 1:
+        return list(packages)
+    failed = []
+    middle = len(packages) // 2
+    halves = (packages[:middle], packages[middle:])
+    for half in halves:
+        print(f"🔎 Trying {len(half)} of the packages: {', '.join(half)}")
+        success, _, _ = run_pip_with_progress(pip_install_command(half, options), package_count=len(half))
+        if not success:
+            failed.extend(half if len(half) == 1 else bisect_failing_packages(half, options))
+    if not failed:
+        failed = find_conflicting_pair(*halves, options=options)
+    return failed
+
+def install_python_packages(packages, requirements_file=None, inventory=None):
+    """Install Python packages with a single pip (or uv) resolve.
+
+    Installs the given packages, or everything in requirements_file, so the
+    resolver sees the whole set at once. If the batch fails it is bisected to
+    find the culprits. Returns (success, failed_packages).
+    """
+    inventory = inventory or get_inventory()
+    options = []
+    if requirements_file:
+        requirements = read_requirements(requirements_file)
+        packages = [r for r in requirements if not r.startswith("-")]
+        options = requirement_options(requirements, os.path.dirname(os.path.abspath(requirements_file)))
+        command = package_backend().install_command(requirements_file=requirements_file)
+    else:
+        command = pip_install_command(packages)
+
+    print(f"\n🔧 Installing {len(packages)} Python packages in one batch...")
+    _task_context.tool = "python-packages"
+    _task_context.phase = "install"
+    success, output, log_path = run_pip_with_progress(command, package_count=len(packages))
+    failed = []
+    if not success:
+        print("❌ Batch install failed; bisecting to find the failing package(s)...")
+        failed = bisect_failing_packages(packages, options)
+        if not failed:
+            # Every part installed and nothing conflicts: the failure did not last
+            print("🔁 Every package installs; running the whole batch again...")
+            success, output, log_path = run_pip_with_progress(command, package_count=len(packages))
+
+    inventory.invalidate("python")
+
+    if success:
+        print(f"✅ Successfully installed {len(packages)} Python packages")
+    else:
+        print(f"❌ Failed to install: {', '.join(failed) or 'unknown package'}")
+        print_output_tail(output, log_path)
+    return success, failed
+
+# Runs inside the target interpreter: maps distribution names (JSON on stdin)
+# to the top-level modules they install, without importing them
+IMPORT_NAMES_SCRIPT = r'''
+import importlib.metadata, json, re, sys
+def normalize(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+modules = {}
+for module, dists in importlib.metadata.packages_distributions().items():
+    if not module.startswith("_"):
+        for dist in dists:
+            modules.setdefault(normalize(dist), []).append(module)
+print(json.dumps({name: sorted(modules.get(normalize(name), [])) for name in json.loads(sys.stdin.read())}))
+'''
+
+# One line of `python -X importtime`: self and cumulative microseconds, then
+# the module indented by two spaces per nesting level
+IMPORT_TIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+def import_names(packages, python=PYTHON_EXECUTABLE):
+    """Return {package: module to import}, guessing from the name where metadata has no answer"""
+    try:
+        result = subprocess.run([python, "-c", IMPORT_NAMES_SCRIPT], input=json.dumps(list(packages)),
+                                capture_output=True, text=True, encoding='utf-8', errors='ignore')
+        modules = json.loads(result.stdout) if result.returncode == 0 else {}
+    except Exception:
+        modules = {}
+    names = {}
+    for package in packages:
+        guess = package.replace("-", "_")
+        candidates = modules.get(package) or []
+        # Prefer the module named like the package when it installs several
+        names[package] = guess if guess in candidates or not candidates else candidates[0]
+    return names
+
+def parse_import_times(output, module):
+    """Summarize the -X importtime output of `import module`.
+
+    Returns the cumulative time of the import, the time per top-level
+    package it loaded (including itself) and its heaviest single modules,
+    all in seconds.
+    """
+    entries = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+
+    # Lines come in post-order: the import's own line follows everything it
+    # loaded, back to the previous top-level line of interpreter startup
+    end = max((i for i, e in enumerate(entries) if e[3] == module and e[2] == 0), default=None)
+    if end is None:
+        return None
+    start = max((i for i, e in enumerate(entries[:end]) if e[2] == 0), default=-1) + 1
+    subtree = entries[start:end + 1]
+
+    by_package = {}
+    for self_us, _, _, name in subtree:
+        top = name.split(".")[0]
+        by_package[top] = by_package.get(top, 0) + self_us
+    heaviest = sorted(subtree, key=lambda e: e[0], reverse=True)[:5]
+    return {
+        'seconds': entries[end][1] / 1e6,
+        'modules': len(subtree),
+        'packages': {name: us / 1e6 for name, us in sorted(by_package.items(), key=lambda p: p[1], reverse=True)},
+        'heaviest': [{'module': name, 'self_seconds': self_us / 1e6, 'cumulative_seconds': cumulative_us / 1e6}
+                     for self_us, cumulative_us, _, name in heaviest]
+    }
+
+def profile_imports(packages, python=PYTHON_EXECUTABLE, report_path=None):
+    """Time the import of each package in a fresh interpreter and write a ranked report"""
+    packages = [p for p in packages if p]
+    print(f"\n⏱️  Profiling the import of {len(packages)} Python packages...")
+    modules = import_names(packages, python)
+    _task_context.phase = "verify"
+    results = {}
+    for package in packages:
+        module = modules[package]
+        _task_context.tool = package
+        with TIMELINE.step(f"{python} -X importtime -c \"import {module}\"") as step:
+            try:
+                process = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                                         capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=300)
+                step['exit_code'] = process.returncode
+                profile = parse_import_times(process.stderr, module) if process.returncode == 0 else None
+                error = None if profile else (process.stderr.strip().splitlines() or ["no import trace"])[-1]
+            except subprocess.TimeoutExpired:
+                profile, error = None, "timed out"
+        results[package] = dict(profile, module=module) if profile else {'module': module, 'error': error}
+        print(f"  {package:<28} " + (f"{profile['seconds']:7.2f}s" if profile else f"❌ {error}"))
+
+    ranked = sorted(results.items(), key=lambda r: r[1].get('seconds', -1), reverse=True)
+    print("\n📊 Import time, slowest first")
+    print("=" * 50)
+    for package, result in ranked:
+        if 'error' in result:
+            continue
+        others = [f"{name} {seconds:.2f}s" for name, seconds in result['packages'].items() if name != result['module']][:3]
+        print(f"{result['seconds']:7.2f}s  {package:<28} {result['modules']:>5} modules"
+              + (f"  (pulls in {', '.join(others)})" if others else ""))
+        for heavy in result['heaviest'][:3]:
+            print(f"           {heavy['self_seconds']:6.3f}s self  {heavy['module']}")
+
+    report_path = report_path or os.path.join(PERF_REPORT_DIR, re.sub(r'[^\w.-]+', '_', platform.node() or "machine") + "-imports.json")
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({'machine': machine_info(), 'python': python, 'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       'packages': dict(ranked)}, f, indent=2)
+        print(f"📄 Import profile: {report_path}")
+    except OSError as e:
+        print(f"⚠️  Could not write the import profile: {e}")
+    return results
+
+# Where model and image manifests are read from to size downloads. Point
+# TOOLINSTALLER_REGISTRY at a local stub to serve every registry from there.
+OLLAMA_REGISTRY = "https://registry.ollama.ai"
+REGISTRY_OVERRIDE = os.environ.get("TOOLINSTALLER_REGISTRY")
+MANIFEST_TYPES = ", ".join((
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+))
+
+# Image layers are downloaded compressed and take roughly this much more
+# space once extracted
+DOCKER_EXTRACT_FACTOR = 2.0
+
+# Space to leave free on every volume after all downloads
+DISK_HEADROOM = 2 * 1024 ** 3
+
+# Approximate installer sizes of frameworks installed with winget, which has
+# no manifest to ask
+INSTALLER_SIZES = {"docker": 500 * 1000 ** 2, "anythingllm": 200 * 1000 ** 2}
+
+# Downloads expected to take longer than this are flagged before asking
+LONG_DOWNLOAD = 10 * 60
+
+def _registry_get(url, accept, token=None):
+    headers = {"Accept": accept}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=15) as response:
+        return json.loads(response.read())
+
+def _registry_token(challenge):
+    """Fetch an anonymous pull token for a 'WWW-Authenticate: Bearer ...' challenge"""
+    params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+    realm = params.pop("realm")
+    with urllib.request.urlopen(f"{realm}?{urllib.parse.urlencode(params)}", timeout=15) as response:
+        answer = json.loads(response.read())
+    return answer.get("token") or answer.get("access_token")
+
+def registry_manifest(base_url, repository, reference):
+    """Return an image manifest from a v2 registry, resolving multi-platform indexes"""
+    url = f"{base_url}/v2/{repository}/manifests/{reference}"
+    token = None
+    try:
+        manifest = _registry_get(url, MANIFEST_TYPES)
+    except urllib.error.HTTPError as e:
+        challenge = e.headers.get("WWW-Authenticate", "")
+        if e.code != 401 or not challenge.lower().startswith("bearer"):
+            raise
+        token = _registry_token(challenge)
+        manifest = _registry_get(url, MANIFEST_TYPES, token)
+
+    if "manifests" in manifest:
+        # An index of per-platform manifests: size the linux/amd64 one
+        platforms = manifest["manifests"]
+        chosen = next((m for m in platforms if m.get("platform", {}).get("os") == "linux"
+                       and m.get("platform", {}).get("architecture") == "amd64"), platforms[0])
+        manifest = _registry_get(f"{base_url}/v2/{repository}/manifests/{chosen['digest']}", MANIFEST_TYPES, token)
+    return manifest
+
+def manifest_size(manifest):
+    """Total bytes of an image manifest's config and layers"""
+    return manifest.get("config", {}).get("size", 0) + sum(layer.get("size", 0) for layer in manifest.get("layers", []))
+
+def ollama_model_size(model_name):
+    """Download size of an Ollama model in bytes, from the registry manifest"""
+    repository, _, tag = model_name.partition(":")
+    if "/" not in repository:
+        repository = f"library/{repository}"
+    return manifest_size(registry_manifest(REGISTRY_OVERRIDE or OLLAMA_REGISTRY, repository, tag or "latest"))
+
+def docker_image_size(image):
+    """Compressed download size of a Docker image in bytes, from its registry"""
+    repository, tag = split_image_reference(image)
+    host, _, path = repository.partition("/")
+    if not path or ("." not in host and ":" not in host and host != "localhost"):
+        host, path = "registry-1.docker.io", repository if "/" in repository else f"library/{repository}"
+    return manifest_size(registry_manifest(REGISTRY_OVERRIDE or f"https://{host}", path, tag))
+
+def docker_data_dir():
+    """Return the local directory Docker keeps images in"""
+    if os.name == "nt":
+        # Docker Desktop keeps its WSL disk image here
+        return os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Docker")
+    success, stdout, _ = run_command('docker info --format "{{.DockerRootDir}}"')
+    return stdout.strip() if success and os.path.isabs(stdout.strip()) else "/var/lib/docker"
+
+def volume_of(path):
+    """Return (device id, free bytes, existing directory) for the volume a path is on"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return os.stat(path).st_dev, shutil.disk_usage(path).free, path
+
+class DownloadPlan:
+    """Sizes of the selected downloads, whether they fit on disk and how long they take.
+
+    Sizes come from the Ollama and Docker registry manifests (installers
+    have approximate sizes); entries whose size cannot be looked up are
+    planned as 0 bytes and shown as unknown. Times come from the rates
+    measured on this machine, per download origin.
+    """
+    def __init__(self, tools):
+        self.entries = []
+        docker_dir = None
+        for tool in tools:
+            if tool['type'] == "LLM":
+                source = tagged_model_name(resolve_model_name(tool['name']))
+                self.entries.append({'tool': tool['name'], 'kind': "model", 'source': source, 'size': None,
+                                     'origin': "ollama", 'disk_factor': 1.0, 'path': ollama_models_dir()})
+            elif container_spec(tool['name']) and tool['name'].lower() != "n8n":
+                docker_dir = docker_dir or docker_data_dir()
+                self.entries.append({'tool': tool['name'], 'kind': "image", 'source': container_spec(tool['name'])['image'],
+                                     'size': None, 'origin': "docker", 'disk_factor': DOCKER_EXTRACT_FACTOR,
+                                     'path': docker_dir})
+            elif tool['name'].lower() in INSTALLER_SIZES:
+                self.entries.append({'tool': tool['name'], 'kind': "installer", 'source': "winget",
+                                     'size': INSTALLER_SIZES[tool['name'].lower()], 'origin': "url",
+                                     'disk_factor': 1.0, 'path': ARTIFACT_CACHE_DIR})
+
+    def only(self, tools):
+        """Return the plan of a subset of the tools, keeping the sizes looked up"""
+        names = {tool['name'] for tool in tools}
+        plan = DownloadPlan([])
+        plan.entries = [entry for entry in self.entries if entry['tool'] in names]
+        return plan
+
+    def entry(self, tool_name):
+        return next((entry for entry in self.entries if entry['tool'] == tool_name), None)
+
+    def estimate(self):
+        """Look up every size in parallel"""
+        def look_up(entry):
+            if entry['kind'] == "installer":
+                return
+            _task_context.phase, _task_context.tool = "plan", entry['tool']
+            lookup = ollama_model_size if entry['kind'] == "model" else docker_image_size
+            with TIMELINE.step(f"GET manifest {entry['source']}") as step:
+                try:
+                    entry['size'] = lookup(entry['source'])
+                    step['exit_code'] = 0
+                except Exception as e:
+                    step['exit_code'] = 1
+                    entry['error'] = str(e)
+
+        if self.entries:
+            with ThreadPoolExecutor(max_workers=min(8, len(self.entries))) as executor:
+                list(executor.map(look_up, self.entries))
+        return self
+
+    def sizes(self):
+        """Return {tool name: download bytes} (0 when unknown)"""
+        return {e['tool']: e['size'] or 0 for e in self.entries}
+
+    def duration(self, slots):
+        """Return (seconds, entries left out) to download everything over the parallel slots.
+
+        Each entry is timed at the rate measured for its origin and goes to
+        the least loaded slot, largest first; entries of unknown size, or
+        with no rate measured yet, are left out.
+        """
+        loads = [0.0] * max(1, slots)
+        left_out = 0
+        for entry in sorted(self.entries, key=lambda e: e['size'] or 0, reverse=True):
+            seconds = THROUGHPUT.estimate(entry['origin'], entry['size'] or 0)
+            if seconds is None:
+                left_out += 1
+                continue
+            loads[loads.index(min(loads))] += seconds
+        return max(loads), left_out
+
+    def print_duration(self, slots, label="The downloads"):
+        """Show how long the downloads should take on this machine"""
+        if not self.entries:
+            return
+        seconds, left_out = self.duration(slots)
+        unknown = sum(1 for e in self.entries if not e['size'])
+        total = format_bytes(sum(e['size'] or 0 for e in self.entries))
+        if unknown:
+            total += f" plus {unknown} of unknown size"
+        if left_out == len(self.entries):
+            print(f"⏱️  {label}: {total}; no time estimate until a download has been measured on this machine")
+            return
+        print(f"⏱️  {label}: {total}, about {format_duration(seconds)} at the rates measured on this machine"
+              + (f" ({left_out - unknown} more not estimated)" if left_out > unknown else ""))
+
+    def shortfalls(self):
+        """Return [(directory, needed, free)] for every volume the downloads do not fit on"""
+        volumes = {}
+        for entry in self.entries:
+            device, free, directory = volume_of(entry['path'])
+            volume = volumes.setdefault(device, {'directory': directory, 'free': free, 'needed': DISK_HEADROOM})
+            volume['needed'] += int((entry['size'] or 0) * entry['disk_factor'])
+        return [(v['directory'], v['needed'], v['free']) for v in volumes.values() if v['needed'] > v['free']]
+
+    def print_plan(self, slots):
+        """Show the downloads largest first and how they spread over the parallel slots"""
+        if not self.entries:
+            return
+        print("\n📐 Download plan (largest first)")
+        print("=" * 50)
+        loads = [0] * max(1, slots)
+        for entry in sorted(self.entries, key=lambda e: e['size'] or 0, reverse=True):
+            size = format_bytes(entry['size']) if entry['size'] else "size unknown"
+            print(f"  {entry['tool']:<32} {entry['source']:<36} {size}")
+            loads[loads.index(min(loads))] += entry['size'] or 0
+        total = sum(e['size'] or 0 for e in self.entries)
+        unknown = sum(1 for e in self.entries if not e['size'])
+        print(f"  Total {format_bytes(total)}" + (f" plus {unknown} of unknown size" if unknown else "")
+              + f"; the busiest of {len(loads)} download slots carries {format_bytes(max(loads))}")
+        self.print_duration(slots)
+
+# Resources shared between concurrent installs. Tasks acquire them in this
+# order, so a task queued for pip or winget never holds a download slot.
+RESOURCE_ORDER = ("pip", "winget", "network")
+DEFAULT_RESOURCE_LIMITS = {"pip": 1, "winget": 1, "network": 3}
+
+def install_target(tool_name, tool_type):
+    """Return a key for what installing an entry actually installs"""
+    if tool_type == "LLM":
+        return f"ollama:{resolve_model_name(tool_name)}"
+    elif tool_type in PYTHON_PACKAGE_TYPES:
+        return f"pip:{resolve_package_name(tool_name) or tool_name.lower()}"
+    return f"tool:{tool_name.lower()}"
+
+def task_resources(tool_name, tool_type):
+    """Return the shared resources an installation uses"""
+    if tool_name.lower() in ("ollama", "docker", "anythingllm"):
+        return ("winget", "network")
+    elif tool_type in PYTHON_PACKAGE_TYPES:
+        return ("pip", "network")
+    return ("network",)
+
+def task_dependencies(tool_name, tool_type):
+    """Return (required, optional) frameworks that must be installed first"""
+    tool_name = tool_name.lower()
+    if "open webui" in tool_name or tool_name == "langflow":
+        return ("docker",), ()
+    elif tool_name == "n8n":
+        return (), ("docker",)  # npm first, Docker container only as fallback
+    elif tool_type == "LLM":
+        return ("ollama",), ()
+    return (), ()
+
+class PrioritySlots:
+    """Counting semaphore that hands a freed slot to the highest-priority waiter"""
+    def __init__(self, limit):
+        self.free = limit
+        self._waiting = []  # Heap of (-priority, arrival)
+        self._arrivals = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, priority=0):
+        with self._condition:
+            ticket = (-priority, next(self._arrivals))
+            heapq.heappush(self._waiting, ticket)
+            while self.free == 0 or self._waiting[0] != ticket:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self.free -= 1
+            self._condition.notify_all()  # The next waiter may fit as well
+
+    def release(self):
+        with self._condition:
+            self.free += 1
+            self._condition.notify_all()
+
+class InstallTask:
+    """A checklist entry (or batch of entries) scheduled for installation"""
+    def __init__(self, name, tool_type, resources=(), action=None):
+        self.name = name
+        self.tool_type = tool_type
+        self.resources = resources
+        self.action = action  # Returns success; defaults to install_tool
+        self.priority = 0  # Download bytes; bigger downloads get slots first
+        self.requires = []   # Tasks that must succeed first
+        self.waits_for = []  # Tasks that must only finish first
+        self.status = "pending"  # pending, installed, failed or skipped
+        self.note = ""
+        self.retries = []  # Why each stalled attempt was retried
+        self.duration = 0.0
+        self.done = threading.Event()
+
+class InstallScheduler:
+    """Run install tasks concurrently, honouring dependencies and resource limits"""
+    def __init__(self, resource_limits=None, inventory=None, batch_pip=True, requirements_file=None):
+        limits = dict(DEFAULT_RESOURCE_LIMITS, **(resource_limits or {}))
+        self.semaphores = {name: PrioritySlots(limit) for name, limit in limits.items()}
+        self.inventory = inventory or get_inventory()
+        self.batch_pip = batch_pip
+        self.requirements_file = requirements_file
+        self.tasks = []
+
+    def plan(self, tools):
+        """Build the task graph for the selected checklist entries"""
+        by_target = {}
+        packages = []
+        for tool in tools:
+            target = install_target(tool['name'], tool['type'])
+            if target in by_target or target in packages:
+                print(f"⏩ {tool['name']} is the same install as an earlier entry")
+                continue
+            if tool['type'] in PYTHON_PACKAGE_TYPES and self.batch_pip:
+                if resolve_package_name(tool['name']):
+                    packages.append(target)
+                continue
+            task = InstallTask(tool['name'], tool['type'], task_resources(tool['name'], tool['type']))
+            if tool['type'] == "LLM":
+                task.note = f"pulls {tagged_model_name(resolve_model_name(tool['name']))}"
+            elif tool['type'] in PYTHON_PACKAGE_TYPES:
+                task.note = f"via {package_backend().name}"
+            by_target[target] = task
+            self.tasks.append(task)
+
+        if packages:
+            self.tasks.append(self._python_batch_task([p.split(":", 1)[1] for p in packages]))
+
+        for task in self.tasks:
+            required, optional = task_dependencies(task.name, task.tool_type)
+            for framework in required + optional:
+                dependency = by_target.get(f"tool:{framework}")
+                if dependency:
+                    (task.requires if framework in required else task.waits_for).append(dependency)
+                elif framework in required and not check_installed(framework, "Framework", self.inventory):
+                    task.status = "skipped"
+                    task.note = f"requires {framework}, which is not installed"
+        return self.tasks
+
+    def _python_batch_task(self, packages):
+        """One task that installs every missing Python package in a single pip run"""
+        source = self.requirements_file or f"{len(packages)} from the checklist"
+        task = InstallTask(f"Python packages ({source})", "pip", ("pip", "network"))
+        task.note = f"via {package_backend().name}"
+
+        def install_batch():
+            success, failed = install_python_packages(packages, self.requirements_file, self.inventory)
+            if failed:
+                task.note += f", failed: {', '.join(failed)}"
+            return success
+
+        task.action = install_batch
+        return task
+
+    def _run_task(self, task):
+        """Wait for dependencies and resources, then install"""
+        try:
+            if task.status == "skipped":
+                return
+            for dependency in task.requires + task.waits_for:
+                dependency.done.wait()
+            failed = [d.name for d in task.requires if d.status != "installed"]
+            if failed:
+                task.status = "skipped"
+                task.note = f"requires {', '.join(failed)}"
+                return
+
+            resources = [r for r in RESOURCE_ORDER if r in task.resources]
+            for resource in resources:
+                self.semaphores[resource].acquire(task.priority)
+            start = time.time()
+            _task_context.retries = task.retries
+            try:
+                if deadline_passed():
+                    task.status = "skipped"
+                    task.note = "not started before the deadline"
+                    return
+                if task.action:
+                    success = task.action()
+                else:
+                    success = install_tool(task.name, task.tool_type, self.inventory)
+                task.status = "installed" if success else "failed"
+            except Exception as e:
+                task.status = "failed"
+                task.note = str(e)
+            finally:
+                task.duration = time.time() - start
+                for resource in reversed(resources):
+                    self.semaphores[resource].release()
+        finally:
+            task.done.set()
+
+    def prioritize(self, sizes):
+        """Order downloads longest first: {task name: download bytes}"""
+        for task in self.tasks:
+            task.priority = sizes.get(task.name, 0)
+
+    def run(self):
+        """Run every planned task and return them with their results"""
+        ordered = sorted(self.tasks, key=lambda task: task.priority, reverse=True)
+        threads = [threading.Thread(target=self._run_task, args=(task,), daemon=True) for task in ordered]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.tasks
+
+def print_install_report(tasks):
+    """Print the per-task results of a scheduled run"""
+    icons = {"installed": "✅", "failed": "❌", "skipped": "⏩", "pending": "❔"}
+    print("\n📋 Installation summary")
+    print("=" * 50)
+    for task in tasks:
+        line = f"{icons[task.status]} {task.name:<36} {task.status:<10}"
+        if task.duration:
+            line += f" {task.duration:7.1f}s"
+        if task.note:
+            line += f"  {task.note}"
+        if task.retries:
+            line += f"  ({len(task.retries)} retries; last {task.retries[-1]})"
+        print(line)
+
+# Files the tool list is compiled from, in priority order: the checklist is
+# read first, the reference workbook only adds entries it is missing
+CHECKLIST_FILE = "Installation_Checklist_Prompt.md"
+REFERENCE_WORKBOOK = "Reference Local Sent V1.0 270425.xlsx"
+MANIFEST_SOURCES = (CHECKLIST_FILE, REFERENCE_WORKBOOK)
+MANIFEST_CACHE_FILE = os.path.join(STATE_DIR, "manifest.json")
+
+CHECKLIST_ENTRY = re.compile(r'- \*\*(.*?)\*\* \((.*?)\)')
+WORKBOOK_HEADER = "שם הרכיב"  # Column B header above the first entry
+
+def normalize_entry_name(name):
+    """Clean up a checklist name: unify dashes and spaces, trim whitespace"""
+    name = name.replace("\u2011", "-").replace("\u2013", "-").replace("\xa0", " ")
+    return " ".join(name.split())
+
+def parse_markdown_requirements(path=CHECKLIST_FILE):
+    """Parse the markdown file to get (name, type) entries in checklist order"""
+    entries = []
     
     try:
-        with open("Installation_Checklist_Prompt.md", "r", encoding="utf-8") as f:
-            content = f.read()
-            
-        # Find all tool entries
-        pattern = r'- \*\*(.*?)\*\* \((.*?)\)'
-        matches = re.findall(pattern, content)
-        
-        for name, tool_type in matches:
-            # Skip duplicates and invalid entries
-            if name and tool_type and name not in [t['name'] for t in tools]:
-                tools.append({
-                    'name': name.strip(),
-                    'type': tool_type.strip()
-                })
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                match = CHECKLIST_ENTRY.match(line)
+                if match:
+                    entries.append(match.groups())
                 
     except FileNotFoundError:
-        print("❌ Installation_Checklist_Prompt.md not found!")
+        print(f"❌ {path} not found!")
         return []
     except Exception as e:
         print(f"❌ Error parsing markdown file: {e}")
         return []
         
+    return entries
+
+def parse_reference_workbook(path=REFERENCE_WORKBOOK):
+    """Read (name, type) entries from the reference spreadsheet.
+
+    The workbook is streamed in read-only mode; without openpyxl, or if the
+    file is missing, it simply contributes nothing.
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        import openpyxl
+    except ImportError:
+        print(f"ℹ️  openpyxl is not installed; skipping {path}")
+        return []
+
+    entries = []
+    try:
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            in_table = False
+            for name, tool_type in workbook.worksheets[0].iter_rows(min_col=2, max_col=3, values_only=True):
+                if not in_table:
+                    in_table = name == WORKBOOK_HEADER
+                elif name and tool_type:
+                    entries.append((str(name), str(tool_type)))
+        finally:
+            workbook.close()
+    except Exception as e:
+        print(f"⚠️  Could not read {path}: {e}")
+        return []
+    return entries
+
+def compile_manifest(sources=MANIFEST_SOURCES):
+    """Merge the sources into one tool list with a single entry per install target.
+
+    Entries that install the same thing (a repeated name, or a Hugging Face
+    name that maps to the same Ollama model) keep the first name seen and
+    list the others under 'aliases'.
+    """
+    parsers = {".md": parse_markdown_requirements, ".xlsx": parse_reference_workbook}
+    by_target = {}
+    for source in sources:
+        parse = parsers.get(os.path.splitext(source)[1].lower())
+        if not parse:
+            continue
+        for name, tool_type in parse(source):
+            name, tool_type = normalize_entry_name(name), tool_type.strip()
+            if not name or not tool_type:
+                continue
+            target = install_target(name, tool_type)
+            tool = by_target.get(target)
+            if tool is None:
+                by_target[target] = {'name': name, 'type': tool_type, 'target': target, 'aliases': []}
+            elif name != tool['name'] and name not in tool['aliases']:
+                tool['aliases'].append(name)
+    return list(by_target.values())
+
+def source_hashes(sources):
+    """Return {absolute path: sha256 or None} for the manifest sources"""
+    return {os.path.abspath(s): file_sha256(s) if os.path.exists(s) else None for s in sources}
+
+def load_manifest(sources=MANIFEST_SOURCES, cache_file=MANIFEST_CACHE_FILE, refresh=False):
+    """Return the compiled tool list, recompiling only when a source file changed"""
+    # The installer itself is hashed too: its name mappings decide the targets
+    hashes = source_hashes(tuple(sources) + (__file__,))
+    if not refresh:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("sources") == hashes:
+                return cached["tools"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    tools = compile_manifest(sources)
+    if tools:
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            temp_path = cache_file + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"sources": hashes, "tools": tools}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, cache_file)
+        except OSError as e:
+            print(f"⚠️  Could not save the compiled manifest: {e}")
     return tools
 
-def get_installation_warning(tool_name, tool_type):
-    """Get warning message for installations that take a long time or are very large"""
-    
-    # Large LLM model warnings
-    if tool_type == "LLM":
-        model_warnings = {
-            "llama3.3": "⚠️  WARNING: llama3.3 is ~8GB and may take 15-30 minutes to download",
-            "phi4": "⚠️  WARNING: phi4 is ~8GB and may take 15-30 minutes to download", 
-            "llama3.2": "⚠️  WARNING: llama3.2 is ~2GB and may take 5-15 minutes to download",
-            "qwen2.5": "⚠️  WARNING: qwen2.5 is ~4GB and may take 10-25 minutes to download",
-            "llava": "⚠️  WARNING: llava is ~4GB and may take 10-25 minutes to download",
-            "mixtral": "⚠️  WARNING: mixtral is ~26GB and may take 45-90 minutes to download",
-            "llava-llama3": "⚠️  WARNING: llava-llama3 is ~8GB and may take 15-30 minutes to download",
-            "llama3.2-vision": "⚠️  WARNING: llama3.2-vision is ~8GB and may take 15-30 minutes to download"
-        }
-        
-        model_name = tool_name.replace("‑", "-").replace("–", "-").lower()
-        return model_warnings.get(model_name, None)
-    
-    # Framework warnings
-    framework_warnings = {
-        "docker": "⚠️  WARNING: Docker Desktop is ~500MB and may take 5-10 minutes to download and install",
-        "anythingllm": "⚠️  WARNING: AnythingLLM is ~200MB and may take 2-5 minutes to download and install"
-    }
-    
-    return framework_warnings.get(tool_name.lower(), None)
+def get_installation_warning(tool_name, plan):
+    """Estimate how long a tool's download takes here, from its size and the measured rates"""
+    entry = plan.entry(tool_name)
+    if not entry or not entry['size']:
+        return None
+    size = format_bytes(entry['size'])
+    rate, measured = THROUGHPUT.rate(entry['origin'])
+    if rate is None:
+        return f"📦 {tool_name} is a {size} download (no download speed measured on this machine yet)"
+    origin = DOWNLOAD_SOURCES[measured] if measured in DOWNLOAD_SOURCES else measured
+    seconds = entry['size'] / rate
+    icon = "⚠️ " if seconds >= LONG_DOWNLOAD else "⏱️ "
+    return (f"{icon} {tool_name} is a {size} download: about {format_duration(seconds)} "
+            f"at the {format_bytes(rate)}/s measured from {origin}")
+
+def parse_args(argv=None):
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="AI Development Environment Installer")
+    parser.add_argument("command", nargs="?", default="install",
+                        choices=["install", "build-wheelhouse", "export-models", "profile-imports"],
+                        help="install missing tools (default), build wheels for the Python packages, "
+                             "export pulled Ollama models to --model-mirror, "
+                             "or report how long each Python package takes to import")
+    parser.add_argument("--downloads", type=int, default=DEFAULT_RESOURCE_LIMITS["network"],
+                        help="number of downloads to run in parallel (default: %(default)s)")
+    parser.add_argument("--requirements", metavar="FILE",
+                        help="install this requirements file instead of the checklist's Python packages")
+    parser.add_argument("--no-batch-pip", dest="batch_pip", action="store_false",
+                        help="run pip once per package instead of one combined install")
+    parser.add_argument("--package-backend", choices=["auto", "uv", "pip"], default="auto",
+                        help="install Python packages with uv or pip (default: uv when it is on PATH)")
+    parser.add_argument("--no-space-check", dest="space_check", action="store_false",
+                        help="start the downloads even if they do not fit on disk")
+    parser.add_argument("--refresh", action="store_true",
+                        help="recompile the tool list and ignore the detection cache, re-checking every tool")
+    parser.add_argument("--wheelhouse", metavar="DIR",
+                        help="install Python packages only from the wheels in DIR, without the index "
+                             "(with build-wheelhouse: where to put the wheels, default: wheelhouse)")
+    parser.add_argument("--memory-budget", type=float, metavar="GB",
+                        help="memory models may use; picks the largest tag of each model that fits "
+                             f"(default: {DEFAULT_MEMORY_SHARE * 100:.0f}%% of the physical memory)")
+    parser.add_argument("--warm-up", action="store_true",
+                        help="after installing, load every pulled checklist model once and "
+                             "measure its load time and tokens/s")
+    parser.add_argument("--keep-loaded", metavar="MODELS", default="",
+                        help="comma-separated models (or 'all') to keep in memory after the warm-up")
+    parser.add_argument("--tune-ollama", dest="tune_ollama", action="store_const", const=True,
+                        help="tune Ollama's runtime settings for this machine even if it was installed "
+                             "before or a GPU is present (default: after installing Ollama on a CPU-only machine)")
+    parser.add_argument("--no-tune-ollama", dest="tune_ollama", action="store_const", const=False,
+                        help="leave Ollama's runtime settings alone")
+    parser.add_argument("--report", metavar="FILE",
+                        help="where profile-imports writes its JSON report "
+                             "(default: ~/.toolinstaller/reports/<hostname>-imports.json)")
+    parser.add_argument("--ready-timeout", type=float, default=READY_TIMEOUT, metavar="SEC",
+                        help="how long to wait for started containers to answer on their ports "
+                             "(default: %(default)s; 0 does not wait)")
+    parser.add_argument("--stall-window", type=float, default=STALL_WINDOW, metavar="SEC",
+                        help="stop and retry a download that makes too little progress for this long "
+                             "(default: %(default)s; 0 turns it off)")
+    parser.add_argument("--stall-rate", type=float, default=STALL_MIN_RATE / 1024, metavar="KB/S",
+                        help="slowest download speed that is still progress (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=RETRY_LIMIT,
+                        help="times a stalled download is retried, waiting twice as long each time "
+                             "(default: %(default)s)")
+    parser.add_argument("--deadline", type=float, metavar="MIN",
+                        help="stop the downloads and installs still running after this many minutes")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="where to write the Chrome trace of all steps "
+                             "(default: a timestamped file in ~/.toolinstaller/traces)")
+    parser.add_argument("--model-mirror", metavar="DIR",
+                        help="import Ollama models from this mirror before pulling them "
+                             "(with export-models: where to export them)")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+    _task_context.phase = "detect"
+    try:
+        run_installer(args)
+    finally:
+        TIMELINE.report(args.trace)
+
+def run_installer(args):
+    """Run the command selected on the command line"""
     print("🚀 AI Development Environment Installer")
     print("=" * 50)
+    use_supervision(args.stall_window, args.stall_rate * 1024, args.retries,
+                    args.deadline * 60 if args.deadline else None)
+    use_ready_timeout(args.ready_timeout)
+    
+    if args.command == "export-models":
+        if not args.model_mirror:
+            print("❌ export-models needs --model-mirror DIR")
+            return
+        export_models(args.model_mirror)
+        return
     
-    # Parse requirements from markdown
-    tools = parse_markdown_requirements()
+    if args.command == "profile-imports" and args.requirements:
+        profile_imports(requirement_names(read_requirements(args.requirements)), report_path=args.report)
+        return
+    
+    # Load the tool list, compiled from the checklist and reference workbook
+    tools = load_manifest(refresh=args.refresh)
     if not tools:
         print("❌ No tools found to install!")
         return
         
+    if args.command == "build-wheelhouse":
+        build_wheelhouse(args.wheelhouse or "wheelhouse", checklist_python_packages(tools), args.requirements)
+        return
+    
+    if args.command == "profile-imports":
+        profile_imports(checklist_python_packages(tools), report_path=args.report)
+        return
+    
+    if args.model_mirror:
+        use_model_mirror(args.model_mirror)
+    
+    if args.wheelhouse:
+        print(f"📦 Installing Python packages offline from {args.wheelhouse}")
+        use_wheelhouse(args.wheelhouse)
+    
+    backend = use_package_backend(args.package_backend)
+    print(f"📦 Python packages are installed with {backend.name}")
+        
     print(f"Found {len(tools)} tools to check/install\n")
     
-    # Check and install each tool
+    # Entries whose fingerprint is unchanged since the last run are trusted;
+    # --refresh starts from an empty cache and re-detects everything
+    cache = DetectionCache()
+    if not args.refresh:
+        cache.load()
+    cached = {t['name'] for t in tools if cache.lookup(t['name'], t['type'])}
+    
+    # Gather what is left to check once, in parallel; every check below is
+    # answered from this snapshot
+    package_names = [resolve_package_name(t['name']) for t in tools if t['type'] in PYTHON_PACKAGE_TYPES]
+    inventory = get_inventory()
+    inventory.package_names.update(p for p in package_names if p)
+    inventory.refresh({s for t in tools if t['name'] not in cached for s in sections_checked_by(t['name'], t['type'])})
+    if inventory.python_paths:
+        cache.python_paths = inventory.python_paths
+    
+    # Pick the model tags this machine can hold before asking about them
+    hardware = hardware_profile()
+    budget = args.memory_budget * 1e9 if args.memory_budget else (hardware['memory'] or 0) * DEFAULT_MEMORY_SHARE
+    print(f"🖥️  {hardware['cpu_count']} CPU cores, "
+          f"{format_bytes(hardware['memory']) if hardware['memory'] else 'unknown'} memory "
+          f"(budget {format_bytes(budget)}), {format_bytes(hardware['free_disk'])} free for models\n")
+    llm_models = {resolve_model_name(t['name']) for t in tools if t['type'] == "LLM"}
+    model_tags = select_model_tags(llm_models, budget, hardware['free_disk']) if budget else {}
+    use_model_tags(model_tags)
+    
+    # Check each tool first, then size what is missing, so every question
+    # comes with an estimate for this machine
+    missing = []
     for tool in tools:
         name = tool['name']
         tool_type = tool['type']
         
         print(f"🔍 Checking: {name} ({tool_type})")
+        if tool.get('aliases'):
+            print(f"   also listed as: {', '.join(tool['aliases'])}")
         
-        if check_installed(name, tool_type):
+        if name in cached:
+            print(f"✅ {name} is already installed. (unchanged since last check)")
+            continue
+        if check_installed(name, tool_type, inventory):
             print(f"✅ {name} is already installed.")
+            cache.record(name, tool_type, detected_version(name, tool_type, inventory))
             continue
-
-        # Show warning for large installations
-        warning = get_installation_warning(name, tool_type)
+        cache.forget(name, tool_type)
+        missing.append(tool)
+            
+    cache.save()
+    
+    plan = DownloadPlan(missing).estimate()
+    if plan.entries:
+        print()
+        plan.print_duration(args.downloads, f"Everything missing ({len(missing)} tools)")
+    
+    # Collect every answer up front, so the installs themselves can run unattended
+    selected = []
+    install_all = False
+    for tool in missing:
+        name = tool['name']
+        tool_type = tool['type']
+        
+        warning = get_installation_warning(name, plan)
         if warning:
             print(warning)
+        if tool_type == "LLM" and resolve_model_name(name) in model_tags:
+            tag, needed, fits = model_tags[resolve_model_name(name)]
+            if fits:
+                print(f"📐 Will pull {tagged_model_name(resolve_model_name(name))} (needs ~{format_bytes(needed)} memory)")
+            else:
+                print(f"⚠️  Even the smallest tag, {tagged_model_name(resolve_model_name(name))}, needs "
+                      f"~{format_bytes(needed)} memory, more than the {format_bytes(budget)} budget")
+            
+        if install_all:
+            selected.append(tool)
+            continue
             
         # Ask user for installation
         response = input(f"❓ {name} is not installed. Install it? (y/n/all): ").strip().lower()
         
         if response in ['y', 'yes']:
-            install_tool(name, tool_type)
+            selected.append(tool)
         elif response == 'all':
-            # Install all remaining tools
-            install_tool(name, tool_type)
-            for remaining_tool in tools[tools.index(tool)+1:]:
-                if not check_installed(remaining_tool['name'], remaining_tool['type']):
-                    install_tool(remaining_tool['name'], remaining_tool['type'])
-            break
+            # Install this and all remaining missing tools without asking again
+            selected.append(tool)
+            install_all = True
         else:
             print(f"⏩ Skipping {name}")
+    
+    if selected:
+        # The model and image downloads were sized before asking
+        plan = plan.only(selected)
+        plan.print_plan(args.downloads)
+        shortfalls = plan.shortfalls()
+        for directory, needed, free in shortfalls:
+            print(f"❌ Not enough disk space for {directory}: needs {format_bytes(needed)} "
+                  f"(including {format_bytes(DISK_HEADROOM)} headroom), {format_bytes(free)} free")
+        if shortfalls and args.space_check:
+            print("Deselect some downloads, free up space or use --no-space-check.")
+            return
+        
+        print(f"\n🚀 Installing {len(selected)} tools ({args.downloads} parallel downloads)...")
+        scheduler = InstallScheduler({"network": max(1, args.downloads)}, inventory,
+                                     batch_pip=args.batch_pip, requirements_file=args.requirements)
+        scheduler.plan(selected)
+        scheduler.prioritize(plan.sizes())
+        tasks = scheduler.run()
+        # The run ends once the started services actually answer
+        ready = wait_for_services()
+        for task in tasks:
+            spec = container_spec(task.name)
+            if spec and spec["name"] in ready:
+                latency = ready[spec["name"]]
+                task.note = f"ready after {latency:.1f}s" if latency is not None else "not answering yet"
+        print_install_report(tasks)
+    
+    ollama_installed = selected and any(t.name.lower() == "ollama" and t.status == "installed" for t in tasks)
+    if args.tune_ollama or (args.tune_ollama is None and ollama_installed):
+        if args.tune_ollama is None and has_gpu():
+            print("\n🎮 A GPU is present; Ollama keeps its defaults (--tune-ollama applies the CPU profile anyway)")
+        else:
+            tune_ollama({resolve_model_name(t['name']) for t in tools if t['type'] == "LLM"}, budget)
+    
+    if args.warm_up:
+        models = []
+        for tool in tools:
+            if tool['type'] != "LLM":
+                continue
+            # Warm up the selected tag if it was pulled, otherwise any pulled tag
+            installed = inventory.model_tags(resolve_model_name(tool['name']))
+            tagged = tagged_model_name(resolve_model_name(tool['name']))
+            model = tagged if tagged in installed else (installed or [None])[0]
+            if model and model not in models:
+                models.append(model)
+        keep_loaded = [resolve_model_name(m.strip()) for m in args.keep_loaded.split(",") if m.strip()]
+        run_model_warm_up(models, keep_loaded)
             
     print("\n🎉 Installation process completed!")
     print("Note: Some tools may require a system restart to work properly.")